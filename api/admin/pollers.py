@@ -5,7 +5,7 @@ from redis.asyncio import Redis
 from sqlalchemy import select
 
 from database.models import PollerConfig
-from engine.health import read_health
+from engine.health import read_health, read_health_many
 
 router = APIRouter(prefix="/admin/pollers", tags=["admin-pollers"])
 
@@ -26,8 +26,7 @@ async def _poller_rows(request: Request) -> list[PollerConfig]:
         )
 
 
-async def _poller_payload(redis: Redis, row: PollerConfig) -> dict:
-    health = await read_health(redis, row.api_name)
+def _payload(health: dict, row: PollerConfig) -> dict:
     return {
         **health,
         "module": row.module,
@@ -36,10 +35,16 @@ async def _poller_payload(redis: Redis, row: PollerConfig) -> dict:
     }
 
 
+async def _poller_payload(redis: Redis, row: PollerConfig) -> dict:
+    return _payload(await read_health(redis, row.api_name), row)
+
+
 @router.get("")
 async def list_pollers(request: Request):
     redis: Redis = request.app.state.redis
-    return [await _poller_payload(redis, row) for row in await _poller_rows(request)]
+    rows = await _poller_rows(request)
+    healths = await read_health_many(redis, [row.api_name for row in rows])
+    return [_payload(health, row) for health, row in zip(healths, rows, strict=True)]
 
 
 @router.get("/{api}")
@@ -6,7 +6,15 @@ from redis.asyncio import Redis
 from sqlalchemy import select
 
 from database.models import PollerConfig, ProcessorConfig, ProcessorPollerLink
-from database.redis import processor_status_key, queue_key
+from database.redis import processor_status_key
+from engine.queues import (
+    PRIORITY_CLASSES,
+    priority_depths,
+    processing_depth,
+    queue_key_for,
+    stream_depths,
+)
+from engine.tiers import parse_size_tiers
 
 router = APIRouter(tags=["admin-processors"])
 
@@ -22,10 +30,52 @@ def _parse_config(raw: str) -> dict:
         return {}
 
 
-async def _read_processor_health(redis: Redis, api: str) -> dict:
+def _tier_names(config: dict) -> list[str]:
+    try:
+        return [tier.name for tier in parse_size_tiers(config.get("size_tiers"))]
+    except (ValueError, KeyError, TypeError):
+        return []
+
+
+async def _read_processor_health(redis: Redis, api: str, config: dict | None = None) -> dict:
+    config = config or {}
     status = await redis.get(processor_status_key(api)) or "unknown"
-    queue_size = await redis.llen(queue_key(api))
-    return {"api": api, "status": status, "queue_size": queue_size}
+    tiers = _tier_names(config)
+    queue_mode = config.get("queue_mode", "list")
+    priority = queue_mode == "priority"
+    reliable = queue_mode == "reliable"
+    stream = queue_mode == "stream"
+    key_for = queue_key_for(queue_mode)
+    tier_queue_sizes: dict[str | None, int] = {}
+    priority_queue_sizes = dict.fromkeys(PRIORITY_CLASSES, 0)
+    processing = 0
+    consumers: dict[str, dict] = {}
+    for tier in tiers or [None]:
+        if stream:
+            depths = await stream_depths(redis, key_for(api, tier))
+            tier_queue_sizes[tier] = depths["waiting"]
+            processing += depths["pending"]
+            consumers.update(depths["consumers"])
+        elif priority:
+            depths = await priority_depths(redis, key_for(api, tier))
+            for name, depth in depths.items():
+                priority_queue_sizes[name] += depth
+            tier_queue_sizes[tier] = sum(depths.values())
+        else:
+            tier_queue_sizes[tier] = await redis.llen(key_for(api, tier))
+        if reliable:
+            processing += await processing_depth(redis, key_for(api, tier))
+
+    health = {"api": api, "status": status, "queue_size": sum(tier_queue_sizes.values())}
+    if tiers:
+        health["tier_queue_sizes"] = tier_queue_sizes
+    if priority:
+        health["priority_queue_sizes"] = priority_queue_sizes
+    if reliable or stream:
+        health["processing"] = processing
+    if stream:
+        health["consumers"] = consumers
+    return health
 
 
 async def _publish_control(redis: Redis, api: str, action: str) -> None:
@@ -54,13 +104,14 @@ async def _processor_payloads(request: Request, *, only_api: str | None = None)
 
     payloads = []
     for processor in processors:
-        health = await _read_processor_health(redis, processor.api_name)
+        config = _parse_config(processor.config)
+        health = await _read_processor_health(redis, processor.api_name, config)
         payloads.append(
             {
                 **health,
                 "module": processor.module,
                 "enabled": processor.enabled,
-                "config": _parse_config(processor.config),
+                "config": config,
                 "pollers": sorted(links_by_processor.get(processor.id, [])),
             }
         )
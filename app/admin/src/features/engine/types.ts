@@ -25,6 +25,7 @@ export interface PollerHealth {
   status: string
   error_count: number
   interval: number
+  stats?: Record<string, number>
   enabled: boolean
 }
 
@@ -0,0 +1,37 @@
+"""add_announcement_content_hash
+
+Revision ID: b7e4c2a91d03
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4c2a91d03"
+down_revision: str | Sequence[str] | None = "a1b2c3d4e5f6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "announcements",
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_announcements_content_hash"),
+        "announcements",
+        ["content_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_announcements_content_hash"), table_name="announcements")
+    op.drop_column("announcements", "content_hash")
@@ -94,6 +94,7 @@ class Announcement(Base):
     summary: Mapped[str] = mapped_column(Text, nullable=False)
     processing_mode: Mapped[str] = mapped_column(String(20), nullable=False, default="multimodal")
     attachment_url: Mapped[str] = mapped_column(Text, nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     announced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     processed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
@@ -43,8 +43,28 @@ def alert_channel(symbol: str) -> str:
     return f"alerts:{symbol}"
 
 
-def queue_key(api: str) -> str:
-    return f"queue:{api}"
+def queue_key(api: str, tier: str | None = None) -> str:
+    return f"queue:{api}" if tier is None else f"queue:{api}:{tier}"
+
+
+def priority_queue_key(api: str, tier: str | None = None) -> str:
+    return f"pqueue:{api}" if tier is None else f"pqueue:{api}:{tier}"
+
+
+def stream_key(api: str, tier: str | None = None) -> str:
+    return f"stream:{api}" if tier is None else f"stream:{api}:{tier}"
+
+
+def priority_arrivals_key(queue: str) -> str:
+    return f"{queue}:arrivals"
+
+
+def processing_list_key(queue: str, worker: str) -> str:
+    return f"{queue}:processing:{worker}"
+
+
+def queue_leases_key(queue: str) -> str:
+    return f"{queue}:leases"
 
 
 def inflight_key(api: str, item_id: str) -> str:
@@ -71,5 +91,41 @@ def poller_interval_key(api: str) -> str:
     return f"poller:{api}:interval"
 
 
+def poller_stats_key(api: str) -> str:
+    return f"poller:{api}:stats"
+
+
+def holidays_key(segment: str) -> str:
+    return f"nse:holidays:{segment}"
+
+
+def nse_budget_key() -> str:
+    return "nse:budget"
+
+
+def attachment_store_key() -> str:
+    return "attachments:store"
+
+
+def llm_token_estimator_key() -> str:
+    return "llm:token_estimator"
+
+
+def nse_cookies_key() -> str:
+    return "nse:cookies"
+
+
+def nse_cookies_lock_key() -> str:
+    return "nse:cookies:lock"
+
+
 def processor_status_key(api: str) -> str:
     return f"processor:{api}:status"
+
+
+def processor_analysis_cache_key(api: str) -> str:
+    return f"processor:{api}:analysis_cache"
+
+
+def analysis_cache_key(content_hash: str) -> str:
+    return f"analysis:{content_hash}"
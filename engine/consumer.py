@@ -1,8 +1,12 @@
 import asyncio
 import json
 import logging
+import os
+import socket
+import uuid
 from collections.abc import Awaitable, Callable
 
+from engine.queues import ListQueue, PriorityQueue, ReliableQueue, StreamQueue
 from llm.provider import LLMRateLimitError
 
 logger = logging.getLogger(__name__)
@@ -15,23 +19,71 @@ class ConsumerPool:
         queue_key: str,
         processor_fn: Callable[[dict], Awaitable[None]],
         size: int,
+        *,
+        queue_mode: str = "list",
+        priority_max_wait: float = 300.0,
+        visibility_timeout: float = 60.0,
+        batch_fn: Callable[[list[dict]], Awaitable[None]] | None = None,
+        batch_size: int = 1,
     ) -> None:
         self._redis = redis
         self._queue_key = queue_key
+        self._queue_mode = queue_mode
+        # Reliable and stream queues track each worker's item in Redis, so every
+        # worker gets its own queue object and the pool runs a reaper.
+        self._per_worker = queue_mode in ("reliable", "stream")
+        self._visibility_timeout = visibility_timeout
+        if queue_mode == "priority":
+            self._queue = PriorityQueue(redis, queue_key, max_wait=priority_max_wait)
+        elif self._per_worker:
+            self._queue = self._worker_queue()
+        else:
+            self._queue = ListQueue(redis, queue_key)
         self._processor_fn = processor_fn
+        # With a batch function, workers take up to batch_size items at a time.
+        self._batch_fn = batch_fn
+        self._batch_size = max(1, batch_size) if batch_fn is not None else 1
         self._size = size
         self._tasks: set[asyncio.Task] = set()
+        self._reaper: asyncio.Task | None = None
+
+    def _worker_queue(self) -> ReliableQueue | StreamQueue:
+        worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if self._queue_mode == "stream":
+            return StreamQueue(
+                self._redis,
+                self._queue_key,
+                consumer=worker,
+                visibility_timeout=self._visibility_timeout,
+            )
+        return ReliableQueue(
+            self._redis,
+            self._queue_key,
+            worker=worker,
+            visibility_timeout=self._visibility_timeout,
+        )
 
     def _spawn(self) -> None:
         task = asyncio.create_task(self._consume())
         self._tasks.add(task)
         task.add_done_callback(self._tasks.discard)
 
+    def _start_reaper(self) -> None:
+        if self._per_worker and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _stop_reaper(self) -> None:
+        reaper, self._reaper = self._reaper, None
+        if reaper is not None:
+            reaper.cancel()
+            await asyncio.gather(reaper, return_exceptions=True)
+
     async def run(self) -> None:
         workers = [asyncio.create_task(self._consume()) for _ in range(self._size)]
         self._tasks.update(workers)
         for worker in workers:
             worker.add_done_callback(self._tasks.discard)
+        self._start_reaper()
         try:
             await asyncio.gather(*workers)
         except asyncio.CancelledError:
@@ -39,32 +91,80 @@ class ConsumerPool:
                 worker.cancel()
             await asyncio.gather(*workers, return_exceptions=True)
             raise
+        finally:
+            await self._stop_reaper()
 
     async def start(self) -> None:
         for _ in range(self._size):
             self._spawn()
+        self._start_reaper()
 
-    async def _consume(self) -> None:
+    async def _reap(self) -> None:
+        # Every pool on the queue reaps; the release script makes that safe.
         while True:
-            result = await self._redis.blpop(self._queue_key, timeout=2)
-            if result is None:
-                continue
-
-            _, raw_item = result
-            # Intentionally outside try/except: bad JSON is unrecoverable; propagating
-            # to gather() lets the supervisor restart the pool rather than silently skipping.
-            item = json.loads(raw_item)
+            await asyncio.sleep(max(1.0, self._visibility_timeout / 4))
             try:
-                await self._processor_fn(item)
-            except LLMRateLimitError as exc:
-                await self._redis.rpush(self._queue_key, raw_item)
-                wait = exc.retry_after or 60.0
+                moved = await self._queue.reap()
+            except Exception:
+                logger.exception("Consumer: failed to reap expired leases on %s", self._queue_key)
+                continue
+            if moved:
                 logger.warning(
-                    "Consumer: LLM rate limited (retry-after %.0fs) - item re-queued", wait
+                    "Consumer: re-queued %d item(s) from workers that stopped renewing on %s",
+                    moved,
+                    self._queue_key,
                 )
-                await asyncio.sleep(wait)
-            except Exception:
-                logger.exception("Consumer: unhandled error processing item")
+
+    async def _consume(self) -> None:
+        queue = self._worker_queue() if self._per_worker else self._queue
+        try:
+            while True:
+                batch = await queue.pop_batch(self._batch_size, timeout=2)
+                if not batch:
+                    continue
+
+                # Intentionally outside try/except: bad JSON is unrecoverable; propagating
+                # to gather() lets the supervisor restart the pool rather than silently
+                # skipping. Ack it first so a reliable or stream queue doesn't redeliver it
+                # forever, and put the rest of its batch back.
+                items = []
+                for queued in batch:
+                    try:
+                        items.append(json.loads(queued.raw))
+                    except ValueError:
+                        await queue.ack(queued)
+                        rest = [other for other in batch if other is not queued]
+                        if rest:
+                            await queue.requeue(*rest)
+                        raise
+                lease = asyncio.create_task(queue.hold()) if self._per_worker else None
+                try:
+                    if self._batch_fn is not None:
+                        await self._batch_fn(items)
+                    else:
+                        await self._processor_fn(items[0])
+                except LLMRateLimitError as exc:
+                    await queue.requeue(*batch)
+                    wait = exc.retry_after or 60.0
+                    logger.warning(
+                        "Consumer: LLM rate limited (retry-after %.0fs) - %d item(s) re-queued",
+                        wait,
+                        len(batch),
+                    )
+                    await asyncio.sleep(wait)
+                except Exception:
+                    logger.exception("Consumer: unhandled error processing item")
+                    await queue.ack(*batch)
+                else:
+                    await queue.ack(*batch)
+                finally:
+                    if lease is not None:
+                        lease.cancel()
+        except asyncio.CancelledError:
+            # Stopped mid-item (resize, restart): hand it straight back instead of
+            # waiting for the reaper.
+            await queue.release()
+            raise
 
     async def resize(self, new_size: int) -> None:
         current = len(self._tasks)
@@ -89,3 +189,4 @@ class ConsumerPool:
             task.cancel()
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
+        await self._stop_reaper()
@@ -0,0 +1,138 @@
+import json
+import time
+from collections.abc import Callable
+
+from redis.asyncio import Redis
+
+from database.redis import (
+    inflight_key,
+    priority_arrivals_key,
+    priority_queue_key,
+    queue_key,
+    stream_key,
+)
+from engine.queues import PRIORITY_CLASSES, STREAM_FIELD, priority_score
+
+_INFLIGHT_TTL = 3600
+
+# KEYS come in (inflight, queue) pairs, one pair per item; ARGV[1] is the
+# inflight TTL and ARGV[i + 1] is the serialized payload for pair i. Each item
+# keeps the per-item semantics of the old SET NX + RPUSH sequence, but the whole
+# batch is evaluated atomically in a single round trip.
+_ENQUEUE_NEW_SCRIPT = """
+local ttl = ARGV[1]
+local added = 0
+for i = 1, #KEYS / 2 do
+    if redis.call('SET', KEYS[2 * i - 1], '1', 'EX', ttl, 'NX') then
+        redis.call('RPUSH', KEYS[2 * i], ARGV[i + 1])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# The stream variant: the same (inflight, queue) pairs, but each acquired item is
+# XADDed to the stream named by its queue key.
+_ENQUEUE_NEW_STREAM_SCRIPT = """
+local ttl = ARGV[1]
+local field = ARGV[2]
+local added = 0
+for i = 1, #KEYS / 2 do
+    if redis.call('SET', KEYS[2 * i - 1], '1', 'EX', ttl, 'NX') then
+        redis.call('XADD', KEYS[2 * i], '*', field, ARGV[i + 2])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# The priority-queue variant: KEYS come in (inflight, queue, arrivals, watch)
+# quads; ARGV[1] is the TTL, ARGV[2] the arrival time, ARGV[3]/ARGV[4] the
+# scores of a watched/unwatched item arriving then, and ARGV[i + 4] payload i.
+_ENQUEUE_NEW_PRIORITY_SCRIPT = """
+local ttl = ARGV[1]
+local added = 0
+for i = 1, #KEYS / 4 do
+    if redis.call('SET', KEYS[4 * i - 3], '1', 'EX', ttl, 'NX') then
+        local score = ARGV[4]
+        if redis.call('EXISTS', KEYS[4 * i]) == 1 then
+            score = ARGV[3]
+        end
+        redis.call('ZADD', KEYS[4 * i - 2], score, ARGV[i + 4])
+        redis.call('ZADD', KEYS[4 * i - 1], ARGV[2], ARGV[i + 4])
+        added = added + 1
+    end
+end
+return added
+"""
+
+
+async def enqueue_new(
+    redis: Redis,
+    api: str,
+    items: list[tuple[str, dict]],
+    *,
+    ttl: int = _INFLIGHT_TTL,
+    queue_for: Callable[[dict], str] | None = None,
+    watch_key_for: Callable[[dict], str] | None = None,
+    stream: bool = False,
+) -> int:
+    """Enqueue every ``(item_id, item)`` not already inflight; return how many were new.
+
+    Equivalent to ``SET inflight:{api}:{id} NX EX ttl`` followed by
+    ``RPUSH queue:{api}`` (or the queue ``queue_for(item)`` names) for each
+    acquired item, done in one scripted call. With ``watch_key_for``, the
+    queues are priority queues: each item is scored by whether its watch key
+    exists and by arrival time (see ``engine.queues``). With ``stream``, they
+    are streams and each item is ``XADD``ed.
+    """
+    if not items:
+        return 0
+    if watch_key_for is not None:
+        return await _enqueue_new_prioritized(
+            redis,
+            api,
+            items,
+            ttl=ttl,
+            queue_for=queue_for or (lambda item: priority_queue_key(api)),
+            watch_key_for=watch_key_for,
+        )
+    default_key = stream_key if stream else queue_key
+    keys: list[str] = []
+    args: list[str | int] = [ttl, STREAM_FIELD] if stream else [ttl]
+    for item_id, item in items:
+        keys.append(inflight_key(api, item_id))
+        keys.append(default_key(api) if queue_for is None else queue_for(item))
+        args.append(json.dumps(item))
+    script = redis.register_script(_ENQUEUE_NEW_STREAM_SCRIPT if stream else _ENQUEUE_NEW_SCRIPT)
+    return int(await script(keys=keys, args=args))
+
+
+async def _enqueue_new_prioritized(
+    redis: Redis,
+    api: str,
+    items: list[tuple[str, dict]],
+    *,
+    ttl: int,
+    queue_for: Callable[[dict], str],
+    watch_key_for: Callable[[dict], str],
+) -> int:
+    now = time.time()
+    keys: list[str] = []
+    args: list[str | int | float] = [
+        ttl,
+        now,
+        priority_score(PRIORITY_CLASSES["watched"], now),
+        priority_score(PRIORITY_CLASSES["unwatched"], now),
+    ]
+    for item_id, item in items:
+        queue = queue_for(item)
+        keys += [
+            inflight_key(api, item_id),
+            queue,
+            priority_arrivals_key(queue),
+            watch_key_for(item),
+        ]
+        args.append(json.dumps(item))
+    script = redis.register_script(_ENQUEUE_NEW_PRIORITY_SCRIPT)
+    return int(await script(keys=keys, args=args))
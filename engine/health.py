@@ -7,14 +7,18 @@ from database.redis import (
     poller_heartbeat_key,
     poller_interval_key,
     poller_last_success_key,
+    poller_stats_key,
     poller_status_key,
     processor_status_key,
 )
 
 
+def _heartbeat_ttl(interval: float) -> int:
+    return max(1, int(3 * interval))
+
+
 async def write_heartbeat(redis: Redis, api: str, interval: float) -> None:
-    ttl = max(1, int(3 * interval))
-    await redis.set(poller_heartbeat_key(api), int(time.time()), ex=ttl)
+    await redis.set(poller_heartbeat_key(api), int(time.time()), ex=_heartbeat_ttl(interval))
 
 
 async def write_last_success(redis: Redis, api: str) -> None:
@@ -33,19 +37,57 @@ async def write_interval(redis: Redis, api: str, interval: float) -> None:
     await redis.set(poller_interval_key(api), str(interval))
 
 
+async def write_poller_snapshot(
+    redis: Redis,
+    api: str,
+    *,
+    interval: float,
+    status: str,
+    error_count: int | None = None,
+    last_success: bool = False,
+    stats: dict[str, int | float] | None = None,
+) -> None:
+    """Write one poll cycle's health in a single pipelined round trip.
+
+    Always refreshes the heartbeat, interval and status; ``error_count``,
+    ``last_success`` and the ``stats`` hash are only written when given.
+    """
+    now = int(time.time())
+    pipe = redis.pipeline(transaction=False)
+    pipe.set(poller_heartbeat_key(api), now, ex=_heartbeat_ttl(interval))
+    pipe.set(poller_interval_key(api), str(interval))
+    pipe.set(poller_status_key(api), status)
+    if error_count is not None:
+        pipe.set(poller_error_count_key(api), str(error_count))
+    if last_success:
+        pipe.set(poller_last_success_key(api), now)
+    if stats:
+        pipe.hset(poller_stats_key(api), mapping=stats)
+    await pipe.execute()
+
+
 async def write_processor_status(redis: Redis, api: str, status: str) -> None:
     await redis.set(processor_status_key(api), status)
 
 
-async def read_health(redis: Redis, api: str) -> dict:
-    keys = [
+def _health_keys(api: str) -> list[str]:
+    return [
         poller_heartbeat_key(api),
         poller_last_success_key(api),
         poller_status_key(api),
         poller_error_count_key(api),
         poller_interval_key(api),
     ]
-    values = await redis.mget(*keys)
+
+
+def _number(value: str) -> int | float:
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _parse_health(api: str, values: list, stats: dict) -> dict:
     return {
         "api": api,
         "heartbeat": values[0],
@@ -53,4 +95,24 @@ async def read_health(redis: Redis, api: str) -> dict:
         "status": values[2] if values[2] else "unknown",
         "error_count": int(values[3]) if values[3] else 0,
         "interval": float(values[4]) if values[4] else 5.0,
+        "stats": {field: _number(value) for field, value in stats.items()},
     }
+
+
+async def read_health(redis: Redis, api: str) -> dict:
+    return (await read_health_many(redis, [api]))[0]
+
+
+async def read_health_many(redis: Redis, apis: list[str]) -> list[dict]:
+    """Read the health of several pollers in one pipelined round trip."""
+    if not apis:
+        return []
+    pipe = redis.pipeline(transaction=False)
+    for api in apis:
+        pipe.mget(*_health_keys(api))
+        pipe.hgetall(poller_stats_key(api))
+    results = await pipe.execute()
+    return [
+        _parse_health(api, results[2 * index], results[2 * index + 1])
+        for index, api in enumerate(apis)
+    ]
@@ -1,23 +1,48 @@
 import asyncio
+import inspect
 import json
 import logging
 import os
+import tempfile
 import time
-from concurrent.futures import ProcessPoolExecutor
 
-from database.redis import get_redis_client, queue_key
+from database.redis import (
+    attachment_store_key,
+    get_redis_client,
+    llm_token_estimator_key,
+    nse_budget_key,
+)
 from database.session import AsyncSessionLocal
 from engine.consumer import ConsumerPool
 from engine.events import push_event
 from engine.health import write_processor_status, write_status
+from engine.processors.blob_store import BlobStore
+from engine.processors.render_pool import RenderPool
+from engine.queues import QUEUE_MODES, queue_key_for
 from engine.registry import load_enabled
 from engine.session import NseSession
 from engine.supervisor import Supervisor, Watchdog
+from engine.tiers import SizeTier, parse_size_tiers, tier_pool_sizes
 from llm.factory import get_provider
+from llm.provider import TokenEstimator
 
 logger = logging.getLogger(__name__)
 
 _SILENCE_THRESHOLD = float(os.environ.get("POLLER_SILENCE_THRESHOLD", "600"))
+_STATS_EXPORT_INTERVAL = 30.0
+# Processor registry config consumed by its ConsumerPools rather than the processor.
+_POOL_CONFIG_KEYS = (
+    "pool_size",
+    "size_tiers",
+    "queue_mode",
+    "priority_max_wait",
+    "visibility_timeout",
+    "batch_size",
+)
+_ATTACHMENT_STORE_DIR = os.environ.get(
+    "ATTACHMENT_STORE_DIR", os.path.join(tempfile.gettempdir(), "markann-attachments")
+)
+_ATTACHMENT_STORE_MAX_BYTES = int(os.environ.get("ATTACHMENT_STORE_MAX_BYTES", str(1024**3)))
 
 
 async def _run_processor(processor, item: dict, *, redis, api: str) -> None:
@@ -33,6 +58,111 @@ async def _run_processor(processor, item: dict, *, redis, api: str) -> None:
         await push_event(redis, "ok", f"processed {summary} in {elapsed:.2f}s", api=api)
 
 
+async def _run_processor_batch(processor, items: list[dict], *, redis, api: str) -> None:
+    """Run a batch through ``process_batch``; every item that did real work is
+    logged with the time the whole batch took.
+    """
+    start = time.perf_counter()
+    summaries = await processor.process_batch(items)
+    elapsed = time.perf_counter() - start
+    for summary in summaries:
+        if summary is not None:
+            await push_event(
+                redis,
+                "ok",
+                f"processed {summary} in {elapsed:.2f}s (batch of {len(items)})",
+                api=api,
+            )
+
+
+def _processor_batch_size(loaded_processor) -> int:
+    batch_size = int(loaded_processor.config.get("batch_size", 1))
+    if batch_size > 1 and not loaded_processor.supports_batch:
+        logger.warning(
+            "Ignoring batch_size for processor %r: it doesn't implement process_batch",
+            loaded_processor.api_name,
+        )
+        return 1
+    return max(1, batch_size)
+
+
+def _processor_size_tiers(loaded_processor) -> list[SizeTier]:
+    try:
+        return parse_size_tiers(loaded_processor.config.get("size_tiers"))
+    except (ValueError, KeyError, TypeError) as exc:
+        logger.warning(
+            "Ignoring invalid size_tiers for processor %r: %s", loaded_processor.api_name, exc
+        )
+        return []
+
+
+def _processor_queue_mode(loaded_processor) -> str:
+    mode = loaded_processor.config.get("queue_mode", "list")
+    if mode not in QUEUE_MODES:
+        logger.warning(
+            "Ignoring unknown queue_mode %r for processor %r", mode, loaded_processor.api_name
+        )
+        return "list"
+    return mode
+
+
+def _constructor_keywords(cls) -> set[str] | None:
+    """Keyword arguments ``cls(...)`` accepts, or ``None`` if it takes ``**kwargs``."""
+    params = inspect.signature(cls).parameters.values()
+    if any(param.kind is param.VAR_KEYWORD for param in params):
+        return None
+    return {
+        param.name
+        for param in params
+        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+    }
+
+
+def _processor_options(loaded_processor, *, blob_store: BlobStore | None) -> dict | None:
+    """Keyword arguments for the processor beyond the ones every processor takes.
+
+    These are the registry config keys the ConsumerPools don't consume, plus
+    ``blob_store`` when the constructor accepts it (processors written before it
+    existed don't). Returns ``None`` when the constructor doesn't accept one of
+    the config keys, since a typo or stale key would otherwise fail every item.
+    """
+    options = {k: v for k, v in loaded_processor.config.items() if k not in _POOL_CONFIG_KEYS}
+    accepted = _constructor_keywords(loaded_processor.processor_cls)
+    unknown = sorted(options.keys() - accepted) if accepted is not None else []
+    if unknown:
+        logger.error(
+            "Skipping processor %r: its constructor doesn't accept config key(s) %s",
+            loaded_processor.api_name,
+            ", ".join(unknown),
+        )
+        return None
+    if accepted is None or "blob_store" in accepted:
+        options["blob_store"] = blob_store
+    return options
+
+
+def _poller_routing(loaded_processor) -> dict:
+    """The poller options that make it enqueue where this processor consumes."""
+    routing: dict = {}
+    if _processor_size_tiers(loaded_processor):
+        routing["size_tiers"] = loaded_processor.config["size_tiers"]
+    mode = _processor_queue_mode(loaded_processor)
+    if mode != "list":
+        routing["queue_mode"] = mode
+    return routing
+
+
+async def _run_pools(pools: list[ConsumerPool]) -> None:
+    """Run several pools as one component: if one fails, stop the others too."""
+    tasks = [asyncio.create_task(pool.run()) for pool in pools]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def build_components(
     *,
     db,
@@ -43,18 +173,34 @@ async def build_components(
     process_pool,
     db_factory,
     watchdog_register,
+    blob_store=None,
 ) -> list[ConsumerPool]:
     """Load enabled registry rows and register them with the supervisor."""
     loaded_pollers, loaded_processors = await load_enabled(db)
+    processor_options = {}
+    for loaded_processor in loaded_processors:
+        options = _processor_options(loaded_processor, blob_store=blob_store)
+        if options is not None:
+            processor_options[loaded_processor.api_name] = options
+    loaded_processors = [p for p in loaded_processors if p.api_name in processor_options]
     pools: list[ConsumerPool] = []
 
+    # A processor's size tiers and queue mode decide which queue its poller(s)
+    # push each item to.
+    routing_by_poller: dict[str, dict] = {}
+    for loaded_processor in loaded_processors:
+        routing = _poller_routing(loaded_processor)
+        if routing:
+            for poller_api in loaded_processor.poller_api_names:
+                routing_by_poller.setdefault(poller_api, routing)
+
     for loaded_poller in loaded_pollers:
-        def make_poller_starter(loaded):
+        def make_poller_starter(loaded, routing):
             async def _start() -> None:
                 poller = loaded.poller_cls(
                     session=session,
                     redis=redis,
-                    **loaded.config,
+                    **{**loaded.config, **routing},
                 )
                 await poller.run()
 
@@ -62,16 +208,25 @@ async def build_components(
 
         supervisor.register(
             f"poller:{loaded_poller.api_name}",
-            make_poller_starter(loaded_poller),
+            make_poller_starter(loaded_poller, routing_by_poller.get(loaded_poller.api_name, {})),
         )
         watchdog_register(loaded_poller.api_name)
 
     for loaded_processor in loaded_processors:
         primary_poller_api = loaded_processor.poller_api_names[0]
         pool_size = int(loaded_processor.config.get("pool_size", 8))
+        size_tiers = _processor_size_tiers(loaded_processor)
+        queue_mode = _processor_queue_mode(loaded_processor)
+        pool_options = {
+            "queue_mode": queue_mode,
+            "priority_max_wait": float(loaded_processor.config.get("priority_max_wait", 300.0)),
+            "visibility_timeout": float(loaded_processor.config.get("visibility_timeout", 60.0)),
+        }
+        options = processor_options[loaded_processor.api_name]
+        key_for = queue_key_for(queue_mode)
 
-        def make_processor_fn(loaded):
-            async def _fn(item: dict) -> None:
+        def make_processor_fn(loaded, options, *, batch: bool = False):
+            async def _fn(payload) -> None:
                 async with db_factory() as proc_db:
                     processor = loaded.processor_cls(
                         redis=redis,
@@ -79,34 +234,93 @@ async def build_components(
                         llm=llm,
                         process_pool=process_pool,
                         session=session,
+                        **options,
                     )
-                    await _run_processor(processor, item, redis=redis, api=loaded.api_name)
+                    run = _run_processor_batch if batch else _run_processor
+                    await run(processor, payload, redis=redis, api=loaded.api_name)
 
             return _fn
 
-        pool = ConsumerPool(
-            redis=redis,
-            queue_key=queue_key(primary_poller_api),
-            processor_fn=make_processor_fn(loaded_processor),
-            size=pool_size,
-        )
-        pools.append(pool)
+        processor_fn = make_processor_fn(loaded_processor, options)
+        batch_size = _processor_batch_size(loaded_processor)
+        if batch_size > 1:
+            pool_options["batch_fn"] = make_processor_fn(loaded_processor, options, batch=True)
+            pool_options["batch_size"] = batch_size
+        if size_tiers:
+            tier_sizes = tier_pool_sizes(size_tiers, pool_size)
+            processor_pools = [
+                ConsumerPool(
+                    redis=redis,
+                    queue_key=key_for(primary_poller_api, tier.name),
+                    processor_fn=processor_fn,
+                    size=tier_sizes[tier.name],
+                    **pool_options,
+                )
+                for tier in size_tiers
+            ]
+        else:
+            processor_pools = [
+                ConsumerPool(
+                    redis=redis,
+                    queue_key=key_for(primary_poller_api),
+                    processor_fn=processor_fn,
+                    size=pool_size,
+                    **pool_options,
+                )
+            ]
+        pools.extend(processor_pools)
 
-        def make_processor_starter(p: ConsumerPool, api: str):
+        def make_processor_starter(ps: list[ConsumerPool], api: str):
             async def _start() -> None:
                 await write_processor_status(redis, api, "running")
-                await p.run()
+                if len(ps) == 1:
+                    await ps[0].run()
+                else:
+                    await _run_pools(ps)
 
             return _start
 
         supervisor.register(
             f"processor:{loaded_processor.api_name}",
-            make_processor_starter(pool, loaded_processor.api_name),
+            make_processor_starter(processor_pools, loaded_processor.api_name),
         )
 
     return pools
 
 
+async def _export_session_stats(redis, session: NseSession) -> None:
+    """Periodically publish the shared NSE request budget's wait-time metrics."""
+    while True:
+        await asyncio.sleep(_STATS_EXPORT_INTERVAL)
+        stats = session.budget_stats()
+        if not stats:
+            continue
+        try:
+            await redis.hset(nse_budget_key(), mapping=stats)
+        except Exception:
+            logger.exception("Failed to export NSE request budget stats")
+
+
+async def _export_attachment_store_stats(redis, store: BlobStore) -> None:
+    """Periodically publish the attachment blob store's hit and eviction counters."""
+    while True:
+        await asyncio.sleep(_STATS_EXPORT_INTERVAL)
+        try:
+            await redis.hset(attachment_store_key(), mapping=store.stats())
+        except Exception:
+            logger.exception("Failed to export attachment store stats")
+
+
+async def _export_token_estimator_stats(redis, estimator: TokenEstimator) -> None:
+    """Periodically publish how far the LLM token estimates are from actual usage."""
+    while True:
+        await asyncio.sleep(_STATS_EXPORT_INTERVAL)
+        try:
+            await redis.hset(llm_token_estimator_key(), mapping=estimator.stats())
+        except Exception:
+            logger.exception("Failed to export LLM token estimator stats")
+
+
 async def _listen_control(redis, supervisor: Supervisor) -> None:
     """Subscribe to engine:control and handle pause/resume/restart commands."""
     pubsub = redis.pubsub()
@@ -159,10 +373,15 @@ async def _listen_control(redis, supervisor: Supervisor) -> None:
 async def run() -> None:
     redis = get_redis_client()
     llm = get_provider()
-    process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    process_pool = RenderPool(workers=os.cpu_count() or 1)
+    blob_store = (
+        BlobStore(_ATTACHMENT_STORE_DIR, max_bytes=_ATTACHMENT_STORE_MAX_BYTES)
+        if _ATTACHMENT_STORE_MAX_BYTES > 0
+        else None
+    )
     supervisor = Supervisor(restart_delay=2.0)
 
-    async with NseSession() as session:
+    async with NseSession(redis=redis) as session:
         watchdog = Watchdog(
             redis=redis,
             supervisor=supervisor,
@@ -178,15 +397,20 @@ async def run() -> None:
                 process_pool=process_pool,
                 db_factory=AsyncSessionLocal,
                 watchdog_register=watchdog.register,
+                blob_store=blob_store,
             )
 
         await supervisor.start_all()
+        background = [
+            watchdog.run(),
+            _listen_control(redis, supervisor),
+            _export_session_stats(redis, session),
+            _export_token_estimator_stats(redis, llm.token_estimator),
+        ]
+        if blob_store is not None:
+            background.append(_export_attachment_store_stats(redis, blob_store))
         try:
-            results = await asyncio.gather(
-                watchdog.run(),
-                _listen_control(redis, supervisor),
-                return_exceptions=True,
-            )
+            results = await asyncio.gather(*background, return_exceptions=True)
             for exc in results:
                 if isinstance(exc, BaseException):
                     logger.error("Background task exited unexpectedly", exc_info=exc)
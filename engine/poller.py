@@ -2,25 +2,38 @@ import asyncio
 import hashlib
 import json
 import logging
+import time
 from abc import ABC, abstractmethod
 
 import httpx
 from redis.asyncio import Redis
 
-from database.redis import inflight_key, queue_key
+from database.redis import watch_key
 from engine.circuit_breaker import CircuitBreaker
+from engine.enqueue import enqueue_new
 from engine.events import push_event
-from engine.health import (
-    write_error_count,
-    write_heartbeat,
-    write_interval,
-    write_last_success,
-    write_status,
+from engine.health import write_poller_snapshot
+from engine.queues import queue_key_for
+from engine.schedule import (
+    ArrivalRate,
+    PollSchedule,
+    TradingCalendar,
+    ist_now,
+    seconds_until_next_ist_day,
 )
 from engine.session import NseSession
+from engine.tiers import parse_size_tiers, tier_for
 
 logger = logging.getLogger(__name__)
 
+_CONDITIONAL_HEADERS = (("etag", "If-None-Match"), ("last-modified", "If-Modified-Since"))
+# While NSE keeps returning the same body, cached items are still re-offered this
+# often so that items released after a failed processing run get picked up.
+_UNCHANGED_REVISIT_INTERVAL = 60.0
+# Longest single sleep while the schedule says not to poll, so a closed-market
+# poller still refreshes its heartbeat and notices the market reopening.
+_CLOSED_RECHECK_INTERVAL = 900.0
+
 
 class Poller(ABC):
     def __init__(
@@ -32,78 +45,251 @@ class Poller(ABC):
         max_interval: float = 60.0,
         failure_threshold: int = 5,
         circuit_hold_off: float = 300.0,
+        min_interval: float | None = None,
+        arrival_half_life: float = 120.0,
+        target_new_per_poll: float = 0.5,
+        size_tiers: list[dict] | None = None,
+        queue_mode: str = "list",
     ) -> None:
         self.api_name = api_name
         self.session = session
         self.redis = redis
         self.base_interval = base_interval
         self.max_interval = max_interval
+        # Arrival-rate adaptation is enabled by setting a floor; it starts out
+        # calibrated so the first interval is exactly base_interval.
+        self.min_interval = min_interval
+        self._target_new_per_poll = target_new_per_poll
+        self._arrivals = ArrivalRate(arrival_half_life, target_new_per_poll / base_interval)
         self._current_interval = base_interval
         self._circuit = CircuitBreaker(failure_threshold, circuit_hold_off)
+        # Set by the engine from the consuming processor's config.
+        self._size_tiers = parse_size_tiers(size_tiers)
+        self._queue_mode = queue_mode
         self._consecutive_failures = 0
         self._running = False
+        self._calendar: TradingCalendar | None = None
+        self._fingerprint: bytes | None = None
+        self._validators: dict[str, str] = {}
+        self._last_items: list[dict] = []
+        self._last_offered_at = 0.0
+        self.changed_cycles = 0
+        self.unchanged_cycles = 0
 
     def item_id(self, item: dict) -> str:
         return hashlib.sha1(json.dumps(item, sort_keys=True).encode()).hexdigest()[:16]
 
+    def item_size(self, item: dict) -> int | None:
+        """Declared size in bytes of the work behind ``item``, used to pick its size
+        tier; ``None`` when unknown.
+        """
+        return None
+
+    def watch_key_for(self, item: dict) -> str:
+        """The watchers set that makes ``item`` high priority in a priority queue."""
+        return watch_key(item.get("symbol") or "")
+
+    def queue_for(self, item: dict) -> str:
+        key = queue_key_for(self._queue_mode)
+        if not self._size_tiers:
+            return key(self.api_name)
+        tier = tier_for(self._size_tiers, self.item_size(item))
+        return key(self.api_name, tier.name)
+
     @abstractmethod
-    async def fetch(self) -> list[dict]:
+    async def fetch(self) -> list[dict] | None:
+        """Return the current items, or ``None`` when the response is unchanged.
+
+        Implementations that fetch over HTTP can send ``conditional_headers()``
+        and return ``None`` as soon as ``response_unchanged()`` says so, skipping
+        JSON decoding and everything downstream of it.
+        """
         ...
 
+    def conditional_headers(self) -> dict[str, str]:
+        """Validators from the last response, for a conditional GET."""
+        return dict(self._validators)
+
+    def response_unchanged(self, response: httpx.Response) -> bool:
+        """Tell whether ``response`` carries the same body as the previous poll.
+
+        A ``304 Not Modified`` counts as unchanged; otherwise a digest of the raw
+        body is compared with the last one. Updates the changed/unchanged counters.
+        """
+        if response.status_code == 304:
+            self.unchanged_cycles += 1
+            return True
+        fingerprint = hashlib.blake2b(response.content, digest_size=16).digest()
+        self._validators = {
+            request_header: response.headers[response_header]
+            for response_header, request_header in _CONDITIONAL_HEADERS
+            if response_header in response.headers
+        }
+        if fingerprint == self._fingerprint:
+            self.unchanged_cycles += 1
+            return True
+        self._fingerprint = fingerprint
+        self.changed_cycles += 1
+        return False
+
+    async def select_new(self, data: list[dict]) -> list[dict]:
+        """Narrow a fetched batch to the items worth checking against Redis.
+
+        The default keeps everything; pollers that can tell locally which items
+        they have already handed off override this (together with ``mark_seen``).
+        """
+        return data
+
+    def mark_seen(self, items: list[dict]) -> None:
+        """Record items that were just offered to the queue (new or already inflight)."""
+        return None
+
+    def schedule(self) -> PollSchedule | None:
+        """Return this poller's trading-calendar schedule.
+
+        ``None`` (the default) polls every ``base_interval`` around the clock.
+        """
+        return None
+
+    async def _scheduled_interval(self) -> tuple[float, float] | None:
+        """The schedule's interval right now and the most adaptation may relax it
+        to, or ``None`` while the schedule says not to poll.
+        """
+        schedule = self.schedule()
+        if schedule is None:
+            return self.base_interval, max(self.base_interval, self.max_interval)
+        if self._calendar is None:
+            self._calendar = TradingCalendar(self.session, self.redis)
+        now = ist_now()
+        trading_day = await self._calendar.is_trading_day(now.date())
+        interval = schedule.interval_at(
+            now, trading_day=trading_day, base_interval=self.base_interval
+        )
+        if interval is None:
+            return None
+        window = schedule.window_at(now) if trading_day else None
+        if window is not None and window.cap_adaptive:
+            return interval, interval
+        return interval, max(interval, self.max_interval)
+
+    def _adaptive_interval(self, scheduled: float, ceiling: float | None = None) -> float:
+        """Shrink the scheduled interval toward ``min_interval`` during bursts of
+        new items and relax it toward ``ceiling`` (by default ``max_interval``, or
+        the schedule, if that is sparser) during lulls, aiming for
+        ``target_new_per_poll`` per cycle.
+        """
+        if self.min_interval is None:
+            return scheduled
+        if ceiling is None:
+            ceiling = max(scheduled, self.max_interval)
+        rate = self._arrivals.rate()
+        if rate <= 0:
+            return ceiling
+        return max(self.min_interval, min(self._target_new_per_poll / rate, ceiling))
+
+    def stats(self) -> dict[str, int | float]:
+        """Per-poller counters exported alongside the health snapshot."""
+        return {
+            "changed_cycles": self.changed_cycles,
+            "unchanged_cycles": self.unchanged_cycles,
+            "arrivals_per_min": round(self._arrivals.rate() * 60, 3),
+        }
+
+    async def _write_snapshot(self, status: str, **fields) -> None:
+        await write_poller_snapshot(
+            self.redis,
+            self.api_name,
+            interval=self._current_interval,
+            status=status,
+            stats=self.stats(),
+            **fields,
+        )
+
     async def run(self) -> None:
         self._running = True
-        await write_status(self.redis, self.api_name, "running")
+        await self._write_snapshot("running")
         while self._running:
-            await write_heartbeat(self.redis, self.api_name, self._current_interval)
-
             if not self._circuit.can_attempt():
-                await write_status(self.redis, self.api_name, "circuit_open")
+                await self._write_snapshot("circuit_open")
                 await asyncio.sleep(self._current_interval)
                 continue
 
             try:
+                scheduled = await self._scheduled_interval()
+                if scheduled is None:
+                    self._current_interval = min(
+                        _CLOSED_RECHECK_INTERVAL, seconds_until_next_ist_day(ist_now())
+                    )
+                    await self._write_snapshot("market_closed")
+                    await asyncio.sleep(self._current_interval)
+                    continue
+
                 data = await self.fetch()
                 self._circuit.record_success()
                 self._consecutive_failures = 0
-                self._current_interval = self.base_interval
-                await write_interval(self.redis, self.api_name, self._current_interval)
-                await write_error_count(self.redis, self.api_name, 0)
-
-                if data:
-                    await write_last_success(self.redis, self.api_name)
-                    for item in data:
-                        item_id = self.item_id(item)
-                        acquired = await self.redis.set(
-                            inflight_key(self.api_name, item_id),
-                            "1",
-                            ex=3600,
-                            nx=True,
-                        )
-                        if not acquired:
-                            continue
-                        await self.redis.rpush(queue_key(self.api_name), json.dumps(item))
-
-                await write_status(self.redis, self.api_name, "running")
-                await asyncio.sleep(self._current_interval)
 
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code in (401, 403):
-                    logger.warning("NSE session expired — refreshing cookies")
-                    await self.session.refresh()
-                    continue
-                await self._handle_failure(exc)
+                if data is None:
+                    # Same body as last time: skip decoding and enqueueing, but
+                    # periodically re-offer the cached items so ones whose guards
+                    # were released after a failed processing run are retried.
+                    produced = bool(self._last_items)
+                    revisit_due = (
+                        time.monotonic() - self._last_offered_at >= _UNCHANGED_REVISIT_INTERVAL
+                    )
+                    if produced and revisit_due:
+                        await self._offer(self._last_items)
+                else:
+                    self._last_items = data
+                    produced = bool(data)
+                    if data:
+                        await self._offer(data)
+                self._current_interval = self._adaptive_interval(*scheduled)
+
+                await self._write_snapshot("running", error_count=0, last_success=produced)
+                await asyncio.sleep(self._current_interval)
 
             except Exception as exc:
+                # NseSession.get already refreshed cookies and retried a 401/403
+                # once, so a rejection that reaches here is a real failure.
                 await self._handle_failure(exc)
 
+    async def _offer(self, data: list[dict]) -> None:
+        self._last_offered_at = time.monotonic()
+        candidates = await self.select_new(data)
+        if not candidates:
+            return
+        new_count = await enqueue_new(
+            self.redis,
+            self.api_name,
+            [(self.item_id(item), item) for item in candidates],
+            queue_for=self.queue_for,
+            watch_key_for=self.watch_key_for if self._queue_mode == "priority" else None,
+            stream=self._queue_mode == "stream",
+        )
+        self.mark_seen(candidates)
+        self._arrivals.observe(new_count)
+        if new_count:
+            logger.debug(
+                "Poller %r enqueued %d new item(s) of %d fetched",
+                self.api_name,
+                new_count,
+                len(data),
+            )
+
     async def _handle_failure(self, exc: Exception) -> None:
+        # The failed cycle may not have enqueued the last body's items, so the
+        # next response must be processed even if it is byte-for-byte the same.
+        self._fingerprint = None
+        self._validators = {}
         self._circuit.record_failure()
         self._consecutive_failures += 1
-        await write_error_count(self.redis, self.api_name, self._consecutive_failures)
-        self._current_interval = min(self._current_interval * 2, self.max_interval)
-        await write_interval(self.redis, self.api_name, self._current_interval)
+        # Back off from whatever the schedule chose, never past max_interval unless
+        # the schedule itself was already sparser than that.
+        self._current_interval = min(
+            self._current_interval * 2, max(self.max_interval, self._current_interval)
+        )
         status = "circuit_open" if self._circuit.is_open else "backing_off"
-        await write_status(self.redis, self.api_name, status)
+        await self._write_snapshot(status, error_count=self._consecutive_failures)
         logger.error(
             f"Poller {self.api_name!r} error: {exc!r}. Interval -> {self._current_interval}s"
         )
@@ -1,12 +1,37 @@
-from datetime import date
+import time
+from datetime import date, datetime
+from datetime import time as dt_time
 
+import pytz
 from pydantic import BaseModel
 from redis.asyncio import Redis
 
+from database.redis import dedup_key, inflight_key
 from engine.poller import Poller as BasePoller
+from engine.schedule import PollSchedule, PollWindow
 from engine.session import NseSession
+from engine.tiers import parse_file_size
 
 _NSE_CORP_ANN_URL = "https://www.nseindia.com/api/corporate-announcements"
+_IST = pytz.timezone("Asia/Kolkata")
+# How often the in-memory seen-set is re-checked against Redis. Items whose
+# processing failed have their dedup/inflight keys released by the processor;
+# the resync is what lets the poller notice and offer them again.
+_SEEN_RESYNC_INTERVAL = 60.0
+# Floor for arrival-rate adaptation during filing bursts (results days).
+_MIN_INTERVAL = 2.0
+# Tight polling through market hours and the post-market window in which most
+# results and board-meeting outcomes are filed; sparse polling otherwise. Filings
+# do land on weekends and holidays, so closed days are polled sparsely too.
+_SCHEDULE = PollSchedule(
+    windows=[
+        # Market hours: never let a quiet spell slow polling below base_interval.
+        PollWindow(start=dt_time(9, 0), end=dt_time(15, 30), cap_adaptive=True),
+        PollWindow(start=dt_time(15, 30), end=dt_time(21, 0)),
+    ],
+    off_window_interval=60.0,
+    closed_interval=300.0,
+)
 
 
 class OutputSchema(BaseModel):
@@ -28,8 +53,13 @@ class CorporateAnnouncementsPoller(BasePoller):
         index: str = "equities",
         **kwargs,
     ) -> None:
+        kwargs.setdefault("min_interval", _MIN_INTERVAL)
         super().__init__(api_name="corp_ann", session=session, redis=redis, **kwargs)
         self._index = index
+        self._seen: set[str] = set()
+        self._seen_day: date | None = None
+        self._watermark: tuple[str, int] | None = None
+        self._last_resync: float | None = None
 
     @classmethod
     def default_config(cls) -> dict:
@@ -38,19 +68,94 @@ class CorporateAnnouncementsPoller(BasePoller):
     def item_id(self, item: dict) -> str:
         return item.get("seq_id") or super().item_id(item)
 
-    async def fetch(self) -> list[dict]:
+    def item_size(self, item: dict) -> int | None:
+        for field in ("attFileSize", "fileSize"):
+            size = parse_file_size(item.get(field))
+            if size is not None:
+                return size
+        return None
+
+    def schedule(self) -> PollSchedule | None:
+        return _SCHEDULE
+
+    @property
+    def watermark(self) -> tuple[str, int] | None:
+        """Newest ``(sort_date, seq_id)`` handed off today, or ``None`` before the first."""
+        return self._watermark
+
+    @staticmethod
+    def _order_key(item: dict) -> tuple[str, int]:
+        seq_id = item.get("seq_id") or ""
+        return item.get("sort_date") or "", int(seq_id) if seq_id.isdigit() else -1
+
+    def _roll_day(self) -> None:
+        today = datetime.now(tz=_IST).date()
+        if self._seen_day != today:
+            self._seen.clear()
+            self._watermark = None
+            self._last_resync = None
+            self._seen_day = today
+
+    async def _resync_seen(self, data: list[dict]) -> None:
+        """Rebuild the seen-set from Redis with a single MGET over today's list.
+
+        An item counts as seen while either its inflight guard (poller) or its
+        dedup guard (processor) exists; both are released when processing fails.
+        """
+        ids = [self.item_id(item) for item in data]
+        keys = [inflight_key(self.api_name, i) for i in ids]
+        keys += [dedup_key(self.api_name, i) for i in ids]
+        values = await self.redis.mget(*keys)
+        inflight, dedup = values[: len(ids)], values[len(ids) :]
+        seen_items = [
+            item
+            for item, in_flight, done in zip(data, inflight, dedup, strict=True)
+            if in_flight or done
+        ]
+        self._seen = {self.item_id(item) for item in seen_items}
+        self._watermark = max(map(self._order_key, seen_items), default=None)
+        self._last_resync = time.monotonic()
+
+    async def select_new(self, data: list[dict]) -> list[dict]:
+        self._roll_day()
+        last = self._last_resync
+        if last is None or time.monotonic() - last >= _SEEN_RESYNC_INTERVAL:
+            await self._resync_seen(data)
+        watermark = self._watermark
+        return [
+            item
+            for item in data
+            if (watermark is not None and self._order_key(item) > watermark)
+            or self.item_id(item) not in self._seen
+        ]
+
+    def mark_seen(self, items: list[dict]) -> None:
+        for item in items:
+            self._seen.add(self.item_id(item))
+            key = self._order_key(item)
+            if self._watermark is None or key > self._watermark:
+                self._watermark = key
+
+    async def fetch(self) -> list[dict] | None:
         today = date.today().strftime("%d-%m-%Y")
         response = await self.session.get(
             _NSE_CORP_ANN_URL,
             params={"index": self._index, "from_date": today, "to_date": today},
+            headers=self.conditional_headers(),
         )
+        # httpx treats 304 as an error status, so catch it before raise_for_status.
+        if response.status_code == 304:
+            self.response_unchanged(response)
+            return None
         response.raise_for_status()
         content_type = response.headers.get("content-type", "")
         if "application/json" not in content_type:
             raise ValueError(
                 f"NSE returned non-JSON response (content-type={content_type!r}, "
                 f"status={response.status_code}) - session cookie may be missing or blocked"
-        )
+            )
+        if self.response_unchanged(response):
+            return None
         return response.json()
 
 
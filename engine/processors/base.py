@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Protocol
 
+from llm.provider import LLMRateLimitError
+
 
 class Processor(Protocol):
     async def process(self, item: dict) -> str | None: ...
@@ -21,3 +23,28 @@ class ProcessorBase(ABC):
         to the event log together with the processing time — or ``None`` when the
         item was skipped (duplicate, unsupported, etc.) so nothing is logged.
         """
+
+    async def process_batch(self, items: list[dict]) -> list[str | None]:
+        """Process several items at once; return one ``process``-style result per item.
+
+        Override it to share round trips or setup across items; the registry
+        detects the override, and the engine then hands the processor up to
+        ``batch_size`` items per call. Raising fails the whole batch the way
+        ``process`` raising fails one item.
+
+        This default runs them one by one. An item that raises doesn't stop the
+        rest, so each still runs and releases its own guards; afterwards the
+        first ``LLMRateLimitError`` is re-raised (so the batch is re-queued),
+        else the first other exception.
+        """
+        results: list[str | None] = []
+        errors: list[Exception] = []
+        for item in items:
+            try:
+                results.append(await self.process(item))
+            except Exception as exc:
+                errors.append(exc)
+                results.append(None)
+        if errors:
+            raise next((exc for exc in errors if isinstance(exc, LLMRateLimitError)), errors[0])
+        return results
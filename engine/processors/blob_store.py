@@ -0,0 +1,208 @@
+"""Size-bounded, content-addressed on-disk store for downloaded attachments."""
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from engine.processors.download import SpooledAttachment
+
+logger = logging.getLogger(__name__)
+
+_BLOB_SUFFIX = ".pdf"
+_PARTIAL_SUFFIX = ".partial"
+
+
+class StoredAttachment:
+    """An attachment held in a :class:`BlobStore`. It has the same ``digest`` /
+    ``size`` / ``source()`` / ``close()`` surface as a ``SpooledAttachment``;
+    while open, the blob is pinned and can't be evicted.
+    """
+
+    def __init__(self, store: "BlobStore", digest: str, size: int) -> None:
+        self._store = store
+        self.digest = digest
+        self.size = size
+        self._closed = False
+
+    def source(self) -> str:
+        return self._store.path_for(self.digest)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._store._unpin(self.digest)
+
+    def __enter__(self) -> "StoredAttachment":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class BlobStore:
+    """Attachments on local disk, named by content hash and looked up by URL.
+
+    Blobs are evicted least-recently-used first once their total size exceeds
+    ``max_bytes``; open (pinned) blobs are skipped, so the store can briefly run
+    over budget. Concurrent fetches of the same URL share one download. Blobs
+    already on disk are picked up at start-up, but the URL index is in memory:
+    after a restart, a URL's first fetch downloads again and then finds its
+    content already stored.
+    """
+
+    def __init__(self, root: str, *, max_bytes: int) -> None:
+        self._root = root
+        self._max_bytes = max_bytes
+        self._blobs: OrderedDict[str, int] = OrderedDict()  # digest -> size, LRU first
+        self._urls: dict[str, str] = {}
+        self._pins: dict[str, int] = {}
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._bytes_saved = 0
+        self._evictions = 0
+        self._evicted_bytes = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        entries = []
+        for entry in os.scandir(self._root):
+            if entry.name.endswith(_PARTIAL_SUFFIX):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(entry.path)
+            elif entry.name.endswith(_BLOB_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[: -len(_BLOB_SUFFIX)], stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._blobs[digest] = size
+            self._bytes += size
+        self._evict()
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self._root, f"{digest}{_BLOB_SUFFIX}")
+
+    async def fetch(
+        self, url: str, download: Callable[[], Awaitable[SpooledAttachment]]
+    ) -> StoredAttachment:
+        """The stored attachment for ``url``, calling ``download`` only if it
+        isn't stored and no other fetch of ``url`` is already downloading it.
+        Close the result when done with it.
+        """
+        while True:
+            digest = self._urls.get(url)
+            if digest is not None and digest in self._blobs:
+                self._hits += 1
+                self._bytes_saved += self._blobs[digest]
+                return self._open(digest, touch=True)
+
+            pending = self._inflight.get(url)
+            if pending is None:
+                break
+            # asyncio.wait, not await: cancelling this caller mustn't cancel the
+            # shared download, and a cancelled download sends us round again.
+            await asyncio.wait([pending])
+            if pending.cancelled():
+                continue
+            digest = pending.result()
+            if digest in self._blobs:
+                self._shared += 1
+                self._bytes_saved += self._blobs[digest]
+                return self._open(digest)
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            attachment = await download()
+            with attachment:
+                digest = await self._put(attachment)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # followers re-raise it; don't warn if there are none
+            raise
+        finally:
+            del self._inflight[url]
+        self._misses += 1
+        self._urls[url] = digest
+        future.set_result(digest)
+        return self._open(digest)
+
+    async def _put(self, attachment: SpooledAttachment) -> str:
+        digest = attachment.digest
+        if digest not in self._blobs:
+            path = self.path_for(digest)
+            partial_path = f"{path}{_PARTIAL_SUFFIX}"
+            try:
+                await asyncio.to_thread(attachment.save, partial_path)
+                os.replace(partial_path, path)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(partial_path)
+                raise
+            self._blobs[digest] = attachment.size
+            self._bytes += attachment.size
+        # Pin before evicting so the new blob isn't the first to go.
+        self._pins[digest] = self._pins.get(digest, 0) + 1
+        self._evict()
+        self._pins[digest] -= 1
+        return digest
+
+    def _open(self, digest: str, *, touch: bool = False) -> StoredAttachment:
+        self._blobs.move_to_end(digest)
+        self._pins[digest] = self._pins.get(digest, 0) + 1
+        if touch:
+            # Keeps the recency order across restarts.
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(self.path_for(digest))
+        return StoredAttachment(self, digest, self._blobs[digest])
+
+    def _unpin(self, digest: str) -> None:
+        self._pins[digest] -= 1
+        if self._pins[digest] == 0:
+            del self._pins[digest]
+        self._evict()
+
+    def _evict(self) -> None:
+        if self._bytes <= self._max_bytes:
+            return
+        evicted = set()
+        for digest in [d for d in self._blobs if self._pins.get(d, 0) == 0]:
+            if self._bytes <= self._max_bytes:
+                break
+            size = self._blobs.pop(digest)
+            self._bytes -= size
+            self._evictions += 1
+            self._evicted_bytes += size
+            evicted.add(digest)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path_for(digest))
+        if self._bytes > self._max_bytes:
+            logger.debug(
+                "Blob store over budget (%s > %s bytes) while blobs are open",
+                self._bytes,
+                self._max_bytes,
+            )
+        if evicted:
+            self._urls = {url: d for url, d in self._urls.items() if d not in evicted}
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self._hits + self._shared + self._misses
+        return {
+            "hits": self._hits,
+            "shared": self._shared,
+            "misses": self._misses,
+            "hit_rate": round((self._hits + self._shared) / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self._bytes_saved,
+            "evictions": self._evictions,
+            "evicted_bytes": self._evicted_bytes,
+            "blobs": len(self._blobs),
+            "bytes": self._bytes,
+        }
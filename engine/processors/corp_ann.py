@@ -2,25 +2,42 @@ import asyncio
 import base64
 import json
 import logging
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import Executor
 from datetime import UTC, datetime
 from functools import partial
 
 import pytz
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import Announcement
 from database.redis import (
     alert_channel,
+    analysis_cache_key,
     dedup_key,
     inflight_key,
+    processor_analysis_cache_key,
     result_key,
     seconds_until_midnight,
 )
 from engine.events import push_event
 from engine.processors.base import ProcessorBase
-from engine.processors.pdf import extract_pdf_text, render_pdf_pages
+from engine.processors.blob_store import BlobStore
+from engine.processors.download import (
+    AttachmentTooLargeError,
+    UnexpectedContentTypeError,
+    download_attachment,
+)
+from engine.processors.pdf import (
+    PageFilter,
+    PdfSource,
+    RenderedPdfPage,
+    RenderedPdfPages,
+    extract_budgeted_pdf_text,
+    render_pdf_pages,
+)
+from engine.processors.render_pool import RenderPool, split_page_range
 from engine.session import NseSession
 from llm.provider import (
     AnnouncementAnalysis,
@@ -42,8 +59,29 @@ _DEFAULT_FOLLOW_UP_BATCH_SIZE = 5
 _LARGE_DOC_FOLLOW_UP_BATCH_SIZE = 10
 _LARGE_DOC_THRESHOLD_PAGES = 15
 _CONTEXT_BATCH_SHRINK_FACTOR = 0.8
+# Share of the LLM's context window a batch may fill by estimate; the rest
+# covers estimation error and the response.
+_CONTEXT_WINDOW_HEADROOM = 0.8
+_TEXT_BUDGET_SAMPLE_CHARS = 10_000
 _RENDER_MAX_DIMENSION_PX = 900
 _RENDER_JPEG_QUALITY = 60
+# A batch is split across at most this many render workers, so one long filing
+# can't occupy the whole pool; shards smaller than the minimum aren't worth the IPC.
+_MAX_RENDER_SHARDS = 3
+_MIN_PAGES_PER_RENDER_SHARD = 3
+# NSE attachments are usually well under 20 MB; anything far larger is not worth
+# holding in a worker.
+_MAX_ATTACHMENT_BYTES = 32 * 1024 * 1024
+# NSE re-posts the same attachment under new seq_ids (corrections, cross-listings)
+# mostly within days; older reposts still hit the Postgres copy.
+_ANALYSIS_CACHE_TTL_SECONDS = 30 * 24 * 3600
+# The dedup key is a short claim while an item is processed and only becomes the
+# 48 h "done" marker once it's stored. The claim is renewed every third of its TTL
+# for as long as processing takes; a worker that dies mid-item stops renewing, so
+# its claim lapses before a reliable queue redelivers the item (no sooner than two
+# thirds of its 60 s default visibility timeout).
+_DEDUP_CLAIM_TTL_SECONDS = 30
+_DEDUP_TTL_SECONDS = 48 * 3600
 
 ANNOUNCEMENT_CATEGORIES = [
     "acquisition",
@@ -96,24 +134,59 @@ def _should_release_dedup_key_after_error(
     return True
 
 
+def _discard_render(future: asyncio.Future) -> None:
+    """Drop a speculative render nobody will await, without an unretrieved-exception warning."""
+    if not future.cancel() and not future.cancelled():
+        future.exception()
+
+
+async def _merge_renders(renders: list[asyncio.Future[RenderedPdfPages]]) -> RenderedPdfPages:
+    results = await asyncio.gather(*renders)
+    return RenderedPdfPages(
+        total_pages=results[0].total_pages,
+        pages=[page for result in results for page in result.pages],
+    )
+
+
 class CorporateAnnouncementsProcessor(ProcessorBase):
     @classmethod
     def default_config(cls) -> dict:
-        return {"pool_size": 8}
+        return {
+            "pool_size": 8,
+            "max_attachment_bytes": _MAX_ATTACHMENT_BYTES,
+            "speculative_render": False,
+            "prefer_informative_text": False,
+            "reuse_analyses": True,
+        }
 
     def __init__(
         self,
         redis,
         db: AsyncSession,
         llm: LLMProvider,
-        process_pool: ProcessPoolExecutor,
+        process_pool: RenderPool,
         session: NseSession,
+        blob_store: BlobStore | None = None,
+        max_attachment_bytes: int = _MAX_ATTACHMENT_BYTES,
+        speculative_render: bool = False,
+        prefer_informative_text: bool = False,
+        reuse_analyses: bool = True,
     ) -> None:
         self._redis = redis
         self._db = db
         self._llm = llm
         self._process_pool = process_pool
         self._session = session
+        self._blob_store = blob_store
+        self._max_attachment_bytes = max_attachment_bytes
+        # Render the next page batch while the LLM reads the current one; it is
+        # discarded if the model doesn't ask for more pages.
+        self._speculative_render = speculative_render
+        # Spend the text-fallback budget on the first and most numeric pages
+        # rather than strictly the first ones.
+        self._prefer_informative_text = prefer_informative_text
+        # Skip rendering and the LLM for a PDF whose content hash was analyzed before.
+        self._reuse_analyses = reuse_analyses
 
     async def process(self, item: dict) -> str | None:
         seq_id = item.get("seq_id", "")
@@ -121,49 +194,73 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
         dedup_redis_key = dedup_key("corp_ann", seq_id)
         inflight_redis_key = inflight_key("corp_ann", seq_id)
 
-        acquired = await self._redis.set(dedup_redis_key, "1", nx=True, ex=172800)
+        acquired = await self._redis.set(dedup_redis_key, "1", nx=True, ex=_DEDUP_CLAIM_TTL_SECONDS)
         if not acquired:
             logger.debug(f"Skipping duplicate seq_id={seq_id}")
             return
 
         post_commit_cache_or_publish = False
+        claim = asyncio.create_task(self._hold_claim(dedup_redis_key))
 
         try:
             attachment_url = item.get("attchmntFile")
             if not attachment_url:
                 logger.warning(f"No attachment for seq_id={seq_id}, skipping")
+                await self._redis.set(dedup_redis_key, "1", ex=_DEDUP_TTL_SECONDS)
                 return
 
-            response = await self._session.get(attachment_url)
-            response.raise_for_status()
-            content_type = response.headers.get("content-type", "")
-            if "application/pdf" not in content_type:
-                logger.warning(
-                    f"seq_id={seq_id} attachment is not a PDF "
-                    f"(content-type={content_type!r}) — skipping"
+            download = partial(
+                download_attachment,
+                self._session,
+                attachment_url,
+                max_bytes=self._max_attachment_bytes,
+                content_type="application/pdf",
+            )
+            try:
+                if self._blob_store is not None:
+                    attachment = await self._blob_store.fetch(attachment_url, download)
+                else:
+                    attachment = await download()
+            except (UnexpectedContentTypeError, AttachmentTooLargeError) as exc:
+                reason = (
+                    "attachment not a PDF"
+                    if isinstance(exc, UnexpectedContentTypeError)
+                    else f"attachment larger than {self._max_attachment_bytes:,} bytes"
                 )
+                logger.warning(f"seq_id={seq_id} {reason} ({exc}) — skipping")
                 await push_event(
                     self._redis,
                     "warn",
-                    f"skipped seq_id={seq_id} ({symbol}): attachment not a PDF",
+                    f"skipped seq_id={seq_id} ({symbol}): {reason}",
                     api="corp_ann",
                 )
                 await self._redis.delete(dedup_redis_key)
                 return
-            pdf_bytes = response.content
 
             loop = asyncio.get_running_loop()
             announced_at = _parse_nse_datetime(item.get("an_dt"), default=_DEFAULT_ANNOUNCED_AT)
             company = item.get("sm_name", "")
             announcement_text = item.get("attchmntText", "")
-            analysis, processing_mode = await self._analyze_with_multimodal_fallback(
-                seq_id=seq_id,
-                symbol=symbol,
-                company=company,
-                announcement_text=announcement_text,
-                pdf_bytes=pdf_bytes,
-                loop=loop,
-            )
+            with attachment:
+                content_hash = attachment.digest
+                cached = await self._cached_analysis(content_hash)
+                if cached is not None:
+                    analysis, processing_mode = cached
+                    logger.info(
+                        f"seq_id={seq_id} reusing the {processing_mode} analysis of an "
+                        f"identical attachment ({content_hash})"
+                    )
+                else:
+                    analysis, processing_mode = await self._analyze_with_multimodal_fallback(
+                        seq_id=seq_id,
+                        symbol=symbol,
+                        company=company,
+                        announcement_text=announcement_text,
+                        pdf=attachment.source(),
+                        document_key=content_hash,
+                        loop=loop,
+                    )
+                    await self._remember_analysis(content_hash, analysis, processing_mode)
             summary = analysis.summary
             category = analysis.category
 
@@ -178,6 +275,7 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
                     summary=summary,
                     processing_mode=processing_mode,
                     attachment_url=attachment_url,
+                    content_hash=content_hash,
                     announced_at=announced_at,
                 )
                 self._db.add(ann)
@@ -189,8 +287,10 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
                 ann.summary = summary
                 ann.processing_mode = processing_mode
                 ann.attachment_url = attachment_url
+                ann.content_hash = content_hash
                 ann.announced_at = announced_at
             await self._db.commit()
+            await self._redis.set(dedup_redis_key, "1", ex=_DEDUP_TTL_SECONDS)
 
             payload = {
                 "seq_id": seq_id,
@@ -239,6 +339,88 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
                         seq_id,
                     )
             raise
+        except asyncio.CancelledError:
+            # Stopped mid-item. A reliable queue hands the item straight back, so
+            # drop only the claim; inflight stays to keep the poller from
+            # enqueuing a second copy.
+            await self._redis.delete(dedup_redis_key)
+            raise
+        finally:
+            claim.cancel()
+
+    async def _hold_claim(self, dedup_redis_key: str) -> None:
+        """Renew the dedup claim until cancelled; run it alongside processing an item.
+
+        GT never shortens the 48 h marker, and a released claim isn't revived. A
+        failed renewal is logged and retried on the next tick rather than ending
+        the task, whose result nobody awaits.
+        """
+        while True:
+            await asyncio.sleep(_DEDUP_CLAIM_TTL_SECONDS / 3)
+            try:
+                await self._redis.expire(dedup_redis_key, _DEDUP_CLAIM_TTL_SECONDS, gt=True)
+            except Exception:
+                logger.exception("Failed to renew dedup claim %s", dedup_redis_key)
+
+    async def _cached_analysis(
+        self, content_hash: str
+    ) -> tuple[AnnouncementAnalysis, str] | None:
+        """A previous analysis of the same PDF: from Redis, else from the newest
+        ``announcements`` row with that content hash (re-cached in Redis).
+        """
+        if not self._reuse_analyses:
+            return None
+        stats_key = processor_analysis_cache_key("corp_ann")
+        raw = await self._redis.get(analysis_cache_key(content_hash))
+        if raw is not None:
+            try:
+                entry = json.loads(raw)
+                analysis = AnnouncementAnalysis(
+                    summary=entry["summary"],
+                    category=entry["category"],
+                    confidence=entry.get("confidence"),
+                )
+                processing_mode = entry["processing_mode"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning("Discarding malformed analysis cache entry for %s", content_hash)
+            else:
+                await self._redis.hincrby(stats_key, "hits_redis", 1)
+                return analysis, processing_mode
+
+        row = (
+            await self._db.execute(
+                select(Announcement)
+                .where(Announcement.content_hash == content_hash)
+                .order_by(Announcement.processed_at.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        if row is None:
+            await self._redis.hincrby(stats_key, "misses", 1)
+            return None
+        # Confidence isn't persisted, so the rebuilt analysis leaves it unknown.
+        analysis = AnnouncementAnalysis(summary=row.summary, category=row.category, confidence=None)
+        await self._redis.hincrby(stats_key, "hits_db", 1)
+        await self._remember_analysis(content_hash, analysis, row.processing_mode)
+        return analysis, row.processing_mode
+
+    async def _remember_analysis(
+        self, content_hash: str, analysis: AnnouncementAnalysis, processing_mode: str
+    ) -> None:
+        if not self._reuse_analyses:
+            return
+        await self._redis.set(
+            analysis_cache_key(content_hash),
+            json.dumps(
+                {
+                    "summary": analysis.summary,
+                    "category": analysis.category,
+                    "confidence": analysis.confidence,
+                    "processing_mode": processing_mode,
+                }
+            ),
+            ex=_ANALYSIS_CACHE_TTL_SECONDS,
+        )
 
     async def _analyze_with_multimodal_fallback(
         self,
@@ -247,7 +429,8 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
         symbol: str,
         company: str,
         announcement_text: str,
-        pdf_bytes: bytes,
+        pdf: PdfSource,
+        document_key: str,
         loop: asyncio.AbstractEventLoop,
     ) -> tuple[AnnouncementAnalysis, str]:
         try:
@@ -255,7 +438,8 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
                 symbol=symbol,
                 company=company,
                 announcement_text=announcement_text,
-                pdf_bytes=pdf_bytes,
+                pdf=pdf,
+                document_key=document_key,
                 loop=loop,
             )
             return analysis, _PROCESSING_MODE_MULTIMODAL
@@ -278,7 +462,8 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
                 symbol=symbol,
                 company=company,
                 announcement_text=announcement_text,
-                pdf_bytes=pdf_bytes,
+                pdf=pdf,
+                document_key=document_key,
                 loop=loop,
             )
             return analysis, _PROCESSING_MODE_TEXT
@@ -289,7 +474,8 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
         symbol: str,
         company: str,
         announcement_text: str,
-        pdf_bytes: bytes,
+        pdf: PdfSource,
+        document_key: str,
         loop: asyncio.AbstractEventLoop,
     ) -> AnnouncementAnalysis:
         start_page = 1
@@ -297,84 +483,240 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
         provisional_summary: str | None = None
         final_analysis: AnnouncementAnalysis | None = None
         follow_up_batch_size = _DEFAULT_FOLLOW_UP_BATCH_SIZE
+        total_pages: int | None = None  # known once the first batch is rendered
+        page_filter = PageFilter()
+        max_batch_pages = _LARGE_DOC_FOLLOW_UP_BATCH_SIZE
+        # (start_page, end_page) -> in-flight render started ahead of need.
+        speculative: tuple[tuple[int, int], asyncio.Future[RenderedPdfPages]] | None = None
 
-        while True:
+        try:
             while True:
-                rendered_pages = await loop.run_in_executor(
-                    self._process_pool,
-                    partial(
-                        render_pdf_pages,
-                        pdf_bytes,
-                        start_page=start_page,
-                        end_page=start_page + current_batch_size - 1,
-                        max_dimension_px=_RENDER_MAX_DIMENSION_PX,
-                        jpeg_quality=_RENDER_JPEG_QUALITY,
-                    ),
-                )
-                page_images = [
-                    AnnouncementPageImage(
-                        page_number=page.page_number,
-                        mime_type=page.media_type,
-                        data_base64=base64.b64encode(page.image_bytes).decode("ascii"),
-                    )
-                    for page in rendered_pages.pages
-                ]
-                if not rendered_pages.pages:
-                    raise LLMProviderError(
-                        "No pages were rendered from PDF for multimodal analysis "
-                        f"(start_page={start_page}, batch_size={current_batch_size}, "
-                        f"total_pages={rendered_pages.total_pages})"
-                    )
-                page_range_end = rendered_pages.pages[-1].page_number
-                follow_up_batch_size = (
-                    _LARGE_DOC_FOLLOW_UP_BATCH_SIZE
-                    if rendered_pages.total_pages > _LARGE_DOC_THRESHOLD_PAGES
-                    else _DEFAULT_FOLLOW_UP_BATCH_SIZE
-                )
-
-                try:
-                    analysis = await self._analyze_multimodal_pass_with_format_retry(
-                        page_images=page_images,
-                        symbol=symbol,
-                        company=company,
+                while True:
+                    end_page = start_page + current_batch_size - 1
+                    if speculative is not None and speculative[0] == (start_page, end_page):
+                        rendered_pages = await speculative[1]
+                    else:
+                        if speculative is not None:
+                            _discard_render(speculative[1])
+                        rendered_pages = await self._render_batch(
+                            pdf, document_key, start_page, end_page, loop, total_pages=total_pages
+                        )
+                    speculative = None
+                    total_pages = rendered_pages.total_pages
+                    if not rendered_pages.pages:
+                        raise LLMProviderError(
+                            "No pages were rendered from PDF for multimodal analysis "
+                            f"(start_page={start_page}, batch_size={current_batch_size}, "
+                            f"total_pages={rendered_pages.total_pages})"
+                        )
+                    # page_range_* spans filtered-out pages too, so the numbering
+                    # the model sees still matches the document.
+                    page_range_end = rendered_pages.pages[-1].page_number
+                    upload_pages = page_filter.keep(rendered_pages.pages)
+                    if not upload_pages:
+                        upload_pages = rendered_pages.pages[:1]
+                    fitting = self._pages_within_token_budget(
+                        upload_pages,
                         announcement_text=announcement_text,
-                        page_range_start=start_page,
-                        page_range_end=page_range_end,
-                        total_pages=rendered_pages.total_pages,
                         provisional_summary=provisional_summary,
                     )
-                    break
-                except LLMContextWindowError as exc:
-                    shrunk_batch_size = max(
-                        1,
-                        int(current_batch_size * _CONTEXT_BATCH_SHRINK_FACTOR),
-                    )
-                    if shrunk_batch_size == current_batch_size:
-                        raise exc
-                    logger.warning(
-                        "Multimodal context window exceeded for pages %s-%s; shrinking batch %s -> %s",
+                    if len(fitting) < len(upload_pages):
+                        # End the batch just before the first page that didn't fit,
+                        # and keep later batches no larger than this one.
+                        page_range_end = upload_pages[len(fitting)].page_number - 1
+                        logger.info(
+                            "%s pages %s-%s exceed the token budget; sending %s-%s",
+                            symbol,
+                            start_page,
+                            rendered_pages.pages[-1].page_number,
+                            start_page,
+                            page_range_end,
+                        )
+                        upload_pages = fitting
+                        current_batch_size = page_range_end - start_page + 1
+                        max_batch_pages = current_batch_size
+                    logger.debug(
+                        "%s pages %s-%s upload %s bytes: %s",
+                        symbol,
                         start_page,
                         page_range_end,
-                        current_batch_size,
-                        shrunk_batch_size,
+                        sum(page.byte_size for page in upload_pages),
+                        ", ".join(
+                            f"p{page.page_number}={page.byte_size}B/{page.profile}"
+                            f"{'/gray' if page.grayscale else ''}"
+                            for page in upload_pages
+                        ),
                     )
-                    current_batch_size = shrunk_batch_size
-
-            final_analysis = analysis
-            provisional_summary = analysis.summary
-            unseen_pages_remain = page_range_end < rendered_pages.total_pages
-            if not unseen_pages_remain:
-                break
-            if analysis.need_more_pages is not True:
-                break
+                    page_images = [
+                        AnnouncementPageImage(
+                            page_number=page.page_number,
+                            mime_type=page.media_type,
+                            data_base64=base64.b64encode(page.image_bytes).decode("ascii"),
+                            width=page.width,
+                            height=page.height,
+                        )
+                        for page in upload_pages
+                    ]
+                    follow_up_batch_size = min(
+                        (
+                            _LARGE_DOC_FOLLOW_UP_BATCH_SIZE
+                            if rendered_pages.total_pages > _LARGE_DOC_THRESHOLD_PAGES
+                            else _DEFAULT_FOLLOW_UP_BATCH_SIZE
+                        ),
+                        max_batch_pages,
+                    )
+                    if self._speculative_render and page_range_end < rendered_pages.total_pages:
+                        next_range = (page_range_end + 1, page_range_end + follow_up_batch_size)
+                        speculative = (
+                            next_range,
+                            self._render_batch(
+                                pdf, document_key, *next_range, loop, total_pages=total_pages
+                            ),
+                        )
+
+                    try:
+                        analysis = await self._analyze_multimodal_pass_with_format_retry(
+                            page_images=page_images,
+                            symbol=symbol,
+                            company=company,
+                            announcement_text=announcement_text,
+                            page_range_start=start_page,
+                            page_range_end=page_range_end,
+                            total_pages=rendered_pages.total_pages,
+                            provisional_summary=provisional_summary,
+                        )
+                        break
+                    except LLMContextWindowError as exc:
+                        shrunk_batch_size = max(
+                            1,
+                            int(current_batch_size * _CONTEXT_BATCH_SHRINK_FACTOR),
+                        )
+                        if shrunk_batch_size == current_batch_size:
+                            raise exc
+                        logger.warning(
+                            "Multimodal context window exceeded for pages %s-%s; shrinking batch %s -> %s",
+                            start_page,
+                            page_range_end,
+                            current_batch_size,
+                            shrunk_batch_size,
+                        )
+                        current_batch_size = shrunk_batch_size
+
+                final_analysis = analysis
+                provisional_summary = analysis.summary
+                unseen_pages_remain = page_range_end < rendered_pages.total_pages
+                if not unseen_pages_remain:
+                    break
+                if analysis.need_more_pages is not True:
+                    break
 
-            start_page = page_range_end + 1
-            current_batch_size = follow_up_batch_size
+                start_page = page_range_end + 1
+                current_batch_size = follow_up_batch_size
+        finally:
+            if speculative is not None:
+                _discard_render(speculative[1])
 
         if final_analysis is None:
             raise RuntimeError("No announcement analysis generated from multimodal flow.")
         return final_analysis
 
+    def _text_char_budget(self, announcement_text: str) -> int:
+        """``_MAX_TEXT_CHARS``, or less if the LLM's (calibrated) estimate says that
+        much text wouldn't fit its context window with headroom.
+        """
+        budget = int(self._llm.context_window_tokens * _CONTEXT_WINDOW_HEADROOM)
+        sample = "x" * _TEXT_BUDGET_SAMPLE_CHARS
+        sample_tokens = self._llm.estimate_tokens(prompt=sample, image_sizes=[])
+        overhead = self._llm.estimate_tokens(prompt=announcement_text, image_sizes=[])
+        if sample_tokens <= 0:
+            return _MAX_TEXT_CHARS
+        chars_per_token = _TEXT_BUDGET_SAMPLE_CHARS / sample_tokens
+        return max(1, min(_MAX_TEXT_CHARS, int((budget - overhead) * chars_per_token)))
+
+    def _pages_within_token_budget(
+        self,
+        pages: list[RenderedPdfPage],
+        *,
+        announcement_text: str,
+        provisional_summary: str | None,
+    ) -> list[RenderedPdfPage]:
+        """The longest prefix of ``pages`` the LLM's estimate fits in its context
+        window with headroom (always at least one page).
+        """
+        budget = int(self._llm.context_window_tokens * _CONTEXT_WINDOW_HEADROOM)
+        prompt = f"{announcement_text}\n{provisional_summary or ''}"
+        sizes = [(page.width, page.height) for page in pages]
+        for count in range(len(pages), 1, -1):
+            if self._llm.estimate_tokens(prompt=prompt, image_sizes=sizes[:count]) <= budget:
+                return pages[:count]
+        return pages[:1]
+
+    def _executors_for(self, document_key: str, count: int) -> list[Executor | None]:
+        """Executors for work on ``document_key``, routed to its owning workers by a
+        ``RenderPool``; any other executor (or ``None``, the loop default) is used as is.
+        """
+        if isinstance(self._process_pool, RenderPool):
+            return self._process_pool.executors_for(document_key, count)
+        return [self._process_pool]
+
+    def _document_cache_key(self, document_key: str) -> str | None:
+        """``document_key`` when renders run on a ``RenderPool``, else ``None``.
+
+        The open-document cache in ``pdf`` is per process and not thread-safe, so
+        only single-threaded ``RenderPool`` workers may use it; a plain executor
+        or the loop's default thread pool opens the PDF fresh each time.
+        """
+        if isinstance(self._process_pool, RenderPool):
+            return document_key
+        return None
+
+    def _render_batch(
+        self,
+        pdf: PdfSource,
+        document_key: str,
+        start_page: int,
+        end_page: int,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        total_pages: int | None = None,
+    ) -> asyncio.Future[RenderedPdfPages]:
+        """Render a page range, split across up to ``_MAX_RENDER_SHARDS`` workers.
+
+        Splitting needs ``total_pages``: a shard starting past the last page
+        would fail, so the first batch of a document renders in one piece.
+        """
+        ranges = [(start_page, end_page)]
+        executors = self._executors_for(document_key, 1)
+        if total_pages is not None:
+            end_page = min(end_page, total_pages)
+            executors = self._executors_for(document_key, _MAX_RENDER_SHARDS)
+            ranges = split_page_range(
+                start_page,
+                end_page,
+                parts=len(executors),
+                min_pages=_MIN_PAGES_PER_RENDER_SHARD,
+            )
+        cache_key = self._document_cache_key(document_key)
+        renders = [
+            loop.run_in_executor(
+                executor,
+                partial(
+                    render_pdf_pages,
+                    pdf,
+                    start_page=shard_start,
+                    end_page=shard_end,
+                    max_dimension_px=_RENDER_MAX_DIMENSION_PX,
+                    jpeg_quality=_RENDER_JPEG_QUALITY,
+                    cache_key=cache_key,
+                    adaptive=True,
+                ),
+            )
+            for executor, (shard_start, shard_end) in zip(executors, ranges, strict=False)
+        ]
+        if len(renders) == 1:
+            return renders[0]
+        return asyncio.ensure_future(_merge_renders(renders))
+
     async def _analyze_multimodal_pass_with_format_retry(
         self,
         *,
@@ -421,23 +763,35 @@ class CorporateAnnouncementsProcessor(ProcessorBase):
         symbol: str,
         company: str,
         announcement_text: str,
-        pdf_bytes: bytes,
+        pdf: PdfSource,
+        document_key: str,
         loop: asyncio.AbstractEventLoop,
     ) -> AnnouncementAnalysis:
-        text = await loop.run_in_executor(self._process_pool, extract_pdf_text, pdf_bytes)
-
-        if len(text) > _MAX_TEXT_CHARS:
+        max_chars = self._text_char_budget(announcement_text)
+        extracted = await loop.run_in_executor(
+            self._executors_for(document_key, 1)[0],
+            partial(
+                extract_budgeted_pdf_text,
+                pdf,
+                max_chars=max_chars,
+                cache_key=self._document_cache_key(document_key),
+                prefer_informative=self._prefer_informative_text,
+            ),
+        )
+        text = extracted.text
+
+        if extracted.truncated:
             logger.warning(
-                f"seq_id={seq_id} PDF text truncated "
-                f"({len(text)} → {_MAX_TEXT_CHARS} chars) before LLM"
+                f"seq_id={seq_id} PDF text cut to {len(text):,} chars from "
+                f"{len(extracted.page_numbers)} of {extracted.total_pages} pages before LLM"
             )
             await push_event(
                 self._redis,
                 "warn",
-                f"seq_id={seq_id} ({symbol}): PDF truncated {len(text):,} → {_MAX_TEXT_CHARS:,} chars",
+                f"seq_id={seq_id} ({symbol}): PDF truncated to {len(text):,} chars "
+                f"({len(extracted.page_numbers)}/{extracted.total_pages} pages)",
                 api="corp_ann",
             )
-            text = text[:_MAX_TEXT_CHARS]
 
         try:
             return await self._llm.analyze_text_announcement(
@@ -0,0 +1,172 @@
+"""Streaming, size-capped attachment downloads."""
+
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+from multiprocessing.shared_memory import SharedMemory
+
+from engine.processors.pdf import SharedPdf
+from engine.session import NseSession, RequestPriority
+
+# Attachments up to this size stay in memory; larger ones are spooled to a
+# temporary file that render workers open by path.
+_SPOOL_MAX_MEMORY = 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+# Shared-memory segments keyed by content hash, with the number of open
+# attachments using each, so identical PDFs in flight share one segment.
+# Segment names are left to SharedMemory: a name derived from the hash would
+# collide with another engine process (or a leaked segment) holding the same PDF.
+_shared_segments: dict[str, tuple[SharedMemory, int]] = {}
+
+
+def _acquire_segment(digest: str, content: bytes | bytearray) -> SharedPdf:
+    segment, refs = _shared_segments.get(digest, (None, 0))
+    if segment is None:
+        segment = SharedMemory(create=True, size=max(len(content), 1))
+        segment.buf[: len(content)] = content
+    _shared_segments[digest] = (segment, refs + 1)
+    return SharedPdf(name=segment.name, size=len(content))
+
+
+def _release_segment(digest: str) -> None:
+    segment, refs = _shared_segments[digest]
+    if refs > 1:
+        _shared_segments[digest] = (segment, refs - 1)
+        return
+    del _shared_segments[digest]
+    segment.close()
+    with contextlib.suppress(FileNotFoundError):
+        segment.unlink()
+
+
+class AttachmentTooLargeError(Exception):
+    """The attachment is larger than the configured cap."""
+
+    def __init__(self, size: int, max_bytes: int) -> None:
+        super().__init__(f"attachment is {size:,} bytes; cap is {max_bytes:,}")
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+class UnexpectedContentTypeError(Exception):
+    """The attachment's content type is not the one requested."""
+
+    def __init__(self, content_type: str) -> None:
+        super().__init__(f"unexpected content-type {content_type!r}")
+        self.content_type = content_type
+
+
+class SpooledAttachment:
+    """A downloaded attachment held in memory, or in a temp file once it outgrows
+    ``max_memory``. Close it (or use it as a context manager) to remove the file
+    and release any shared-memory segment handed out by :meth:`source`.
+    """
+
+    def __init__(self, max_memory: int = _SPOOL_MAX_MEMORY) -> None:
+        self._max_memory = max_memory
+        self._memory = bytearray()
+        self._file: tempfile._TemporaryFileWrapper | None = None
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._shared: SharedPdf | None = None
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        if self._shared is not None:
+            raise RuntimeError("attachment is already shared; it can no longer be written")
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self._max_memory:
+            self._file = tempfile.NamedTemporaryFile(  # noqa: SIM115 - closed in close()
+                prefix="attachment-", delete=False
+            )
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._memory += chunk
+
+    @property
+    def digest(self) -> str:
+        """Content hash of everything written so far."""
+        return self._hash.hexdigest()
+
+    def source(self) -> SharedPdf | str:
+        """A reference render workers can open without the bytes being pickled:
+        the temp file's path, or a shared-memory segment keyed by content hash.
+        The segment is created on first call and lives until :meth:`close`.
+        """
+        if self._file is not None:
+            self._file.flush()
+            return self._file.name
+        if self._shared is None:
+            self._shared = _acquire_segment(self.digest, self._memory)
+            self._memory = bytearray()
+        return self._shared
+
+    def save(self, path: str) -> None:
+        """Write the attachment's content to ``path`` (blocking file I/O)."""
+        if self._shared is not None:
+            raise RuntimeError("attachment content was moved to shared memory")
+        with open(path, "wb") as out:
+            if self._file is not None:
+                self._file.flush()
+                with open(self._file.name, "rb") as spooled:
+                    shutil.copyfileobj(spooled, out)
+            else:
+                out.write(self._memory)
+
+    def close(self) -> None:
+        if self._shared is not None:
+            _release_segment(self.digest)
+            self._shared = None
+        if self._file is not None:
+            self._file.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._file.name)
+            self._file = None
+        self._memory = bytearray()
+
+    def __enter__(self) -> "SpooledAttachment":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+async def download_attachment(
+    session: NseSession,
+    url: str,
+    *,
+    max_bytes: int,
+    content_type: str,
+    priority: RequestPriority = RequestPriority.BULK,
+) -> SpooledAttachment:
+    """Stream ``url`` into a :class:`SpooledAttachment`.
+
+    Aborts before reading the body when the content type doesn't match or the
+    declared ``Content-Length`` exceeds ``max_bytes``, and mid-stream as soon as
+    the body does.
+    """
+    async with session.stream(url, priority=priority) as response:
+        response.raise_for_status()
+        actual_type = response.headers.get("content-type", "")
+        if content_type not in actual_type:
+            raise UnexpectedContentTypeError(actual_type)
+        declared = response.headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+            raise AttachmentTooLargeError(int(declared), max_bytes)
+
+        attachment = SpooledAttachment()
+        try:
+            async for chunk in response.aiter_bytes(_CHUNK_SIZE):
+                attachment.write(chunk)
+                if attachment.size > max_bytes:
+                    raise AttachmentTooLargeError(attachment.size, max_bytes)
+        except BaseException:
+            attachment.close()
+            raise
+        return attachment
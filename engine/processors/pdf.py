@@ -1,14 +1,92 @@
+import hashlib
+import math
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
 from typing import cast
 
 import fitz
 
 
+@dataclass(frozen=True, slots=True)
+class SharedPdf:
+    """A PDF placed in a named shared-memory segment by the event-loop process."""
+
+    name: str
+    size: int
+
+
+# Raw PDF bytes, the path of a PDF file, or a shared-memory segment. Attachments
+# reach render workers by path or by segment name, so their bytes are never
+# pickled across the process pool.
+PdfSource = bytes | str | SharedPdf
+
+_DEFAULT_DOCUMENT_CACHE_SIZE = 4
+
+# Per-process LRU of parsed documents keyed by content hash, so continuation
+# batches, shrink retries and the text fallback skip re-parsing the PDF. It is not
+# thread-safe: only pass a cache_key from single-threaded render workers.
+_open_documents: OrderedDict[str, fitz.Document] = OrderedDict()
+_document_cache_size = _DEFAULT_DOCUMENT_CACHE_SIZE
+
+# Page-filter signals. The hash is a 16x16 difference hash (256 bits) of a
+# grayscale thumbnail; entropy is over a 64x64 grayscale thumbnail's histogram.
+_HASH_SIZE = 16
+_ENTROPY_THUMBNAIL_PX = 64
+_BLANK_MAX_ENTROPY_BITS = 0.5
+_DUPLICATE_MAX_HASH_DISTANCE = 8
+
+# Budgeted text extraction: pages always kept when preferring informative pages,
+# and how far past the budget to read looking for them.
+_INFORMATIVE_LEAD_PAGES = 2
+_INFORMATIVE_SCAN_FACTOR = 3
+
+
+@dataclass(frozen=True, slots=True)
+class RenderProfile:
+    """How to render one kind of page, relative to the caller's base settings."""
+
+    name: str
+    dimension_scale: float  # multiplier on max_dimension_px
+    max_zoom: float  # cap on zoom over the page's native (72 dpi) size
+    quality_boost: int  # added to jpeg_quality, clamped to 100
+
+
+_DEFAULT_PROFILE = RenderProfile("default", dimension_scale=1.0, max_zoom=1.0, quality_boost=0)
+# Text-dense and numeric (tabular) pages — financial results — need the extra
+# resolution to stay legible; sparse pages (cover letters, signatures) don't.
+_DENSE_PROFILE = RenderProfile("dense", dimension_scale=1.6, max_zoom=2.0, quality_boost=15)
+_SPARSE_PROFILE = RenderProfile("sparse", dimension_scale=0.6, max_zoom=1.0, quality_boost=0)
+_DENSE_MIN_TEXT_CHARS = 1800
+_TABULAR_MIN_TEXT_CHARS = 600
+_TABULAR_MIN_DIGIT_RATIO = 0.15
+_SPARSE_MAX_TEXT_CHARS = 250
+_SPARSE_MAX_ENTROPY_BITS = 2.0
+# A page whose thumbnail has no pixel with channels further apart than this is
+# rendered in grayscale.
+_COLOUR_THUMBNAIL_PX = 32
+_GRAYSCALE_MAX_CHANNEL_SPREAD = 24
+
+
 @dataclass(slots=True)
 class RenderedPdfPage:
     page_number: int
     media_type: str
     image_bytes: bytes
+    width: int = 0
+    height: int = 0
+    text_chars: int = 0
+    text_digest: str = ""
+    entropy: float = 0.0
+    image_hash: int = 0
+    profile: str = _DEFAULT_PROFILE.name
+    grayscale: bool = False
+
+    @property
+    def byte_size(self) -> int:
+        return len(self.image_bytes)
 
 
 @dataclass(slots=True)
@@ -17,23 +95,242 @@ class RenderedPdfPages:
     pages: list[RenderedPdfPage]
 
 
-def extract_pdf_text(pdf_bytes: bytes) -> str:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    try:
-        pages = [cast(str, page.get_text("text")) for page in doc]
-        return "\n".join(pages)
-    finally:
-        doc.close()
+def _open_pdf(source: PdfSource) -> fitz.Document:
+    if isinstance(source, SharedPdf):
+        # The owner unlinks the segment; a worker only attaches to read it.
+        segment = SharedMemory(name=source.name, track=False)
+        try:
+            return fitz.open(stream=bytes(segment.buf[: source.size]), filetype="pdf")
+        finally:
+            segment.close()
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+class PageFilter:
+    """Drops blank pages, and pages that repeat an earlier kept page (same text and
+    a near-identical image), before they are uploaded. Keep one filter per
+    document so duplicates are caught across batches; re-filtering a page (after
+    a batch is re-rendered) gives the same answer.
+    """
+
+    def __init__(self) -> None:
+        # page number -> (text digest, image hash) of every page kept so far.
+        self._kept: dict[int, tuple[str, int]] = {}
+
+    def keep(self, pages: list[RenderedPdfPage]) -> list[RenderedPdfPage]:
+        kept: list[RenderedPdfPage] = []
+        for page in pages:
+            if _is_blank(page) or self._is_duplicate(page):
+                continue
+            self._kept[page.page_number] = (page.text_digest, page.image_hash)
+            kept.append(page)
+        return kept
+
+    def _is_duplicate(self, page: RenderedPdfPage) -> bool:
+        return any(
+            page_number < page.page_number
+            and text_digest == page.text_digest
+            and (image_hash ^ page.image_hash).bit_count() <= _DUPLICATE_MAX_HASH_DISTANCE
+            for page_number, (text_digest, image_hash) in self._kept.items()
+        )
+
+
+def _is_blank(page: RenderedPdfPage) -> bool:
+    return page.text_chars == 0 and page.entropy <= _BLANK_MAX_ENTROPY_BITS
+
+
+def _grayscale_thumbnail(page: fitz.Page, width: int, height: int) -> bytes:
+    rect = page.rect
+    if not rect.width or not rect.height:
+        return bytes(width * height)
+    matrix = fitz.Matrix(width / rect.width, height / rect.height)
+    pixmap = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    # Rounding can leave the pixmap a pixel off; index by its real stride.
+    samples = pixmap.samples
+    return bytes(
+        samples[min(y, pixmap.height - 1) * pixmap.stride + min(x, pixmap.width - 1)]
+        for y in range(height)
+        for x in range(width)
+    )
+
+
+def _image_hash(page: fitz.Page) -> int:
+    pixels = _grayscale_thumbnail(page, _HASH_SIZE + 1, _HASH_SIZE)
+    bits = 0
+    for y in range(_HASH_SIZE):
+        row = pixels[y * (_HASH_SIZE + 1) : (y + 1) * (_HASH_SIZE + 1)]
+        for x in range(_HASH_SIZE):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+
+def _pixel_entropy(page: fitz.Page) -> float:
+    pixels = _grayscale_thumbnail(page, _ENTROPY_THUMBNAIL_PX, _ENTROPY_THUMBNAIL_PX)
+    counts = [0] * 256
+    for value in pixels:
+        counts[value] += 1
+    total = len(pixels)
+    return -sum(count / total * math.log2(count / total) for count in counts if count)
+
+
+def _choose_profile(text: str, entropy: float) -> RenderProfile:
+    if len(text) >= _DENSE_MIN_TEXT_CHARS:
+        return _DENSE_PROFILE
+    if len(text) >= _TABULAR_MIN_TEXT_CHARS:
+        digits = sum(char.isdigit() for char in text)
+        if digits / len(text) >= _TABULAR_MIN_DIGIT_RATIO:
+            return _DENSE_PROFILE
+    # Scanned pages have no text layer but plenty of entropy; keep them as is.
+    if len(text) <= _SPARSE_MAX_TEXT_CHARS and entropy <= _SPARSE_MAX_ENTROPY_BITS:
+        return _SPARSE_PROFILE
+    return _DEFAULT_PROFILE
+
+
+def _is_grayscale(page: fitz.Page) -> bool:
+    rect = page.rect
+    if not rect.width or not rect.height:
+        return True
+    zoom = _COLOUR_THUMBNAIL_PX / max(rect.width, rect.height)
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+    samples = pixmap.samples
+    for y in range(pixmap.height):
+        row = samples[y * pixmap.stride : y * pixmap.stride + pixmap.width * 3]
+        for x in range(0, len(row), 3):
+            r, g, b = row[x], row[x + 1], row[x + 2]
+            if max(r, g, b) - min(r, g, b) > _GRAYSCALE_MAX_CHANNEL_SPREAD:
+                return False
+    return True
+
+
+def configure_document_cache(size: int) -> None:
+    """Set this process's open-document cache size, closing any excess documents."""
+    global _document_cache_size
+    if size < 0:
+        raise ValueError("size must be >= 0")
+    _document_cache_size = size
+    while len(_open_documents) > size:
+        _, evicted = _open_documents.popitem(last=False)
+        evicted.close()
+
+
+@contextmanager
+def _document(source: PdfSource, cache_key: str | None) -> Iterator[fitz.Document]:
+    if cache_key is None or _document_cache_size == 0:
+        doc = _open_pdf(source)
+        try:
+            yield doc
+        finally:
+            doc.close()
+        return
+
+    doc = _open_documents.get(cache_key)
+    if doc is None:
+        doc = _open_pdf(source)
+        _open_documents[cache_key] = doc
+        while len(_open_documents) > _document_cache_size:
+            _, evicted = _open_documents.popitem(last=False)
+            evicted.close()
+    else:
+        _open_documents.move_to_end(cache_key)
+    yield doc
+
+
+def iter_pdf_text(
+    source: PdfSource, *, cache_key: str | None = None
+) -> Iterator[tuple[int, str]]:
+    """Yield ``(page_number, text)`` one page at a time, extracting lazily."""
+    with _document(source, cache_key) as doc:
+        for page_index in range(doc.page_count):
+            yield page_index + 1, cast(str, doc.load_page(page_index).get_text("text"))
+
+
+def extract_pdf_text(source: PdfSource, *, cache_key: str | None = None) -> str:
+    return "\n".join(text for _, text in iter_pdf_text(source, cache_key=cache_key))
+
+
+@dataclass(slots=True)
+class ExtractedPdfText:
+    text: str
+    total_pages: int
+    pages_read: int
+    page_numbers: list[int]  # pages included in ``text``, in document order
+    truncated: bool
+
+
+def _numeric_density(text: str) -> float:
+    return sum(char.isdigit() for char in text) / len(text) if text else 0.0
+
+
+def extract_budgeted_pdf_text(
+    source: PdfSource,
+    *,
+    max_chars: int,
+    cache_key: str | None = None,
+    prefer_informative: bool = False,
+) -> ExtractedPdfText:
+    """Extract at most ``max_chars`` of text, stopping as soon as the budget is met.
+
+    By default pages are taken in order. With ``prefer_informative``, the first
+    pages are always kept and the rest of the budget goes to the pages with the
+    most numeric content (results tables) among those read; reading stops after
+    a bounded multiple of the budget, so giant documents are never read in full.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be > 0")
+
+    scan_limit = max_chars * (_INFORMATIVE_SCAN_FACTOR if prefer_informative else 1)
+    pages: list[tuple[int, str]] = []
+    chars_read = 0
+    with _document(source, cache_key) as doc:
+        total_pages = doc.page_count
+        for page_index in range(total_pages):
+            text = cast(str, doc.load_page(page_index).get_text("text"))
+            pages.append((page_index + 1, text))
+            chars_read += len(text) + 1
+            if chars_read >= scan_limit:
+                break
+
+    if prefer_informative:
+        lead, rest = pages[:_INFORMATIVE_LEAD_PAGES], pages[_INFORMATIVE_LEAD_PAGES:]
+        selected = list(lead)
+        used = sum(len(text) + 1 for _, text in lead)
+        for page_number, text in sorted(rest, key=lambda item: -_numeric_density(item[1])):
+            if used >= max_chars:
+                break
+            selected.append((page_number, text))
+            used += len(text) + 1
+        selected.sort()
+    else:
+        selected = pages
+
+    joined = "\n".join(text for _, text in selected)
+    return ExtractedPdfText(
+        text=joined[:max_chars],
+        total_pages=total_pages,
+        pages_read=len(pages),
+        page_numbers=[page_number for page_number, _ in selected],
+        truncated=len(joined) > max_chars or len(selected) < total_pages,
+    )
 
 
 def render_pdf_pages(
-    pdf_bytes: bytes,
+    source: PdfSource,
     *,
     start_page: int,
     end_page: int,
     max_dimension_px: int,
     jpeg_quality: int,
+    cache_key: str | None = None,
+    adaptive: bool = False,
 ) -> RenderedPdfPages:
+    """Render ``start_page..end_page`` (clamped to the document) as JPEGs.
+
+    With ``adaptive``, each page gets a render profile from its content: dense
+    and tabular pages are rendered larger and at higher quality, sparse pages
+    smaller, and pages without colour in grayscale.
+    """
     if start_page < 1:
         raise ValueError("start_page must be >= 1")
     if end_page < start_page:
@@ -43,8 +340,7 @@ def render_pdf_pages(
     if not 1 <= jpeg_quality <= 100:
         raise ValueError("jpeg_quality must be in range 1..100")
 
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    try:
+    with _document(source, cache_key) as doc:
         total_pages = doc.page_count
         if start_page > total_pages:
             raise ValueError(
@@ -55,23 +351,41 @@ def render_pdf_pages(
 
         for page_number in range(start_page, clamped_end_page + 1):
             page = doc.load_page(page_number - 1)
+            text = " ".join(cast(str, page.get_text("text")).split())
+            entropy = _pixel_entropy(page)
+            profile = _choose_profile(text, entropy) if adaptive else _DEFAULT_PROFILE
+            grayscale = adaptive and _is_grayscale(page)
+
             rect = page.rect
             largest_dimension = max(rect.width, rect.height)
+            target_dimension = max_dimension_px * profile.dimension_scale
             zoom = (
-                min(max_dimension_px / largest_dimension, 1.0)
+                min(target_dimension / largest_dimension, profile.max_zoom)
                 if largest_dimension
                 else 1.0
             )
-            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
-            image_bytes = pixmap.tobytes("jpeg", jpg_quality=jpeg_quality)
+            pixmap = page.get_pixmap(
+                matrix=fitz.Matrix(zoom, zoom),
+                colorspace=fitz.csGRAY if grayscale else fitz.csRGB,
+                alpha=False,
+            )
+            image_bytes = pixmap.tobytes(
+                "jpeg", jpg_quality=min(jpeg_quality + profile.quality_boost, 100)
+            )
             pages.append(
                 RenderedPdfPage(
                     page_number=page_number,
                     media_type="image/jpeg",
                     image_bytes=image_bytes,
+                    width=pixmap.width,
+                    height=pixmap.height,
+                    text_chars=len(text),
+                    text_digest=hashlib.blake2b(text.encode(), digest_size=8).hexdigest(),
+                    entropy=entropy,
+                    image_hash=_image_hash(page),
+                    profile=profile.name,
+                    grayscale=grayscale,
                 )
             )
 
         return RenderedPdfPages(total_pages=total_pages, pages=pages)
-    finally:
-        doc.close()
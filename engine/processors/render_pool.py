@@ -0,0 +1,77 @@
+"""Document-affine process pool for PDF rendering."""
+
+import itertools
+import zlib
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+from engine.processors.pdf import configure_document_cache
+
+
+def _init_worker(document_cache_size: int) -> None:
+    # Importing engine.processors.pdf (above) already pulled in fitz, so the
+    # first document a worker sees doesn't pay for the import.
+    configure_document_cache(document_cache_size)
+
+
+def split_page_range(
+    start_page: int, end_page: int, *, parts: int, min_pages: int
+) -> list[tuple[int, int]]:
+    """Split ``start_page..end_page`` into at most ``parts`` contiguous, near-equal
+    sub-ranges of at least ``min_pages`` pages each (the whole range if it's too
+    short to split).
+    """
+    page_count = end_page - start_page + 1
+    parts = max(1, min(parts, page_count // max(min_pages, 1)))
+    size, extra = divmod(page_count, parts)
+    ranges: list[tuple[int, int]] = []
+    first = start_page
+    for index in range(parts):
+        last = first + size - 1 + (1 if index < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+class RenderPool(Executor):
+    """A set of single-process executors. Work for the same document key always
+    runs in the same process, where that process's open-document cache can
+    serve it; unkeyed work is spread round-robin.
+    """
+
+    def __init__(self, workers: int, *, document_cache_size: int = 4) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_init_worker,
+                initargs=(document_cache_size,),
+            )
+            for _ in range(workers)
+        ]
+        self._round_robin = itertools.cycle(self._executors)
+
+    def _owner_index(self, document_key: str) -> int:
+        return zlib.crc32(document_key.encode()) % len(self._executors)
+
+    def executor_for(self, document_key: str) -> ProcessPoolExecutor:
+        """The executor that owns ``document_key``."""
+        return self._executors[self._owner_index(document_key)]
+
+    def executors_for(self, document_key: str, count: int) -> list[ProcessPoolExecutor]:
+        """Up to ``count`` distinct executors for splitting work on ``document_key``,
+        starting with the one that owns it.
+        """
+        first = self._owner_index(document_key)
+        count = min(count, len(self._executors))
+        return [
+            self._executors[(first + offset) % len(self._executors)] for offset in range(count)
+        ]
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return next(self._round_robin).submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
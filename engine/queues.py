@@ -0,0 +1,530 @@
+"""Work-queue backends a ``ConsumerPool`` pops from.
+
+``queue_mode`` in a processor's registry config picks one:
+
+- ``list`` (default): ``queue:{api}``, strict FIFO via ``BLPOP``.
+- ``priority``: ``pqueue:{api}``, a sorted set the poller scores by priority
+  class and arrival time. Items for watched symbols (non-empty
+  ``watch:{symbol}``) come before everything else, and within a class the
+  freshest item comes first. Any item waiting longer than ``priority_max_wait``
+  seconds is served ahead of both, oldest first, so unwatched items can't
+  starve. Arrival times are kept in a companion sorted set,
+  ``pqueue:{api}:arrivals``.
+- ``reliable``: ``queue:{api}`` in FIFO order like ``list``, but a worker
+  ``LMOVE``s each item into its own ``queue:{api}:processing:{worker}`` list
+  and only removes it there once processed. Each worker holds a lease in
+  ``queue:{api}:leases``, renewed while it works; a worker that dies stops
+  renewing, and once its lease is ``visibility_timeout`` seconds old the
+  reaper moves its item back to the head of the queue.
+- ``stream``: ``stream:{api}``, a Redis stream read through the ``processors``
+  consumer group, so several engine hosts share one queue. Each worker is a
+  consumer; an entry stays in the group's pending list until acked (and then
+  deleted). A worker resets its entry's idle time while it works, and the
+  reaper ``XAUTOCLAIM``s entries idle for ``visibility_timeout`` seconds and
+  adds them back to the end of the stream.
+
+Every backend's ``pop_batch`` takes up to N items in one round trip when they
+are waiting, for pools that hand items to ``process_batch``.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError, WatchError
+
+from database.redis import (
+    priority_arrivals_key,
+    priority_queue_key,
+    processing_list_key,
+    queue_key,
+    queue_leases_key,
+    stream_key,
+)
+
+QUEUE_MODES = ("list", "priority", "reliable", "stream")
+STREAM_GROUP = "processors"
+STREAM_FIELD = "item"
+PRIORITY_CLASSES = {"watched": 0, "unwatched": 1}
+# Score = class * _CLASS_SPAN - arrival epoch seconds, so classes never overlap
+# and, within a class, the newest item has the lowest score.
+_CLASS_SPAN = 1e10
+_DEFAULT_MAX_WAIT = 300.0
+_POLL_INTERVAL = 0.25
+_DEFAULT_VISIBILITY_TIMEOUT = 60.0
+# Consumers left behind by stopped workers are dropped once this idle and empty.
+_STALE_CONSUMER_MS = 600_000
+
+# KEYS: queue, arrivals. ARGV: now, max_wait, count. Pops up to count items and
+# returns a flat {member, score, arrived_at, ...} list.
+_POP_PRIORITY_SCRIPT = """
+local popped = {}
+for i = 1, tonumber(ARGV[3]) do
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    local member
+    if #oldest > 0 and tonumber(ARGV[1]) - tonumber(oldest[2]) >= tonumber(ARGV[2]) then
+        member = oldest[1]
+    else
+        local head = redis.call('ZRANGE', KEYS[1], 0, 0)
+        if #head == 0 then
+            break
+        end
+        member = head[1]
+    end
+    table.insert(popped, member)
+    table.insert(popped, redis.call('ZSCORE', KEYS[1], member))
+    table.insert(popped, redis.call('ZSCORE', KEYS[2], member))
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('ZREM', KEYS[2], member)
+end
+return popped
+"""
+
+# KEYS: queue, processing. ARGV: count. Moves up to count items without blocking.
+_MOVE_BATCH_SCRIPT = """
+local moved = {}
+for i = 1, tonumber(ARGV[1]) do
+    local raw = redis.call('LMOVE', KEYS[1], KEYS[2], 'LEFT', 'RIGHT')
+    if not raw then
+        break
+    end
+    table.insert(moved, raw)
+end
+return moved
+"""
+
+
+# KEYS: queue, leases, processing. ARGV: worker, now ("" to release regardless of
+# the lease). Moves the worker's items back to the head of the queue in order and
+# drops its lease; returns how many items moved.
+_RELEASE_SCRIPT = """
+if ARGV[2] ~= '' then
+    local deadline = redis.call('ZSCORE', KEYS[2], ARGV[1])
+    if not deadline or tonumber(deadline) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+local moved = 0
+while redis.call('LMOVE', KEYS[3], KEYS[1], 'RIGHT', 'LEFT') do
+    moved = moved + 1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+return moved
+"""
+
+
+# KEYS: stream. ARGV: group, reaper consumer, min idle ms. Claims every entry
+# idle that long and adds it back as a new entry; returns how many were re-added.
+# Stops at the 0-0 cursor, or one that no longer advances (which some Redis
+# emulations return at the end of the scan instead).
+_RECLAIM_STREAM_SCRIPT = """
+local moved = 0
+local cursor = '0-0'
+local previous
+repeat
+    previous = cursor
+    local reply = redis.call('XAUTOCLAIM', KEYS[1], ARGV[1], ARGV[2], ARGV[3], cursor, 'COUNT', 100)
+    cursor = reply[1]
+    for _, entry in ipairs(reply[2]) do
+        if entry[2] then
+            redis.call('XADD', KEYS[1], '*', unpack(entry[2]))
+            moved = moved + 1
+        end
+        redis.call('XACK', KEYS[1], ARGV[1], entry[1])
+        redis.call('XDEL', KEYS[1], entry[1])
+    end
+until cursor == '0-0' or cursor == previous
+return moved
+"""
+
+# KEYS: stream. ARGV: group, consumer, entry ids. Resets the idle time of each
+# entry the consumer still owns; returns how many it renewed.
+_RENEW_STREAM_SCRIPT = """
+local renewed = 0
+for i = 3, #ARGV do
+    local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1)
+    if #pending > 0 and pending[1][2] == ARGV[2] then
+        redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+
+def queue_key_for(queue_mode: str) -> Callable[..., str]:
+    """The key function (``api``, optional ``tier``) for ``queue_mode``'s queues."""
+    if queue_mode == "priority":
+        return priority_queue_key
+    if queue_mode == "stream":
+        return stream_key
+    return queue_key
+
+
+def priority_score(priority_class: int, arrived_at: float) -> float:
+    return priority_class * _CLASS_SPAN - arrived_at
+
+
+@dataclass(slots=True)
+class QueuedItem:
+    """A popped item: its raw payload plus whatever the backend needs to put it back."""
+
+    raw: str
+    score: float | None = None
+    arrived_at: float | None = None
+    entry_id: str | None = None
+
+
+class ListQueue:
+    def __init__(self, redis: Redis, key: str) -> None:
+        self._redis = redis
+        self.key = key
+
+    async def pop(self, timeout: float) -> QueuedItem | None:
+        items = await self.pop_batch(1, timeout)
+        return items[0] if items else None
+
+    async def pop_batch(self, count: int, timeout: float) -> list[QueuedItem]:
+        """Up to ``count`` items in one round trip when the queue has them;
+        otherwise block for a single one.
+        """
+        if count > 1:
+            raws = await self._redis.lpop(self.key, count)
+            if raws:
+                return [QueuedItem(raw=raw) for raw in raws]
+        result = await self._redis.blpop(self.key, timeout=timeout)
+        if result is None:
+            return []
+        _, raw = result
+        return [QueuedItem(raw=raw)]
+
+    async def requeue(self, *items: QueuedItem) -> None:
+        await self._redis.rpush(self.key, *(item.raw for item in items))
+
+    async def ack(self, *items: QueuedItem) -> None:
+        pass
+
+    async def release(self) -> None:
+        pass
+
+
+class PriorityQueue:
+    def __init__(self, redis: Redis, key: str, *, max_wait: float = _DEFAULT_MAX_WAIT) -> None:
+        self._redis = redis
+        self.key = key
+        self._arrivals_key = priority_arrivals_key(key)
+        self._max_wait = max_wait
+        self._pop_script = redis.register_script(_POP_PRIORITY_SCRIPT)
+
+    async def pop(self, timeout: float) -> QueuedItem | None:
+        items = await self.pop_batch(1, timeout)
+        return items[0] if items else None
+
+    async def pop_batch(self, count: int, timeout: float) -> list[QueuedItem]:
+        # No blocking pop covers both sorted sets, so poll until the timeout.
+        deadline = time.monotonic() + timeout
+        while True:
+            result = await self._pop_script(
+                keys=[self.key, self._arrivals_key], args=[time.time(), self._max_wait, count]
+            )
+            if result:
+                return [
+                    QueuedItem(raw=raw, score=float(score), arrived_at=float(arrived_at))
+                    for raw, score, arrived_at in zip(
+                        result[0::3], result[1::3], result[2::3], strict=True
+                    )
+                ]
+            if time.monotonic() >= deadline:
+                return []
+            await asyncio.sleep(_POLL_INTERVAL)
+
+    async def requeue(self, *items: QueuedItem) -> None:
+        pipe = self._redis.pipeline(transaction=True)
+        for item in items:
+            arrived_at = item.arrived_at if item.arrived_at is not None else time.time()
+            score = item.score
+            if score is None:
+                score = priority_score(PRIORITY_CLASSES["unwatched"], arrived_at)
+            pipe.zadd(self.key, {item.raw: score})
+            pipe.zadd(self._arrivals_key, {item.raw: arrived_at})
+        await pipe.execute()
+
+    async def ack(self, *items: QueuedItem) -> None:
+        pass
+
+    async def release(self) -> None:
+        pass
+
+
+class ReliableQueue:
+    """One worker's view of a reliable queue; ``worker`` names its processing
+    list and lease. Any instance can :meth:`reap` for the whole queue.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key: str,
+        *,
+        worker: str,
+        visibility_timeout: float = _DEFAULT_VISIBILITY_TIMEOUT,
+    ) -> None:
+        self._redis = redis
+        self.key = key
+        self.worker = worker
+        self.visibility_timeout = visibility_timeout
+        self._processing_key = processing_list_key(key, worker)
+        self._leases_key = queue_leases_key(key)
+        self._release_script = redis.register_script(_RELEASE_SCRIPT)
+        self._move_batch_script = redis.register_script(_MOVE_BATCH_SCRIPT)
+
+    async def pop(self, timeout: float) -> QueuedItem | None:
+        items = await self.pop_batch(1, timeout)
+        return items[0] if items else None
+
+    async def pop_batch(self, count: int, timeout: float) -> list[QueuedItem]:
+        # Take the lease first: an item is never in the processing list unleased.
+        await self._redis.zadd(
+            self._leases_key, {self.worker: time.time() + timeout + self.visibility_timeout}
+        )
+        # Poll rather than BLMOVE: a blocking move abandoned by a cancelled worker
+        # can still land an item in its processing list after release() ran.
+        deadline = time.monotonic() + timeout
+        while True:
+            raws = await self._move_batch_script(
+                keys=[self.key, self._processing_key], args=[count]
+            )
+            if raws:
+                return [QueuedItem(raw=raw) for raw in raws]
+            if time.monotonic() >= deadline:
+                return []
+            await asyncio.sleep(_POLL_INTERVAL)
+
+    async def renew(self) -> None:
+        # XX: once reaped, the item is someone else's; don't take a lease back.
+        await self._redis.zadd(
+            self._leases_key, {self.worker: time.time() + self.visibility_timeout}, xx=True
+        )
+
+    async def hold(self) -> None:
+        """Renew the lease until cancelled; run it alongside processing an item."""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            await self.renew()
+
+    async def ack(self, *items: QueuedItem) -> None:
+        pipe = self._redis.pipeline(transaction=True)
+        for item in items:
+            pipe.lrem(self._processing_key, 1, item.raw)
+        await pipe.execute()
+
+    async def requeue(self, *items: QueuedItem) -> None:
+        pipe = self._redis.pipeline(transaction=True)
+        for item in items:
+            pipe.lrem(self._processing_key, 1, item.raw)
+        pipe.rpush(self.key, *(item.raw for item in items))
+        await pipe.execute()
+
+    async def release(self) -> None:
+        """Put this worker's unfinished items back at the head of the queue."""
+        await self._release_script(
+            keys=[self.key, self._leases_key, self._processing_key], args=[self.worker, ""]
+        )
+
+    async def reap(self) -> int:
+        """Re-queue the items of every worker whose lease has expired."""
+        now = time.time()
+        workers = await self._redis.zrangebyscore(self._leases_key, "-inf", now)
+        moved = 0
+        for worker in workers:
+            moved += await self._release_script(
+                keys=[self.key, self._leases_key, processing_list_key(self.key, worker)],
+                args=[worker, now],
+            )
+        return moved
+
+
+async def priority_depths(redis: Redis, key: str) -> dict[str, int]:
+    """Items waiting in the priority queue ``key``, by priority class."""
+    pipe = redis.pipeline(transaction=False)
+    for priority_class in PRIORITY_CLASSES.values():
+        low = priority_class * _CLASS_SPAN - _CLASS_SPAN / 2
+        pipe.zcount(key, low, f"({low + _CLASS_SPAN}")
+    counts = await pipe.execute()
+    return dict(zip(PRIORITY_CLASSES, (int(count) for count in counts), strict=True))
+
+
+class StreamQueue:
+    """One worker's view of a stream queue; ``consumer`` is its name in the group.
+    Any instance can :meth:`reap` for the whole stream.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key: str,
+        *,
+        consumer: str,
+        visibility_timeout: float = _DEFAULT_VISIBILITY_TIMEOUT,
+    ) -> None:
+        self._redis = redis
+        self.key = key
+        self.consumer = consumer
+        self.visibility_timeout = visibility_timeout
+        self._group_ready = False
+        self._current: list[QueuedItem] = []
+        self._reclaim_script = redis.register_script(_RECLAIM_STREAM_SCRIPT)
+        self._renew_script = redis.register_script(_RENEW_STREAM_SCRIPT)
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            # From the start of the stream, so entries added before the group existed count.
+            await self._redis.xgroup_create(self.key, STREAM_GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self._group_ready = True
+
+    async def pop(self, timeout: float) -> QueuedItem | None:
+        items = await self.pop_batch(1, timeout)
+        return items[0] if items else None
+
+    async def pop_batch(self, count: int, timeout: float) -> list[QueuedItem]:
+        # Poll rather than XREADGROUP BLOCK, as ReliableQueue does: an abandoned
+        # blocking read can still deliver entries after release() left the group.
+        deadline = time.monotonic() + timeout
+        while True:
+            await self._ensure_group()
+            try:
+                result = await self._redis.xreadgroup(
+                    STREAM_GROUP, self.consumer, {self.key: ">"}, count=count
+                )
+            except ResponseError as exc:
+                if "NOGROUP" in str(exc):
+                    self._group_ready = False  # the stream was deleted; recreate next time
+                raise
+            if result and result[0][1]:
+                break
+            if time.monotonic() >= deadline:
+                return []
+            await asyncio.sleep(_POLL_INTERVAL)
+        _, entries = result[0]
+        self._current = [
+            QueuedItem(raw=fields[STREAM_FIELD], entry_id=entry_id) for entry_id, fields in entries
+        ]
+        return list(self._current)
+
+    async def renew(self) -> None:
+        if self._current:
+            await self._renew_script(
+                keys=[self.key],
+                args=[STREAM_GROUP, self.consumer, *(item.entry_id for item in self._current)],
+            )
+
+    async def hold(self) -> None:
+        """Keep the current entries from being reclaimed until cancelled."""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            await self.renew()
+
+    def _done(self, items: tuple[QueuedItem, ...]) -> list[str]:
+        entry_ids = [item.entry_id for item in items]
+        self._current = [item for item in self._current if item.entry_id not in entry_ids]
+        return entry_ids
+
+    async def ack(self, *items: QueuedItem) -> None:
+        entry_ids = self._done(items)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.xack(self.key, STREAM_GROUP, *entry_ids)
+        pipe.xdel(self.key, *entry_ids)
+        await pipe.execute()
+
+    async def requeue(self, *items: QueuedItem) -> None:
+        entry_ids = self._done(items)
+        pipe = self._redis.pipeline(transaction=True)
+        for item in items:
+            pipe.xadd(self.key, {STREAM_FIELD: item.raw})
+        pipe.xack(self.key, STREAM_GROUP, *entry_ids)
+        pipe.xdel(self.key, *entry_ids)
+        await pipe.execute()
+
+    async def release(self) -> None:
+        """Hand unfinished entries back (to the end of the stream) and leave the group."""
+        if self._current:
+            await self.requeue(*self._current)
+        if self._group_ready:
+            await self._delete_consumer(self.consumer)
+
+    async def _delete_consumer(self, consumer: str) -> None:
+        """Remove ``consumer`` from the group if it has nothing pending.
+
+        DELCONSUMER drops the consumer's pending entries with it, so the check and
+        the delete run under WATCH; if the stream changes in between, the consumer
+        is left for the next reap.
+        """
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(self.key)
+            pending = await pipe.xpending_range(
+                self.key, STREAM_GROUP, min="-", max="+", count=1, consumername=consumer
+            )
+            if pending:
+                await pipe.unwatch()
+                return
+            pipe.multi()
+            pipe.xgroup_delconsumer(self.key, STREAM_GROUP, consumer)
+            with contextlib.suppress(WatchError):
+                await pipe.execute()
+
+    async def reap(self) -> int:
+        """Re-add entries idle past the visibility timeout, and drop consumers
+        that have been idle and empty for a while; returns how many were re-added.
+        """
+        await self._ensure_group()
+        moved = await self._reclaim_script(
+            keys=[self.key],
+            args=[STREAM_GROUP, self.consumer, int(self.visibility_timeout * 1000)],
+        )
+        for info in await self._redis.xinfo_consumers(self.key, STREAM_GROUP):
+            if info["pending"] == 0 and info["idle"] >= _STALE_CONSUMER_MS:
+                await self._delete_consumer(info["name"])
+        return int(moved)
+
+
+async def stream_depths(redis: Redis, key: str) -> dict:
+    """Entries in the stream ``key`` not yet delivered (``waiting``), delivered but
+    not acked (``pending``), and each consumer's pending count and idle time.
+    """
+    try:
+        consumers = await redis.xinfo_consumers(key, STREAM_GROUP)
+    except ResponseError:  # no stream or no group yet
+        return {"waiting": 0, "pending": 0, "consumers": {}}
+    pipe = redis.pipeline(transaction=False)
+    pipe.xlen(key)
+    pipe.xpending(key, STREAM_GROUP)
+    length, summary = await pipe.execute()
+    pending = int(summary["pending"])
+    return {
+        # Acked entries are deleted, so whatever isn't pending hasn't been delivered.
+        "waiting": max(0, int(length) - pending),
+        "pending": pending,
+        "consumers": {
+            info["name"]: {"pending": int(info["pending"]), "idle_ms": int(info["idle"])}
+            for info in consumers
+        },
+    }
+
+
+async def processing_depth(redis: Redis, key: str) -> int:
+    """Items reliable-queue workers have taken from ``key`` but not yet acked."""
+    workers = await redis.zrange(queue_leases_key(key), 0, -1)
+    if not workers:
+        return 0
+    pipe = redis.pipeline(transaction=False)
+    for worker in workers:
+        pipe.llen(processing_list_key(key, worker))
+    return sum(int(depth) for depth in await pipe.execute())
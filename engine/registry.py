@@ -8,6 +8,7 @@ from dataclasses import dataclass
 from sqlalchemy import select
 
 from database.models import PollerConfig, ProcessorConfig, ProcessorPollerLink
+from engine.processors.base import ProcessorBase
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,7 @@ class ProcessorModuleInfo:
     processor_cls: type
     input_schema: dict
     default_config: dict
+    supports_batch: bool = False
 
 
 @dataclass
@@ -47,6 +49,7 @@ class LoadedProcessor:
     processor_cls: type
     config: dict
     poller_api_names: list[str]
+    supports_batch: bool = False
 
 
 def schema_incompatibilities(input_schema: dict, output_schema: dict) -> list[str]:
@@ -79,6 +82,12 @@ def _default_config(obj: type) -> dict:
     return fn()
 
 
+def supports_batch(processor_cls: type) -> bool:
+    """Whether the processor implements its own ``process_batch``."""
+    batch = getattr(processor_cls, "process_batch", None)
+    return callable(batch) and batch is not ProcessorBase.process_batch
+
+
 def load_poller_module(module_path: str) -> PollerModuleInfo:
     mod = importlib.import_module(module_path)
     if not hasattr(mod, "OutputSchema"):
@@ -106,6 +115,7 @@ def load_processor_module(module_path: str) -> ProcessorModuleInfo:
         processor_cls=mod.Processor,
         input_schema=mod.InputSchema.model_json_schema(),
         default_config=_default_config(mod.Processor),
+        supports_batch=supports_batch(mod.Processor),
     )
 
 
@@ -203,6 +213,7 @@ async def load_enabled(db) -> tuple[list[LoadedPoller], list[LoadedProcessor]]:
                 processor_cls=info.processor_cls,
                 config=_merge_config(info.default_config, row.config),
                 poller_api_names=[api for api in linked_apis if api is not None],
+                supports_batch=info.supports_batch,
             )
         )
 
@@ -0,0 +1,161 @@
+"""Exchange-calendar aware poll scheduling."""
+
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+
+import pytz
+from redis.asyncio import Redis
+
+from database.redis import holidays_key
+from engine.session import NseSession
+
+logger = logging.getLogger(__name__)
+
+_IST = pytz.timezone("Asia/Kolkata")
+_NSE_HOLIDAYS_URL = "https://www.nseindia.com/api/holiday-master"
+_HOLIDAY_DATE_FORMAT = "%d-%b-%Y"
+# Holiday lists only change a few times a year; the Redis copy is shared by
+# every poller (and engine replica) so NSE is asked at most this often.
+_CALENDAR_TTL = 12 * 3600
+_CALENDAR_RETRY_AFTER = 600.0
+
+
+@dataclass(frozen=True, slots=True)
+class PollWindow:
+    """A daily IST time range with its own poll interval (``None`` = ``base_interval``).
+
+    ``cap_adaptive`` keeps arrival-rate adaptation from relaxing past that interval
+    inside the window; it can still poll faster during bursts.
+    """
+
+    start: dt_time
+    end: dt_time
+    interval: float | None = None
+    cap_adaptive: bool = False
+
+    def contains(self, moment: dt_time) -> bool:
+        return self.start <= moment < self.end
+
+
+@dataclass(frozen=True, slots=True)
+class PollSchedule:
+    """When a poller should poll, and how often.
+
+    On trading days the first window containing the current IST time decides the
+    interval, and ``off_window_interval`` applies outside every window. When the
+    exchange is closed (weekends and holidays) ``closed_interval`` applies, or no
+    polling at all when it is ``None``.
+    """
+
+    windows: list[PollWindow] = field(default_factory=list)
+    off_window_interval: float = 60.0
+    closed_interval: float | None = None
+
+    def interval_at(
+        self, now: datetime, *, trading_day: bool, base_interval: float
+    ) -> float | None:
+        if not trading_day:
+            return self.closed_interval
+        window = self.window_at(now)
+        if window is None:
+            return self.off_window_interval
+        return window.interval if window.interval is not None else base_interval
+
+    def window_at(self, now: datetime) -> PollWindow | None:
+        """The first window containing ``now``'s IST time of day, if any."""
+        moment = now.time()
+        return next((window for window in self.windows if window.contains(moment)), None)
+
+
+class ArrivalRate:
+    """Exponentially-decayed estimate of new items per second.
+
+    Each observation adds ``count * ln2 / half_life`` and the estimate halves
+    every ``half_life`` seconds without arrivals, so a steady stream of ``r``
+    items per second converges to ``r``.
+    """
+
+    def __init__(self, half_life: float, initial_rate: float = 0.0) -> None:
+        if half_life <= 0:
+            raise ValueError("half_life must be > 0")
+        self._half_life = half_life
+        self._rate = initial_rate
+        self._updated_at = time.monotonic()
+
+    def rate(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        elapsed = max(0.0, now - self._updated_at)
+        return self._rate * 0.5 ** (elapsed / self._half_life)
+
+    def observe(self, count: int, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._rate = self.rate(now) + count * math.log(2) / self._half_life
+        self._updated_at = now
+
+
+def ist_now() -> datetime:
+    return datetime.now(tz=_IST)
+
+
+def seconds_until_next_ist_day(now: datetime) -> float:
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+def parse_holidays(payload: dict, segment: str) -> set[date]:
+    holidays: set[date] = set()
+    for entry in payload.get(segment) or []:
+        try:
+            holidays.add(datetime.strptime(entry["tradingDate"], _HOLIDAY_DATE_FORMAT).date())
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring malformed NSE holiday entry %r", entry)
+    return holidays
+
+
+class TradingCalendar:
+    """NSE trading days, built from the ``holiday-master`` endpoint.
+
+    Holidays are cached in-process and in Redis for ``_CALENDAR_TTL``. If NSE
+    can't be reached the calendar degrades to weekends-only and retries later,
+    so a calendar problem never stops a poller.
+    """
+
+    def __init__(self, session: NseSession, redis: Redis, segment: str = "CM") -> None:
+        self._session = session
+        self._redis = redis
+        self._segment = segment
+        self._holidays: set[date] = set()
+        self._expires_at = 0.0
+
+    async def _load(self) -> None:
+        cached = await self._redis.get(holidays_key(self._segment))
+        if cached:
+            self._holidays = {date.fromisoformat(day) for day in json.loads(cached)}
+            self._expires_at = time.monotonic() + _CALENDAR_TTL
+            return
+        try:
+            response = await self._session.get(_NSE_HOLIDAYS_URL, params={"type": "trading"})
+            response.raise_for_status()
+            self._holidays = parse_holidays(response.json(), self._segment)
+        except Exception as exc:
+            logger.warning(
+                "NSE holiday calendar unavailable (%r); treating only weekends as closed", exc
+            )
+            self._expires_at = time.monotonic() + _CALENDAR_RETRY_AFTER
+            return
+        await self._redis.set(
+            holidays_key(self._segment),
+            json.dumps(sorted(day.isoformat() for day in self._holidays)),
+            ex=_CALENDAR_TTL,
+        )
+        self._expires_at = time.monotonic() + _CALENDAR_TTL
+
+    async def is_trading_day(self, day: date) -> bool:
+        if time.monotonic() >= self._expires_at:
+            await self._load()
+        return day.weekday() < 5 and day not in self._holidays
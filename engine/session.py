@@ -1,4 +1,22 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from http.cookiejar import Cookie
+from urllib.parse import urlsplit
+
 import httpx
+from redis.asyncio import Redis
+
+from database.redis import nse_cookies_key, nse_cookies_lock_key
+
+logger = logging.getLogger(__name__)
 
 NSE_HOME = "https://www.nseindia.com"
 _HEADERS = {
@@ -12,25 +30,323 @@ _HEADERS = {
     "Referer": "https://www.nseindia.com/",
 }
 
+_SESSION_EXPIRED_STATUSES = (401, 403)
+# Refresh this long before the earliest NSE cookie expires, so requests don't
+# race the expiry.
+_COOKIE_REFRESH_MARGIN = 60.0
+# Never refresh proactively more often than this, even if NSE hands out very
+# short-lived cookies.
+_MIN_PROACTIVE_REFRESH_SPACING = 60.0
+# Cookies shared through Redis: how long a jar without expiry attributes is
+# trusted, and how long other replicas wait for the one refreshing it.
+_SHARED_COOKIE_TTL = 1800
+_REFRESH_LOCK_TTL = 15
+_REFRESH_LOCK_POLL = 0.5
+_REFRESH_LOCK_WAIT_STEPS = 10
+
+# Requests per second and burst size per NSE host. The API host serves every
+# poller; the archives host serves attachment downloads.
+DEFAULT_BUDGETS: dict[str, tuple[float, int]] = {
+    "www.nseindia.com": (3.0, 6),
+    "nsearchives.nseindia.com": (2.0, 4),
+}
+
+
+class RequestPriority(IntEnum):
+    """Lower values are served first when a host's budget is exhausted."""
+
+    POLL = 0
+    BULK = 1
+
+
+class RequestBudget:
+    """Token bucket with priority-ordered waiters.
+
+    Tokens refill at ``rate`` per second up to ``burst``. When no token is
+    available callers queue by ``(priority, arrival)``, so a backlog of bulk
+    downloads never delays a poll that arrives after it.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be > 0 and burst >= 1")
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+        if self._waiters:
+            delay = (1 - self._tokens) / self._rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def acquire(self, priority: RequestPriority) -> float:
+        """Take one token, waiting if necessary; return the seconds spent waiting."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), waiter))
+        if self._timer is None:
+            self._dispatch()
+        await waiter
+        return time.monotonic() - started
+
+
+def _is_nse_url(url: str) -> bool:
+    return (urlsplit(url).hostname or "").endswith("nseindia.com")
+
+
+def _earliest_expiry(cookies: httpx.Cookies) -> float | None:
+    expiries = [cookie.expires for cookie in cookies.jar if cookie.expires]
+    return min(expiries) if expiries else None
+
+
+def _proactive_refresh_at(cookies: httpx.Cookies) -> float | None:
+    """Wall-clock time to refresh ahead of the earliest cookie expiry, if any expire."""
+    expires_at = _earliest_expiry(cookies)
+    if expires_at is None:
+        return None
+    return max(
+        expires_at - _COOKIE_REFRESH_MARGIN,
+        time.time() + _MIN_PROACTIVE_REFRESH_SPACING,
+    )
+
+
+def _dump_cookies(cookies: httpx.Cookies) -> list[dict]:
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            "expires": cookie.expires,
+        }
+        for cookie in cookies.jar
+    ]
+
+
+def _load_cookies(cookies: httpx.Cookies, dumped: list[dict]) -> None:
+    cookies.jar.clear()
+    for entry in dumped:
+        domain = entry["domain"]
+        cookies.jar.set_cookie(
+            Cookie(
+                version=0,
+                name=entry["name"],
+                value=entry["value"],
+                port=None,
+                port_specified=False,
+                domain=domain,
+                domain_specified=bool(domain),
+                domain_initial_dot=domain.startswith("."),
+                path=entry["path"],
+                path_specified=True,
+                secure=entry["secure"],
+                expires=entry["expires"],
+                discard=entry["expires"] is None,
+                comment=None,
+                comment_url=None,
+                rest={},
+            )
+        )
+
+
+class _WaitStats:
+    __slots__ = ("requests", "wait_total", "wait_max")
 
-class NseSession:
     def __init__(self) -> None:
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float) -> None:
+        self.requests += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+
+class NseSession:
+    """Cookie-managed, rate-budgeted client for NSE.
+
+    With ``redis`` the cookie jar is shared: startup reuses a still-valid jar
+    instead of hitting the home page, and a refresh by any replica is adopted
+    by the others.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        budgets: dict[str, tuple[float, int]] | None = None,
+    ) -> None:
         self._client: httpx.AsyncClient | None = None
+        self._redis = redis
+        self._cookie_version: str | None = None
+        self._budgets = {
+            host: RequestBudget(rate, burst)
+            for host, (rate, burst) in (DEFAULT_BUDGETS if budgets is None else budgets).items()
+        }
+        self._wait_stats: dict[tuple[str, RequestPriority], _WaitStats] = {}
+        self._refresh_task: asyncio.Task | None = None
+        self._generation = 0
+        self._refresh_due_at: float | None = None
 
     async def initialize(self) -> None:
         self._client = httpx.AsyncClient(headers=_HEADERS, follow_redirects=True)
         await self.refresh()
 
+    async def _acquire(self, url: str, priority: RequestPriority) -> None:
+        host = urlsplit(url).hostname or ""
+        budget = self._budgets.get(host)
+        if budget is None:
+            return
+        waited = await budget.acquire(priority)
+        self._wait_stats.setdefault((host, priority), _WaitStats()).record(waited)
+
     async def refresh(self) -> None:
+        """Re-acquire NSE cookies — from another replica if it already has fresh
+        ones, otherwise from the home page.
+
+        Single-flight: concurrent callers all await the one refresh in progress.
+        """
         if self._client is None:
             raise RuntimeError("Session not initialized — call initialize() first")
-        await self._client.get(NSE_HOME)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_cookies(self._client))
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh_cookies(self, client: httpx.AsyncClient) -> None:
+        if await self._adopt_shared_cookies(client):
+            return
+        locked = self._redis is None or await self._redis.set(
+            nse_cookies_lock_key(), "1", nx=True, ex=_REFRESH_LOCK_TTL
+        )
+        if not locked:
+            # Another replica is refreshing; use its cookies once they land.
+            for _ in range(_REFRESH_LOCK_WAIT_STEPS):
+                await asyncio.sleep(_REFRESH_LOCK_POLL)
+                if await self._adopt_shared_cookies(client):
+                    return
+        try:
+            await self._acquire(NSE_HOME, RequestPriority.POLL)
+            await client.get(NSE_HOME)
+            self._cookie_version = uuid.uuid4().hex
+            await self._share_cookies(client)
+        finally:
+            if locked and self._redis is not None:
+                await self._redis.delete(nse_cookies_lock_key())
+        self._generation += 1
+        self._refresh_due_at = _proactive_refresh_at(client.cookies)
+
+    async def _adopt_shared_cookies(self, client: httpx.AsyncClient) -> bool:
+        """Load the shared jar if another replica stored a newer one."""
+        if self._redis is None:
+            return False
+        raw = await self._redis.get(nse_cookies_key())
+        if not raw:
+            return False
+        shared = json.loads(raw)
+        if shared["version"] == self._cookie_version:
+            return False
+        _load_cookies(client.cookies, shared["cookies"])
+        self._cookie_version = shared["version"]
+        self._generation += 1
+        self._refresh_due_at = _proactive_refresh_at(client.cookies)
+        return True
+
+    async def _share_cookies(self, client: httpx.AsyncClient) -> None:
+        if self._redis is None:
+            return
+        expires_at = _earliest_expiry(client.cookies)
+        ttl = (
+            int(expires_at - _COOKIE_REFRESH_MARGIN - time.time())
+            if expires_at is not None
+            else _SHARED_COOKIE_TTL
+        )
+        if ttl <= 0:
+            return
+        payload = {"version": self._cookie_version, "cookies": _dump_cookies(client.cookies)}
+        try:
+            await self._redis.set(nse_cookies_key(), json.dumps(payload), ex=ttl)
+        except Exception:
+            logger.exception("Failed to share NSE cookies through Redis")
 
-    async def get(self, url: str, **kwargs) -> httpx.Response:
+    async def _refresh_if_due(self) -> None:
         if self._client is None:
             raise RuntimeError("Session not initialized — call initialize() first")
+        if self._refresh_due_at is not None and time.time() >= self._refresh_due_at:
+            await self.refresh()
+
+    async def get(
+        self, url: str, *, priority: RequestPriority = RequestPriority.POLL, **kwargs
+    ) -> httpx.Response:
+        """GET through the request budget.
+
+        Refreshes cookies shortly before they expire, and retries a request that
+        NSE rejected with 401/403 once, after a (shared) cookie refresh.
+        """
+        await self._refresh_if_due()
+        generation = self._generation
+        await self._acquire(url, priority)
+        response = await self._client.get(url, **kwargs)
+        if response.status_code not in _SESSION_EXPIRED_STATUSES or not _is_nse_url(url):
+            return response
+        # Only refresh if nobody else already did since this request was sent.
+        if self._generation == generation:
+            await self.refresh()
+        await self._acquire(url, priority)
         return await self._client.get(url, **kwargs)
 
+    @asynccontextmanager
+    async def stream(
+        self, url: str, *, priority: RequestPriority = RequestPriority.POLL, **kwargs
+    ) -> AsyncIterator[httpx.Response]:
+        """Streaming GET with the same budget and refresh/retry rules as :meth:`get`.
+
+        The response body is not read; iterate it with ``aiter_bytes()``.
+        """
+        await self._refresh_if_due()
+        generation = self._generation
+        await self._acquire(url, priority)
+        async with self._client.stream("GET", url, **kwargs) as response:
+            if response.status_code not in _SESSION_EXPIRED_STATUSES or not _is_nse_url(url):
+                yield response
+                return
+        if self._generation == generation:
+            await self.refresh()
+        await self._acquire(url, priority)
+        async with self._client.stream("GET", url, **kwargs) as response:
+            yield response
+
+    def budget_stats(self) -> dict[str, int | float]:
+        """Request counts and budget wait times, keyed ``{host}:{priority}:{metric}``."""
+        stats: dict[str, int | float] = {}
+        for (host, priority), wait in self._wait_stats.items():
+            prefix = f"{host}:{priority.name.lower()}"
+            stats[f"{prefix}:requests"] = wait.requests
+            stats[f"{prefix}:wait_total_s"] = round(wait.wait_total, 3)
+            stats[f"{prefix}:wait_max_s"] = round(wait.wait_max, 3)
+        return stats
+
     async def close(self) -> None:
         if self._client is not None:
             await self._client.aclose()
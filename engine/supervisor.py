@@ -5,12 +5,8 @@ from collections.abc import Callable, Coroutine
 from contextlib import suppress
 from typing import Any
 
-from database.redis import (
-    poller_heartbeat_key,
-    poller_last_success_key,
-    poller_status_key,
-)
 from engine.events import push_event
+from engine.health import read_health
 
 logger = logging.getLogger(__name__)
 
@@ -92,18 +88,20 @@ class Watchdog:
                 await self._check(api)
 
     async def _check(self, api: str) -> None:
-        status = await self._redis.get(poller_status_key(api))
-        if status == "paused":
+        health = await read_health(self._redis, api)
+        if health["status"] == "paused":
             return
 
-        heartbeat_exists = await self._redis.exists(poller_heartbeat_key(api))
-        if not heartbeat_exists:
+        if health["heartbeat"] is None:
             logger.warning(f"Watchdog: {api!r} heartbeat missing — restarting")
             await push_event(self._redis, "warn", "watchdog restarted — heartbeat missing", api=api)
             await self._supervisor.restart(f"poller:{api}")
             return
 
-        last_success_raw = await self._redis.get(poller_last_success_key(api))
+        if health["status"] == "market_closed":
+            return  # not polling by schedule, so silence is expected
+
+        last_success_raw = health["last_success"]
         if last_success_raw:
             elapsed = time.time() - float(last_success_raw)
             if elapsed > self._silence_threshold:
@@ -0,0 +1,92 @@
+"""Size tiers: separate queues and worker pools by declared attachment size.
+
+A processor opts in with a ``size_tiers`` list in its registry config, e.g.::
+
+    [{"name": "small", "max_bytes": 2000000, "share": 0.5},
+     {"name": "bulk", "share": 0.5}]
+
+Its poller routes each item to ``queue:{api}:{tier}`` by the first tier whose
+``max_bytes`` covers the item's size, and the engine runs one worker pool per
+tier with that tier's share of ``pool_size``. The last tier has no ``max_bytes``
+and also takes items whose size is unknown.
+"""
+
+import re
+from dataclasses import dataclass
+
+_SIZE_PATTERN = re.compile(r"^\s*([\d.]+)\s*([KMG]?B?)\s*$", re.IGNORECASE)
+_SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "K": 1024,
+    "KB": 1024,
+    "M": 1024**2,
+    "MB": 1024**2,
+    "G": 1024**3,
+    "GB": 1024**3,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SizeTier:
+    name: str
+    max_bytes: int | None = None
+    share: float = 1.0
+
+
+def parse_size_tiers(raw: list[dict] | None) -> list[SizeTier]:
+    """Validate a ``size_tiers`` config value; ``None`` or empty means no tiering."""
+    if not raw:
+        return []
+    tiers = [
+        SizeTier(
+            name=str(entry["name"]),
+            max_bytes=None if entry.get("max_bytes") is None else int(entry["max_bytes"]),
+            share=float(entry.get("share", 1.0)),
+        )
+        for entry in raw
+    ]
+    if len({tier.name for tier in tiers}) != len(tiers):
+        raise ValueError("size tier names must be unique")
+    if tiers[-1].max_bytes is not None:
+        raise ValueError("the last size tier must not set max_bytes")
+    bounds = [tier.max_bytes for tier in tiers[:-1]]
+    if None in bounds or bounds != sorted(bounds):
+        raise ValueError("size tiers must be ordered by ascending max_bytes")
+    if any(tier.share <= 0 for tier in tiers):
+        raise ValueError("size tier shares must be positive")
+    return tiers
+
+
+def tier_for(tiers: list[SizeTier], size: int | None) -> SizeTier:
+    if size is not None:
+        for tier in tiers[:-1]:
+            if size <= tier.max_bytes:
+                return tier
+    return tiers[-1]
+
+
+def tier_pool_sizes(tiers: list[SizeTier], pool_size: int) -> dict[str, int]:
+    """Split ``pool_size`` workers across ``tiers`` by share, at least one each."""
+    total = sum(tier.share for tier in tiers)
+    return {tier.name: max(1, round(pool_size * tier.share / total)) for tier in tiers}
+
+
+def parse_file_size(value: object) -> int | None:
+    """Bytes from a size as NSE reports it (``"245 KB"``, ``"1.2 MB"``, a bare
+    number of bytes), or ``None`` if it can't be read.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int | float):
+        return int(value) if value >= 0 else None
+    if not isinstance(value, str):
+        return None
+    match = _SIZE_PATTERN.match(value)
+    if match is None:
+        return None
+    number, unit = match.groups()
+    try:
+        return int(float(number) * _SIZE_UNITS[unit.upper()])
+    except ValueError:
+        return None
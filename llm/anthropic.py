@@ -1,4 +1,5 @@
 import asyncio
+import math
 import os
 from collections.abc import Sequence
 
@@ -10,10 +11,16 @@ from llm.provider import (
     LLMContextWindowError,
     LLMRateLimitError,
     LLMResponseFormatError,
+    TokenEstimator,
+    page_image_sizes,
     parse_analysis_json,
 )
 
 _MAX_INLINE_RETRY_WAIT = 60.0
+_CONTEXT_WINDOW_TOKENS = 200_000
+# Images are downscaled to fit this long edge, then cost about (w * h) / 750 tokens.
+_IMAGE_MAX_EDGE_PX = 1568
+_IMAGE_PIXELS_PER_TOKEN = 750
 
 _ANALYSIS_SYSTEM = (
     "You are a financial analyst for Indian stock market announcements. "
@@ -24,12 +31,27 @@ _ANALYSIS_SYSTEM = (
 )
 
 
+def _image_tokens(width: int, height: int) -> int:
+    scale = min(1.0, _IMAGE_MAX_EDGE_PX / max(width, height))
+    return math.ceil((width * scale) * (height * scale) / _IMAGE_PIXELS_PER_TOKEN)
+
+
 class AnthropicProvider:
-    def __init__(self, api_key: str | None = None, model: str = "claude-opus-4-7"):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "claude-opus-4-7",
+        context_window_tokens: int = _CONTEXT_WINDOW_TOKENS,
+    ):
         self._client = _anthropic.AsyncAnthropic(
             api_key=api_key or os.environ["ANTHROPIC_API_KEY"]
         )
         self._model = model
+        self.context_window_tokens = context_window_tokens
+        self.token_estimator = TokenEstimator(_image_tokens)
+
+    def estimate_tokens(self, *, prompt: str, image_sizes: Sequence[tuple[int, int]]) -> int:
+        return self.token_estimator.estimate(f"{_ANALYSIS_SYSTEM}\n{prompt}", image_sizes)
 
     async def analyze_announcement(
         self,
@@ -45,22 +67,18 @@ class AnthropicProvider:
         provisional_summary: str | None = None,
         response_format_retry: bool = False,
     ) -> AnnouncementAnalysis:
-        user_content: list[dict[str, object]] = [
-            {
-                "type": "text",
-                "text": _build_announcement_prompt(
-                    categories=categories,
-                    symbol=symbol,
-                    company=company,
-                    announcement_text=announcement_text,
-                    page_range_start=page_range_start,
-                    page_range_end=page_range_end,
-                    total_pages=total_pages,
-                    provisional_summary=provisional_summary,
-                    response_format_retry=response_format_retry,
-                ),
-            }
-        ]
+        prompt = _build_announcement_prompt(
+            categories=categories,
+            symbol=symbol,
+            company=company,
+            announcement_text=announcement_text,
+            page_range_start=page_range_start,
+            page_range_end=page_range_end,
+            total_pages=total_pages,
+            provisional_summary=provisional_summary,
+            response_format_retry=response_format_retry,
+        )
+        user_content: list[dict[str, object]] = [{"type": "text", "text": prompt}]
         for image in page_images:
             user_content.append(
                 {
@@ -72,7 +90,9 @@ class AnthropicProvider:
                     },
                 }
             )
-        payload = await self._create_message(user_content)
+        payload = await self._create_message(
+            user_content, calibrate=(prompt, page_image_sizes(page_images))
+        )
         return parse_analysis_json(payload, categories=categories)
 
     async def analyze_text_announcement(
@@ -85,19 +105,23 @@ class AnthropicProvider:
         announcement_text: str,
         response_format_retry: bool = False,
     ) -> AnnouncementAnalysis:
-        payload = await self._create_message(
-            _build_text_prompt(
-                text=text,
-                categories=categories,
-                symbol=symbol,
-                company=company,
-                announcement_text=announcement_text,
-                response_format_retry=response_format_retry,
-            )
+        prompt = _build_text_prompt(
+            text=text,
+            categories=categories,
+            symbol=symbol,
+            company=company,
+            announcement_text=announcement_text,
+            response_format_retry=response_format_retry,
         )
+        payload = await self._create_message(prompt, calibrate=(prompt, []))
         return parse_analysis_json(payload, categories=categories)
 
-    async def _create_message(self, content: str | list[dict[str, object]]) -> str:
+    async def _create_message(
+        self,
+        content: str | list[dict[str, object]],
+        *,
+        calibrate: tuple[str, list[tuple[int, int]]] | None = None,
+    ) -> str:
         try:
             message = await self._client.messages.create(
                 model=self._model,
@@ -137,6 +161,14 @@ class AnthropicProvider:
             else:
                 raise
 
+        if calibrate is not None:
+            prompt, sizes = calibrate
+            self.token_estimator.record(
+                f"{_ANALYSIS_SYSTEM}\n{prompt}",
+                sizes,
+                getattr(getattr(message, "usage", None), "input_tokens", None),
+            )
+
         if not message.content:
             raise LLMResponseFormatError("Anthropic returned no content blocks.")
 
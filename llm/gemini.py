@@ -1,5 +1,6 @@
 import asyncio
 import base64
+import math
 import os
 import re
 from collections.abc import Sequence
@@ -14,10 +15,19 @@ from llm.provider import (
     LLMContextWindowError,
     LLMRateLimitError,
     LLMResponseFormatError,
+    TokenEstimator,
+    page_image_sizes,
     parse_analysis_json,
 )
 
 _MAX_INLINE_RETRY_WAIT = 60.0
+# Context window of the default gemma-4-31b-it model.
+_CONTEXT_WINDOW_TOKENS = 262_144
+# Images up to 384 px on both sides cost 258 tokens; larger ones are cut into
+# 768 px tiles of 258 tokens each.
+_IMAGE_SMALL_PX = 384
+_IMAGE_TILE_PX = 768
+_IMAGE_TOKENS_PER_TILE = 258
 
 _ANALYSIS_INSTRUCTIONS = (
     "You are a financial analyst for Indian stock market announcements. "
@@ -28,10 +38,29 @@ _ANALYSIS_INSTRUCTIONS = (
 )
 
 
+def _image_tokens(width: int, height: int) -> int:
+    if width <= _IMAGE_SMALL_PX and height <= _IMAGE_SMALL_PX:
+        return _IMAGE_TOKENS_PER_TILE
+    tiles = math.ceil(width / _IMAGE_TILE_PX) * math.ceil(height / _IMAGE_TILE_PX)
+    return _IMAGE_TOKENS_PER_TILE * tiles
+
+
 class GeminiProvider:
-    def __init__(self, api_key: str | None = None, model: str = "gemma-4-31b-it"):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "gemma-4-31b-it",
+        context_window_tokens: int = _CONTEXT_WINDOW_TOKENS,
+    ):
         self._client = genai.Client(api_key=api_key or os.environ["GEMINI_API_KEY"])
         self._model = model
+        self.context_window_tokens = context_window_tokens
+        self.token_estimator = TokenEstimator(_image_tokens)
+
+    def estimate_tokens(self, *, prompt: str, image_sizes: Sequence[tuple[int, int]]) -> int:
+        return self.token_estimator.estimate(
+            f"{_ANALYSIS_INSTRUCTIONS}\n\n{prompt}", image_sizes
+        )
 
     async def analyze_announcement(
         self,
@@ -66,6 +95,7 @@ class GeminiProvider:
             parts.append(types.Part.from_bytes(data=image_bytes, mime_type=image.mime_type))
         payload = await self._generate_content(
             contents=[types.Content(role="user", parts=parts)],
+            calibrate=(prompt, page_image_sizes(page_images)),
         )
         return parse_analysis_json(payload, categories=categories)
 
@@ -89,10 +119,16 @@ class GeminiProvider:
         )
         payload = await self._generate_content(
             contents=f"{_ANALYSIS_INSTRUCTIONS}\n\n{prompt}",
+            calibrate=(prompt, []),
         )
         return parse_analysis_json(payload, categories=categories)
 
-    async def _generate_content(self, contents: str | list[types.Content]) -> str:
+    async def _generate_content(
+        self,
+        contents: str | list[types.Content],
+        *,
+        calibrate: tuple[str, list[tuple[int, int]]] | None = None,
+    ) -> str:
         try:
             response = await self._client.aio.models.generate_content(
                 model=self._model,
@@ -132,6 +168,14 @@ class GeminiProvider:
             else:
                 raise
 
+        if calibrate is not None:
+            prompt, sizes = calibrate
+            self.token_estimator.record(
+                f"{_ANALYSIS_INSTRUCTIONS}\n\n{prompt}",
+                sizes,
+                getattr(getattr(response, "usage_metadata", None), "prompt_token_count", None),
+            )
+
         payload = (response.text or "").strip()
         if not payload:
             raise LLMResponseFormatError("Gemini returned empty content.")
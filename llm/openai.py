@@ -1,4 +1,5 @@
 import asyncio
+import math
 import os
 from collections.abc import Sequence
 
@@ -10,10 +11,20 @@ from llm.provider import (
     LLMContextWindowError,
     LLMRateLimitError,
     LLMResponseFormatError,
+    TokenEstimator,
+    page_image_sizes,
     parse_analysis_json,
 )
 
 _MAX_INLINE_RETRY_WAIT = 60.0
+_DEFAULT_CONTEXT_WINDOW_TOKENS = 128_000
+# High-detail images: fit within 2048x2048, shortest side scaled down to 768,
+# then 170 tokens per 512 px tile plus a base 85.
+_IMAGE_FIT_PX = 2048
+_IMAGE_SHORT_SIDE_PX = 768
+_IMAGE_TILE_PX = 512
+_IMAGE_TOKENS_PER_TILE = 170
+_IMAGE_BASE_TOKENS = 85
 
 _ANALYSIS_SYSTEM = (
     "You are a financial analyst for Indian stock market announcements. "
@@ -24,6 +35,13 @@ _ANALYSIS_SYSTEM = (
 )
 
 
+def _image_tokens(width: int, height: int) -> int:
+    scale = min(1.0, _IMAGE_FIT_PX / max(width, height))
+    scale *= min(1.0, _IMAGE_SHORT_SIDE_PX / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / _IMAGE_TILE_PX) * math.ceil(height * scale / _IMAGE_TILE_PX)
+    return _IMAGE_BASE_TOKENS + _IMAGE_TOKENS_PER_TILE * tiles
+
+
 class OpenAIProvider:
     def __init__(self, api_key: str | None = None, model: str | None = None):
         # base_url lets the provider target any OpenAI-compatible server (e.g. a
@@ -35,6 +53,14 @@ class OpenAIProvider:
             key = "not-needed"
         self._client = AsyncOpenAI(api_key=key, base_url=base_url)
         self._model = model or os.environ.get("OPENAI_MODEL", "gpt-4o")
+        # OpenAI-compatible servers run models with all sorts of windows.
+        self.context_window_tokens = int(
+            os.environ.get("OPENAI_CONTEXT_WINDOW", _DEFAULT_CONTEXT_WINDOW_TOKENS)
+        )
+        self.token_estimator = TokenEstimator(_image_tokens)
+
+    def estimate_tokens(self, *, prompt: str, image_sizes: Sequence[tuple[int, int]]) -> int:
+        return self.token_estimator.estimate(f"{_ANALYSIS_SYSTEM}\n{prompt}", image_sizes)
 
     async def analyze_announcement(
         self,
@@ -50,22 +76,18 @@ class OpenAIProvider:
         provisional_summary: str | None = None,
         response_format_retry: bool = False,
     ) -> AnnouncementAnalysis:
-        user_content: list[dict[str, object]] = [
-            {
-                "type": "text",
-                "text": _build_announcement_prompt(
-                    categories=categories,
-                    symbol=symbol,
-                    company=company,
-                    announcement_text=announcement_text,
-                    page_range_start=page_range_start,
-                    page_range_end=page_range_end,
-                    total_pages=total_pages,
-                    provisional_summary=provisional_summary,
-                    response_format_retry=response_format_retry,
-                ),
-            }
-        ]
+        prompt = _build_announcement_prompt(
+            categories=categories,
+            symbol=symbol,
+            company=company,
+            announcement_text=announcement_text,
+            page_range_start=page_range_start,
+            page_range_end=page_range_end,
+            total_pages=total_pages,
+            provisional_summary=provisional_summary,
+            response_format_retry=response_format_retry,
+        )
+        user_content: list[dict[str, object]] = [{"type": "text", "text": prompt}]
         for image in page_images:
             user_content.append(
                 {
@@ -78,7 +100,8 @@ class OpenAIProvider:
             messages=[
                 {"role": "system", "content": _ANALYSIS_SYSTEM},
                 {"role": "user", "content": user_content},
-            ]
+            ],
+            calibrate=(prompt, page_image_sizes(page_images)),
         )
         return parse_analysis_json(payload, categories=categories)
 
@@ -92,25 +115,29 @@ class OpenAIProvider:
         announcement_text: str,
         response_format_retry: bool = False,
     ) -> AnnouncementAnalysis:
+        prompt = _build_text_prompt(
+            text=text,
+            categories=categories,
+            symbol=symbol,
+            company=company,
+            announcement_text=announcement_text,
+            response_format_retry=response_format_retry,
+        )
         payload = await self._create_completion(
             messages=[
                 {"role": "system", "content": _ANALYSIS_SYSTEM},
-                {
-                    "role": "user",
-                    "content": _build_text_prompt(
-                        text=text,
-                        categories=categories,
-                        symbol=symbol,
-                        company=company,
-                        announcement_text=announcement_text,
-                        response_format_retry=response_format_retry,
-                    ),
-                },
-            ]
+                {"role": "user", "content": prompt},
+            ],
+            calibrate=(prompt, []),
         )
         return parse_analysis_json(payload, categories=categories)
 
-    async def _create_completion(self, messages: list[dict[str, object]]) -> str:
+    async def _create_completion(
+        self,
+        messages: list[dict[str, object]],
+        *,
+        calibrate: tuple[str, list[tuple[int, int]]] | None = None,
+    ) -> str:
         try:
             response = await self._client.chat.completions.create(
                 model=self._model,
@@ -150,6 +177,14 @@ class OpenAIProvider:
             else:
                 raise
 
+        if calibrate is not None:
+            prompt, sizes = calibrate
+            self.token_estimator.record(
+                f"{_ANALYSIS_SYSTEM}\n{prompt}",
+                sizes,
+                getattr(getattr(response, "usage", None), "prompt_tokens", None),
+            )
+
         choices = getattr(response, "choices", None)
         if not isinstance(choices, Sequence) or isinstance(choices, (str, bytes)) or not choices:
             raise LLMResponseFormatError("OpenAI returned missing or invalid choices.")
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import json
-from collections.abc import Sequence
+import logging
+import math
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from typing import Any, Protocol, runtime_checkable
 
+logger = logging.getLogger(__name__)
+
 
 class LLMProviderError(Exception):
     """Base exception for provider-level failures."""
@@ -33,6 +37,8 @@ class AnnouncementPageImage:
     page_number: int
     mime_type: str
     data_base64: str
+    width: int = 0  # pixels; 0 when unknown
+    height: int = 0
 
 
 @dataclass(slots=True, frozen=True)
@@ -41,7 +47,8 @@ class AnnouncementAnalysis:
 
     summary: str
     category: str
-    confidence: str
+    # ``None`` for analyses rebuilt from stored announcements, which don't keep it.
+    confidence: str | None
     need_more_pages: bool | None = None
 
 
@@ -105,8 +112,87 @@ def _require_optional_need_more_pages(value: Any) -> bool | None:
     raise LLMResponseFormatError("Field 'need_more_pages' must be a boolean or null.")
 
 
+# Rough text tokenisation ratio shared by every provider; calibration corrects it.
+_CHARS_PER_TOKEN = 4
+# Size assumed for an image whose dimensions are unknown: a portrait page at the
+# processor's default 900 px render size.
+_DEFAULT_IMAGE_SIZE = (636, 900)
+_CALIBRATION_SMOOTHING = 0.2
+
+
+class TokenEstimator:
+    """Estimates a request's input tokens from its prompt length and image sizes.
+
+    ``image_tokens`` is the provider's per-image cost formula. Every call that
+    reports actual usage is fed back through :meth:`record`, which tracks the
+    estimate-vs-actual error and scales later estimates by a smoothed
+    actual/estimate ratio.
+    """
+
+    def __init__(self, image_tokens: Callable[[int, int], int]) -> None:
+        self._image_tokens = image_tokens
+        self._correction = 1.0
+        self.samples = 0
+        self.mean_relative_error = 0.0
+
+    def _raw(self, prompt: str, image_sizes: Sequence[tuple[int, int]]) -> int:
+        tokens = math.ceil(len(prompt) / _CHARS_PER_TOKEN)
+        for width, height in image_sizes:
+            if width <= 0 or height <= 0:
+                width, height = _DEFAULT_IMAGE_SIZE
+            tokens += self._image_tokens(width, height)
+        return tokens
+
+    def estimate(self, prompt: str, image_sizes: Sequence[tuple[int, int]] = ()) -> int:
+        return math.ceil(self._raw(prompt, image_sizes) * self._correction)
+
+    def record(
+        self, prompt: str, image_sizes: Sequence[tuple[int, int]], actual_tokens: object
+    ) -> None:
+        """Calibrate against the input-token count the API reported, if it did."""
+        if not isinstance(actual_tokens, int) or isinstance(actual_tokens, bool):
+            return
+        if actual_tokens <= 0:
+            return
+        raw = self._raw(prompt, image_sizes)
+        error = (math.ceil(raw * self._correction) - actual_tokens) / actual_tokens
+        if self.samples == 0:
+            self._correction = actual_tokens / raw
+            self.mean_relative_error = abs(error)
+        else:
+            self._correction += _CALIBRATION_SMOOTHING * (actual_tokens / raw - self._correction)
+            self.mean_relative_error += _CALIBRATION_SMOOTHING * (
+                abs(error) - self.mean_relative_error
+            )
+        self.samples += 1
+        logger.debug(
+            "Token estimate off by %+.1f%% (%d actual); correction now %.3f",
+            error * 100,
+            actual_tokens,
+            self._correction,
+        )
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "samples": self.samples,
+            "correction": self._correction,
+            "mean_relative_error": self.mean_relative_error,
+        }
+
+
+def page_image_sizes(page_images: Sequence[AnnouncementPageImage]) -> list[tuple[int, int]]:
+    return [(image.width, image.height) for image in page_images]
+
+
 @runtime_checkable
 class LLMProvider(Protocol):
+    context_window_tokens: int
+    token_estimator: TokenEstimator
+
+    def estimate_tokens(self, *, prompt: str, image_sizes: Sequence[tuple[int, int]]) -> int:
+        """Estimated input tokens for ``prompt`` plus images of the given (w, h) pixel sizes."""
+        ...
+
     async def analyze_announcement(
         self,
         *,
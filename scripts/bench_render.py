@@ -0,0 +1,115 @@
+"""Benchmark split vs single-worker page rendering.
+
+    uv run python -m scripts.bench_render [--workers 3] [PDF ...]
+
+Renders every page of each document once in a single worker and once split
+across ``--workers`` render workers, with the processor's production render
+settings, and prints the speedup by page count. PDFs
+default to those in ``tests/engine/fixtures``; when there are none, synthetic
+text-and-table documents of 10, 40, 100 and 200 pages are generated instead.
+"""
+
+import argparse
+import asyncio
+import time
+from functools import partial
+from pathlib import Path
+
+import fitz
+
+from engine.processors.corp_ann import (
+    _MAX_RENDER_SHARDS,
+    _MIN_PAGES_PER_RENDER_SHARD,
+    _RENDER_JPEG_QUALITY,
+    _RENDER_MAX_DIMENSION_PX,
+)
+from engine.processors.pdf import render_pdf_pages
+from engine.processors.render_pool import RenderPool, split_page_range
+
+_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "engine" / "fixtures"
+_SYNTHETIC_PAGE_COUNTS = (10, 40, 100, 200)
+
+
+def _synthetic_pdf(page_count: int) -> bytes:
+    doc = fitz.open()
+    for index in range(page_count):
+        page = doc.new_page()
+        page.insert_text((50, 60), f"Statement of results — page {index + 1}", fontsize=14)
+        for row in range(40):
+            y = 90 + row * 17
+            page.draw_line((50, y), (545, y), color=(0.6, 0.6, 0.6))
+            page.insert_text((55, y + 13), f"Line item {row:02d}   {row * 1234.5:>14,.2f}")
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def _documents(paths: list[Path]) -> list[tuple[str, bytes]]:
+    paths = paths or sorted(_FIXTURES.glob("*.pdf"))
+    if paths:
+        return [(path.name, path.read_bytes()) for path in paths]
+    return [(f"synthetic-{count}p", _synthetic_pdf(count)) for count in _SYNTHETIC_PAGE_COUNTS]
+
+
+async def _render(pool: RenderPool, pdf_bytes: bytes, page_count: int, shards: int) -> float:
+    loop = asyncio.get_running_loop()
+    # A fresh key per run, so every run parses the document like a first batch.
+    key = f"bench-{shards}-{id(pdf_bytes)}"
+    executors = pool.executors_for(key, shards)
+    ranges = split_page_range(
+        1, page_count, parts=len(executors), min_pages=_MIN_PAGES_PER_RENDER_SHARD
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor,
+                partial(
+                    render_pdf_pages,
+                    pdf_bytes,
+                    start_page=first,
+                    end_page=last,
+                    max_dimension_px=_RENDER_MAX_DIMENSION_PX,
+                    jpeg_quality=_RENDER_JPEG_QUALITY,
+                    cache_key=key,
+                    adaptive=True,
+                ),
+            )
+            for executor, (first, last) in zip(executors, ranges, strict=False)
+        )
+    )
+    return time.perf_counter() - start
+
+
+async def _main(workers: int, paths: list[Path]) -> None:
+    pool = RenderPool(workers=workers)
+    try:
+        # Warm every worker so process start-up isn't measured.
+        await _render(
+            pool, _synthetic_pdf(workers * _MIN_PAGES_PER_RENDER_SHARD), workers * 3, workers
+        )
+        print(
+            f"{'document':<24} {'pages':>5} {'1 worker':>10} {f'{workers} workers':>10} {'speedup':>8}"
+        )
+        for name, pdf_bytes in _documents(paths):
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = doc.page_count
+            single = await _render(pool, pdf_bytes, page_count, 1)
+            split = await _render(pool, pdf_bytes, page_count, workers)
+            print(
+                f"{name:<24} {page_count:>5} {single:>9.2f}s {split:>9.2f}s {single / split:>7.2f}x"
+            )
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=_MAX_RENDER_SHARDS)
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    args = parser.parse_args()
+    asyncio.run(_main(args.workers, args.pdfs))
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ async def _next_published_message(pubsub):
     return None
 
 
-async def _make_db_factory(*, poller=True, processor=True, link=False):
+async def _make_db_factory(*, poller=True, processor=True, link=False, processor_config="{}"):
     engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -44,6 +44,7 @@ async def _make_db_factory(*, poller=True, processor=True, link=False):
                 module="engine.processors.corp_ann",
                 api_name="corp_ann",
                 input_schema="{}",
+                config=processor_config,
                 enabled=True,
             )
             db.add(processor_row)
@@ -110,6 +111,93 @@ async def test_get_single_processor_health():
     }
 
 
+async def test_processor_health_reports_size_tier_queue_depths():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    await redis.set("processor:corp_ann:status", "running")
+    await redis.rpush("queue:corp_ann:small", json.dumps({"seq_id": "1"}))
+    await redis.rpush("queue:corp_ann:bulk", json.dumps({"seq_id": "2"}))
+    await redis.rpush("queue:corp_ann:bulk", json.dumps({"seq_id": "3"}))
+    tiers = [{"name": "small", "max_bytes": 2000000}, {"name": "bulk"}]
+    db_factory = await _make_db_factory(
+        processor=True, poller=False, processor_config=json.dumps({"size_tiers": tiers})
+    )
+
+    from api.app import create_app
+
+    app = create_app(redis_override=redis, db_factory_override=db_factory)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/admin/processors/corp_ann")
+
+    body = response.json()
+    assert body["queue_size"] == 3
+    assert body["tier_queue_sizes"] == {"small": 1, "bulk": 2}
+
+
+async def test_processor_health_reports_priority_queue_depths():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    await redis.set("processor:corp_ann:status", "running")
+    await redis.zadd("pqueue:corp_ann", {json.dumps({"seq_id": "1"}): -1_700_000_000})
+    await redis.zadd("pqueue:corp_ann", {json.dumps({"seq_id": "2"}): 8_300_000_000})
+    await redis.zadd("pqueue:corp_ann", {json.dumps({"seq_id": "3"}): 8_300_000_001})
+    db_factory = await _make_db_factory(
+        processor=True, poller=False, processor_config=json.dumps({"queue_mode": "priority"})
+    )
+
+    from api.app import create_app
+
+    app = create_app(redis_override=redis, db_factory_override=db_factory)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/admin/processors/corp_ann")
+
+    body = response.json()
+    assert body["queue_size"] == 3
+    assert body["priority_queue_sizes"] == {"watched": 1, "unwatched": 2}
+
+
+async def test_processor_health_reports_items_being_processed_in_reliable_mode():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    await redis.set("processor:corp_ann:status", "running")
+    await redis.rpush("queue:corp_ann", json.dumps({"seq_id": "2"}))
+    await redis.zadd("queue:corp_ann:leases", {"w1": 4_000_000_000, "w2": 4_000_000_000})
+    await redis.rpush("queue:corp_ann:processing:w1", json.dumps({"seq_id": "1"}))
+    db_factory = await _make_db_factory(
+        processor=True, poller=False, processor_config=json.dumps({"queue_mode": "reliable"})
+    )
+
+    from api.app import create_app
+
+    app = create_app(redis_override=redis, db_factory_override=db_factory)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/admin/processors/corp_ann")
+
+    body = response.json()
+    assert body["queue_size"] == 1
+    assert body["processing"] == 1
+
+
+async def test_processor_health_reports_stream_consumers():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    await redis.set("processor:corp_ann:status", "running")
+    for seq_id in ("1", "2", "3"):
+        await redis.xadd("stream:corp_ann", {"item": json.dumps({"seq_id": seq_id})})
+    await redis.xgroup_create("stream:corp_ann", "processors", id="0")
+    await redis.xreadgroup("processors", "w1", {"stream:corp_ann": ">"}, count=1)
+    db_factory = await _make_db_factory(
+        processor=True, poller=False, processor_config=json.dumps({"queue_mode": "stream"})
+    )
+
+    from api.app import create_app
+
+    app = create_app(redis_override=redis, db_factory_override=db_factory)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/admin/processors/corp_ann")
+
+    body = response.json()
+    assert body["queue_size"] == 2
+    assert body["processing"] == 1
+    assert body["consumers"]["w1"]["pending"] == 1
+
+
 async def test_processor_payload_includes_module():
     redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
     await redis.set("processor:corp_ann:status", "running")
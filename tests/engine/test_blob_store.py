@@ -0,0 +1,122 @@
+import asyncio
+import os
+
+import pytest
+
+from engine.processors.blob_store import BlobStore
+from engine.processors.download import AttachmentTooLargeError, SpooledAttachment
+
+URL = "https://nsearchives.nseindia.com/a.pdf"
+
+
+def _downloader(content: bytes, calls: list[str], *, gate: asyncio.Event | None = None):
+    async def _download() -> SpooledAttachment:
+        calls.append("download")
+        if gate is not None:
+            await gate.wait()
+        attachment = SpooledAttachment(max_memory=4)
+        attachment.write(content)
+        return attachment
+
+    return _download
+
+
+async def test_second_fetch_of_a_url_is_served_from_disk(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=1024)
+    calls: list[str] = []
+
+    with (
+        await store.fetch(URL, _downloader(b"%PDF-1.7 one", calls)) as first,
+        open(first.source(), "rb") as f,
+    ):
+        assert f.read() == b"%PDF-1.7 one"
+    with await store.fetch(URL, _downloader(b"%PDF-1.7 one", calls)) as second:
+        assert second.digest == first.digest
+        assert second.size == 12
+
+    assert calls == ["download"]
+    stats = store.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes_saved"] == 12
+
+
+async def test_concurrent_fetches_share_one_download(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=1024)
+    calls: list[str] = []
+    gate = asyncio.Event()
+    download = _downloader(b"%PDF shared", calls, gate=gate)
+
+    fetches = [asyncio.create_task(store.fetch(URL, download)) for _ in range(3)]
+    await asyncio.sleep(0)
+    gate.set()
+    attachments = await asyncio.gather(*fetches)
+
+    assert calls == ["download"]
+    assert {attachment.digest for attachment in attachments} == {attachments[0].digest}
+    assert store.stats()["shared"] == 2
+    for attachment in attachments:
+        attachment.close()
+
+
+async def test_failed_download_reaches_every_waiter_and_stores_nothing(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=1024)
+    gate = asyncio.Event()
+
+    async def _too_large() -> SpooledAttachment:
+        await gate.wait()
+        raise AttachmentTooLargeError(2048, 1024)
+
+    fetches = [asyncio.create_task(store.fetch(URL, _too_large)) for _ in range(2)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*fetches, return_exceptions=True)
+
+    assert all(isinstance(result, AttachmentTooLargeError) for result in results)
+    assert store.stats()["blobs"] == 0
+    assert os.listdir(tmp_path) == []
+
+
+async def test_least_recently_used_unpinned_blob_is_evicted(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=20)
+    calls: list[str] = []
+
+    (await store.fetch("u1", _downloader(b"a" * 8, calls))).close()
+    pinned = await store.fetch("u2", _downloader(b"b" * 8, calls))
+    (await store.fetch("u1", _downloader(b"a" * 8, calls))).close()  # u1 now most recent
+    (await store.fetch("u3", _downloader(b"c" * 8, calls))).close()
+
+    # u2 is least recently used but open, so u1 goes instead.
+    assert os.path.exists(pinned.source())
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert stats["evicted_bytes"] == 8
+    assert stats["bytes"] == 16
+
+    pinned.close()
+    (await store.fetch("u1", _downloader(b"a" * 8, calls))).close()
+    assert calls == ["download"] * 4
+    assert not os.path.exists(pinned.source())
+
+
+async def test_blobs_on_disk_survive_a_restart(tmp_path):
+    calls: list[str] = []
+    first = BlobStore(str(tmp_path), max_bytes=1024)
+    (await first.fetch(URL, _downloader(b"%PDF kept", calls))).close()
+    (tmp_path / "stale.pdf.partial").write_bytes(b"half")
+
+    second = BlobStore(str(tmp_path), max_bytes=1024)
+    with await second.fetch(URL, _downloader(b"%PDF kept", calls)) as attachment:
+        assert os.path.exists(attachment.source())
+
+    assert second.stats()["blobs"] == 1
+    assert not (tmp_path / "stale.pdf.partial").exists()
+
+
+def test_spooled_attachment_save_refuses_once_shared(tmp_path):
+    with SpooledAttachment() as attachment:
+        attachment.write(b"%PDF")
+        attachment.source()
+        with pytest.raises(RuntimeError):
+            attachment.save(str(tmp_path / "out.pdf"))
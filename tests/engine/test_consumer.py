@@ -5,6 +5,8 @@ from contextlib import suppress
 import pytest
 
 from engine.consumer import ConsumerPool
+from engine.enqueue import enqueue_new
+from engine.queues import processing_depth
 from llm.provider import LLMRateLimitError
 
 
@@ -171,3 +173,196 @@ async def test_processor_exception_does_not_kill_worker(fake_redis):
         await task
 
     assert call_count == 2
+
+
+async def test_priority_mode_serves_watched_items_first(fake_redis):
+    processed = []
+
+    async def processor(item):
+        processed.append(item["seq_id"])
+
+    await fake_redis.sadd("watch:INFY", "42")
+    await enqueue_new(
+        fake_redis,
+        "test",
+        [("1", {"seq_id": "1", "symbol": "TCS"}), ("2", {"seq_id": "2", "symbol": "INFY"})],
+        queue_for=lambda item: "pqueue:test",
+        watch_key_for=lambda item: f"watch:{item['symbol']}",
+    )
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="pqueue:test",
+        processor_fn=processor,
+        size=1,
+        queue_mode="priority",
+    )
+    task = asyncio.create_task(pool.run())
+    await asyncio.sleep(0.15)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    assert processed == ["2", "1"]
+
+
+async def test_reliable_mode_acks_processed_items(fake_redis):
+    processed = []
+
+    async def processor(item):
+        processed.append(item["id"])
+
+    await fake_redis.rpush("queue:test", json.dumps({"id": 1}), json.dumps({"id": 2}))
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="queue:test",
+        processor_fn=processor,
+        size=1,
+        queue_mode="reliable",
+    )
+    task = asyncio.create_task(pool.run())
+    await asyncio.sleep(0.15)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    assert processed == [1, 2]
+    assert await processing_depth(fake_redis, "queue:test") == 0
+    assert await fake_redis.llen("queue:test") == 0
+
+
+async def test_reliable_mode_idle_worker_stops_promptly_when_cancelled(fake_redis):
+    async def processor(_):
+        pass
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="queue:test",
+        processor_fn=processor,
+        size=1,
+        queue_mode="reliable",
+    )
+    task = asyncio.create_task(pool.run())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await asyncio.wait_for(task, timeout=1)
+
+    assert task.cancelled()
+    assert await processing_depth(fake_redis, "queue:test") == 0
+
+
+async def test_reliable_mode_hands_back_the_item_of_a_cancelled_worker(fake_redis):
+    started = asyncio.Event()
+
+    async def slow_processor(_):
+        started.set()
+        await asyncio.sleep(10)
+
+    await fake_redis.rpush("queue:test", json.dumps({"id": 1}), json.dumps({"id": 2}))
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="queue:test",
+        processor_fn=slow_processor,
+        size=1,
+        queue_mode="reliable",
+    )
+    task = asyncio.create_task(pool.run())
+    await started.wait()
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    remaining = [json.loads(raw)["id"] for raw in await fake_redis.lrange("queue:test", 0, -1)]
+    assert remaining == [1, 2]
+    assert await processing_depth(fake_redis, "queue:test") == 0
+
+
+async def test_stream_mode_shares_items_across_pools(fake_redis):
+    processed = []
+
+    async def processor(item):
+        processed.append(item["seq_id"])
+
+    await enqueue_new(
+        fake_redis,
+        "test",
+        [(str(i), {"seq_id": str(i)}) for i in range(4)],
+        stream=True,
+    )
+
+    pools = [
+        ConsumerPool(
+            redis=fake_redis,
+            queue_key="stream:test",
+            processor_fn=processor,
+            size=1,
+            queue_mode="stream",
+        )
+        for _ in range(2)
+    ]
+    tasks = [asyncio.create_task(pool.run()) for pool in pools]
+    await asyncio.sleep(0.2)
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+
+    assert sorted(processed) == ["0", "1", "2", "3"]
+    assert await fake_redis.xlen("stream:test") == 0
+
+
+async def test_batch_fn_receives_up_to_batch_size_items(fake_redis):
+    batches = []
+
+    async def single(_):
+        raise AssertionError("batch pools don't call the single-item function")
+
+    async def batch_fn(items):
+        batches.append([item["id"] for item in items])
+
+    for index in range(5):
+        await fake_redis.rpush("queue:test", json.dumps({"id": index}))
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="queue:test",
+        processor_fn=single,
+        size=1,
+        batch_fn=batch_fn,
+        batch_size=2,
+    )
+    task = asyncio.create_task(pool.run())
+    await asyncio.sleep(0.15)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+async def test_rate_limited_batch_is_requeued_whole(fake_redis):
+    async def batch_fn(_):
+        raise LLMRateLimitError("too many requests", retry_after=5)
+
+    await fake_redis.rpush("queue:test", json.dumps({"id": 1}), json.dumps({"id": 2}))
+
+    pool = ConsumerPool(
+        redis=fake_redis,
+        queue_key="queue:test",
+        processor_fn=batch_fn,
+        size=1,
+        batch_fn=batch_fn,
+        batch_size=2,
+    )
+    task = asyncio.create_task(pool._consume())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+    remaining = [json.loads(raw)["id"] for raw in await fake_redis.lrange("queue:test", 0, -1)]
+    assert remaining == [1, 2]
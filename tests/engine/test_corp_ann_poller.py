@@ -7,6 +7,7 @@ import httpx
 import pytest
 import respx
 
+from database.redis import poller_error_count_key
 from engine.pollers.corp_ann import CorporateAnnouncementsPoller, OutputSchema
 from engine.session import NseSession
 
@@ -14,6 +15,27 @@ NSE_CORP_ANN_URL = "https://www.nseindia.com/api/corporate-announcements"
 NSE_HOME = "https://www.nseindia.com"
 
 
+class _StopTest(BaseException):
+    """Sentinel exception used to terminate the poller loop in tests."""
+
+
+class _TwoCyclePoller(CorporateAnnouncementsPoller):
+    """Polls around the clock and stops the run loop after two fetches."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = 0
+
+    def schedule(self):
+        return None
+
+    async def fetch(self):
+        if self.fetches == 2:
+            raise _StopTest
+        self.fetches += 1
+        return await super().fetch()
+
+
 @pytest.mark.asyncio
 async def test_fetch_returns_list(fake_redis):
     with respx.mock:
@@ -59,6 +81,46 @@ async def test_fetch_empty_response_returns_empty_list(fake_redis):
     assert result == []
 
 
+@pytest.mark.asyncio
+async def test_fetch_returns_none_when_body_unchanged(fake_redis):
+    with respx.mock:
+        respx.get(url__regex=r".*corporate-announcements.*").mock(
+            return_value=httpx.Response(200, json=[{"seq_id": "1", "symbol": "INFY"}])
+        )
+        respx.get(NSE_HOME).mock(return_value=httpx.Response(200, text="OK"))
+        async with NseSession() as session:
+            poller = CorporateAnnouncementsPoller(session=session, redis=fake_redis)
+            first = await poller.fetch()
+            second = await poller.fetch()
+    assert first == [{"seq_id": "1", "symbol": "INFY"}]
+    assert second is None
+    assert (poller.changed_cycles, poller.unchanged_cycles) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_response_counts_as_unchanged_cycle_not_failure(fake_redis):
+    requests = []
+
+    def respond(request, route):  # noqa: ARG001
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(200, json=[], headers={"etag": '"v1"'})
+        return httpx.Response(304)
+
+    with respx.mock:
+        respx.get(url__regex=r".*corporate-announcements.*").mock(side_effect=respond)
+        respx.get(NSE_HOME).mock(return_value=httpx.Response(200, text="OK"))
+        async with NseSession() as session:
+            poller = _TwoCyclePoller(session=session, redis=fake_redis, base_interval=0.01)
+            with pytest.raises(_StopTest):
+                await poller.run()
+
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert (poller.changed_cycles, poller.unchanged_cycles) == (1, 1)
+    assert poller._consecutive_failures == 0
+    assert await fake_redis.get(poller_error_count_key("corp_ann")) == "0"
+
+
 def test_item_id_returns_seq_id_when_present(fake_redis):
     poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
     assert poller.item_id({"seq_id": "106644730", "symbol": "INFY"}) == "106644730"
@@ -78,6 +140,22 @@ def test_item_id_falls_back_to_hash_when_seq_id_is_empty_string(fake_redis):
     assert poller.item_id(item) == expected_hash
 
 
+def test_queue_for_routes_by_declared_attachment_size(fake_redis):
+    poller = CorporateAnnouncementsPoller(
+        session=AsyncMock(spec=NseSession),
+        redis=fake_redis,
+        size_tiers=[{"name": "small", "max_bytes": 2_000_000}, {"name": "bulk"}],
+    )
+    assert poller.queue_for({"seq_id": "1", "attFileSize": "245 KB"}) == "queue:corp_ann:small"
+    assert poller.queue_for({"seq_id": "2", "fileSize": "14.2 MB"}) == "queue:corp_ann:bulk"
+    assert poller.queue_for({"seq_id": "3"}) == "queue:corp_ann:bulk"
+
+
+def test_queue_for_uses_single_queue_without_size_tiers(fake_redis):
+    poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
+    assert poller.queue_for({"seq_id": "1", "attFileSize": "245 KB"}) == "queue:corp_ann"
+
+
 def test_output_schema_declares_nse_fields():
     props = OutputSchema.model_json_schema()["properties"]
     for field in ("seq_id", "symbol", "sm_name", "attchmntFile", "attchmntText", "an_dt"):
@@ -87,3 +165,58 @@ def test_output_schema_declares_nse_fields():
 
 def test_poller_default_config_has_base_interval():
     assert CorporateAnnouncementsPoller.default_config() == {"base_interval": 5.0}
+
+
+def _ann(seq_id: str, sort_date: str) -> dict:
+    return {"seq_id": seq_id, "symbol": "INFY", "sort_date": sort_date}
+
+
+async def test_select_new_rebuilds_seen_set_from_redis(fake_redis):
+    await fake_redis.set("inflight:corp_ann:1", "1")
+    await fake_redis.set("dedup:corp_ann:2", "1")
+    poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
+    data = [
+        _ann("3", "2026-05-27 10:00:03"),
+        _ann("2", "2026-05-27 10:00:02"),
+        _ann("1", "2026-05-27 10:00:01"),
+    ]
+
+    fresh = await poller.select_new(data)
+
+    assert [item["seq_id"] for item in fresh] == ["3"]
+    assert poller.watermark == ("2026-05-27 10:00:02", 2)
+
+
+async def test_steady_state_cycle_skips_seen_items_without_redis(fake_redis):
+    poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
+    data = [_ann("2", "2026-05-27 10:00:02"), _ann("1", "2026-05-27 10:00:01")]
+    poller.mark_seen(await poller.select_new(data))
+
+    poller.redis = AsyncMock()
+    fresh = await poller.select_new([_ann("3", "2026-05-27 10:00:03"), *data])
+
+    assert [item["seq_id"] for item in fresh] == ["3"]
+    assert poller.redis.mock_calls == []
+
+
+async def test_resync_reoffers_items_whose_guards_were_released(fake_redis, monkeypatch):
+    import engine.pollers.corp_ann as corp_ann_module
+
+    poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
+    data = [_ann("1", "2026-05-27 10:00:01")]
+    poller.mark_seen(await poller.select_new(data))
+    assert await poller.select_new(data) == []
+
+    monkeypatch.setattr(corp_ann_module, "_SEEN_RESYNC_INTERVAL", 0.0)
+    assert await poller.select_new(data) == data
+
+
+async def test_seen_set_resets_on_new_ist_day(fake_redis):
+    poller = CorporateAnnouncementsPoller(session=AsyncMock(spec=NseSession), redis=fake_redis)
+    poller.mark_seen(await poller.select_new([_ann("1", "2026-05-27 10:00:01")]))
+    poller._seen_day = date(2000, 1, 1)
+
+    await poller.select_new([_ann("2", "2026-05-28 09:00:00")])
+
+    assert "1" not in poller._seen
+    assert poller.watermark is None
@@ -0,0 +1,150 @@
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import httpx
+import pytest
+import respx
+
+from engine.processors import download
+from engine.processors.download import (
+    AttachmentTooLargeError,
+    SpooledAttachment,
+    UnexpectedContentTypeError,
+    download_attachment,
+)
+from engine.processors.pdf import SharedPdf
+from engine.session import NSE_HOME, NseSession
+
+PDF_URL = "https://nsearchives.nseindia.com/test.pdf"
+
+
+def _read_shared(source: SharedPdf) -> bytes:
+    segment = SharedMemory(name=source.name, track=False)
+    try:
+        return bytes(segment.buf[: source.size])
+    finally:
+        segment.close()
+
+
+def test_spooled_attachment_shares_in_memory_content():
+    with SpooledAttachment(max_memory=8) as attachment:
+        attachment.write(b"%PDF")
+        source = attachment.source()
+        assert isinstance(source, SharedPdf)
+        assert _read_shared(source) == b"%PDF"
+        assert attachment.size == 4
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=source.name, track=False)
+
+
+def test_identical_attachments_share_one_segment_until_both_close():
+    first, second = SpooledAttachment(), SpooledAttachment()
+    first.write(b"%PDF-1.7")
+    second.write(b"%PDF-1.7")
+    source = first.source()
+    assert second.source() == source
+    first.close()
+    assert _read_shared(source) == b"%PDF-1.7"
+    second.close()
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=source.name, track=False)
+
+
+def test_identical_attachment_in_another_process_gets_its_own_segment(monkeypatch):
+    first = SpooledAttachment()
+    first.write(b"%PDF-1.7")
+    source = first.source()
+    # As seen from a second engine process, which has no record of the first segment.
+    with monkeypatch.context() as patch:
+        patch.setattr(download, "_shared_segments", {})
+        second = SpooledAttachment()
+        second.write(b"%PDF-1.7")
+        assert second.source().name != source.name
+        second.close()
+    first.close()
+
+
+def test_spooled_attachment_rolls_over_to_temp_file():
+    attachment = SpooledAttachment(max_memory=4)
+    attachment.write(b"%PDF")
+    attachment.write(b"-1.7")
+    path = attachment.source()
+    assert isinstance(path, str)
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-1.7"
+    attachment.close()
+    assert not os.path.exists(path)
+
+
+def test_spooled_attachment_digest_is_independent_of_chunking():
+    whole, chunked = SpooledAttachment(), SpooledAttachment()
+    whole.write(b"abcdef")
+    chunked.write(b"abc")
+    chunked.write(b"def")
+    assert whole.digest == chunked.digest
+
+
+@respx.mock
+async def test_download_streams_pdf():
+    respx.get(PDF_URL).mock(
+        return_value=httpx.Response(
+            200, content=b"%PDF-1.7", headers={"content-type": "application/pdf"}
+        )
+    )
+    respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        attachment = await download_attachment(
+            session, PDF_URL, max_bytes=1024, content_type="application/pdf"
+        )
+    with attachment:
+        assert _read_shared(attachment.source()) == b"%PDF-1.7"
+
+
+@respx.mock
+async def test_download_rejects_wrong_content_type():
+    respx.get(PDF_URL).mock(
+        return_value=httpx.Response(200, content=b"<html>", headers={"content-type": "text/html"})
+    )
+    respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        with pytest.raises(UnexpectedContentTypeError):
+            await download_attachment(
+                session, PDF_URL, max_bytes=1024, content_type="application/pdf"
+            )
+
+
+@respx.mock
+async def test_download_aborts_when_body_exceeds_cap():
+    async def body():
+        for _ in range(10):
+            yield b"x" * 100
+
+    respx.get(PDF_URL).mock(
+        return_value=httpx.Response(
+            200, content=body(), headers={"content-type": "application/pdf"}
+        )
+    )
+    respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        with pytest.raises(AttachmentTooLargeError):
+            await download_attachment(
+                session, PDF_URL, max_bytes=250, content_type="application/pdf"
+            )
+
+
+@respx.mock
+async def test_download_aborts_on_declared_length_before_reading():
+    respx.get(PDF_URL).mock(
+        return_value=httpx.Response(
+            200,
+            content=b"x" * 500,
+            headers={"content-type": "application/pdf", "content-length": "500"},
+        )
+    )
+    respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        with pytest.raises(AttachmentTooLargeError) as excinfo:
+            await download_attachment(
+                session, PDF_URL, max_bytes=100, content_type="application/pdf"
+            )
+    assert excinfo.value.size == 500
@@ -0,0 +1,72 @@
+import json
+
+from engine.enqueue import enqueue_new
+
+
+async def test_enqueue_new_pushes_all_fresh_items_in_order(fake_redis):
+    items = [("1", {"seq_id": "1"}), ("2", {"seq_id": "2"}), ("3", {"seq_id": "3"})]
+
+    added = await enqueue_new(fake_redis, "test", items)
+
+    assert added == 3
+    raw = await fake_redis.lrange("queue:test", 0, -1)
+    assert [json.loads(r)["seq_id"] for r in raw] == ["1", "2", "3"]
+
+
+async def test_enqueue_new_skips_inflight_items(fake_redis):
+    await fake_redis.set("inflight:test:2", "1", ex=3600)
+
+    added = await enqueue_new(fake_redis, "test", [("1", {"seq_id": "1"}), ("2", {"seq_id": "2"})])
+
+    assert added == 1
+    raw = await fake_redis.lrange("queue:test", 0, -1)
+    assert [json.loads(r)["seq_id"] for r in raw] == ["1"]
+
+
+async def test_enqueue_new_sets_inflight_ttl(fake_redis):
+    await enqueue_new(fake_redis, "test", [("abc", {"seq_id": "abc"})], ttl=120)
+
+    ttl = await fake_redis.ttl("inflight:test:abc")
+    assert 0 < ttl <= 120
+
+
+async def test_enqueue_new_deduplicates_within_one_batch(fake_redis):
+    added = await enqueue_new(fake_redis, "test", [("1", {"seq_id": "1"}), ("1", {"seq_id": "1"})])
+
+    assert added == 1
+    assert await fake_redis.llen("queue:test") == 1
+
+
+async def test_enqueue_new_empty_batch_is_noop(fake_redis):
+    assert await enqueue_new(fake_redis, "test", []) == 0
+    assert await fake_redis.llen("queue:test") == 0
+
+
+async def test_enqueue_new_routes_each_item_to_its_queue(fake_redis):
+    items = [("1", {"seq_id": "1", "size": 10}), ("2", {"seq_id": "2", "size": 10_000})]
+
+    added = await enqueue_new(
+        fake_redis,
+        "test",
+        items,
+        queue_for=lambda item: "queue:test:small" if item["size"] < 100 else "queue:test:bulk",
+    )
+
+    assert added == 2
+    small = await fake_redis.lrange("queue:test:small", 0, -1)
+    bulk = await fake_redis.lrange("queue:test:bulk", 0, -1)
+    assert [json.loads(r)["seq_id"] for r in small] == ["1"]
+    assert [json.loads(r)["seq_id"] for r in bulk] == ["2"]
+    assert await fake_redis.exists("queue:test") == 0
+
+
+async def test_enqueue_new_adds_fresh_items_to_a_stream(fake_redis):
+    await fake_redis.set("inflight:test:2", "1", ex=3600)
+
+    added = await enqueue_new(
+        fake_redis, "test", [("1", {"seq_id": "1"}), ("2", {"seq_id": "2"})], stream=True
+    )
+
+    assert added == 1
+    entries = await fake_redis.xrange("stream:test")
+    assert [json.loads(fields["item"])["seq_id"] for _, fields in entries] == ["1"]
@@ -1,9 +1,11 @@
 from engine.health import (
     read_health,
+    read_health_many,
     write_error_count,
     write_heartbeat,
     write_interval,
     write_last_success,
+    write_poller_snapshot,
     write_processor_status,
     write_status,
 )
@@ -58,3 +60,49 @@ async def test_read_health_missing_keys_returns_defaults(fake_redis):
     health = await read_health(fake_redis, "nonexistent")
     assert health["status"] == "unknown"
     assert health["error_count"] == 0
+
+
+async def test_write_poller_snapshot_writes_all_fields(fake_redis):
+    await write_poller_snapshot(
+        fake_redis,
+        "corp_ann",
+        interval=5.0,
+        status="running",
+        error_count=0,
+        last_success=True,
+        stats={"changed_cycles": 3, "unchanged_cycles": 7},
+    )
+    health = await read_health(fake_redis, "corp_ann")
+    assert health["heartbeat"] is not None
+    assert health["last_success"] is not None
+    assert health["status"] == "running"
+    assert health["error_count"] == 0
+    assert health["interval"] == 5.0
+    assert health["stats"] == {"changed_cycles": 3, "unchanged_cycles": 7}
+    ttl = await fake_redis.ttl("poller:corp_ann:heartbeat")
+    assert 0 < ttl <= 15
+
+
+async def test_write_poller_snapshot_leaves_optional_fields_alone(fake_redis):
+    await write_last_success(fake_redis, "corp_ann")
+    await write_error_count(fake_redis, "corp_ann", 4)
+
+    await write_poller_snapshot(fake_redis, "corp_ann", interval=10.0, status="circuit_open")
+
+    health = await read_health(fake_redis, "corp_ann")
+    assert health["status"] == "circuit_open"
+    assert health["error_count"] == 4
+    assert health["last_success"] is not None
+
+
+async def test_read_health_many_preserves_order(fake_redis):
+    await write_status(fake_redis, "a", "running")
+    await write_status(fake_redis, "b", "paused")
+
+    healths = await read_health_many(fake_redis, ["b", "a", "missing"])
+
+    assert [(h["api"], h["status"]) for h in healths] == [
+        ("b", "paused"),
+        ("a", "running"),
+        ("missing", "unknown"),
+    ]
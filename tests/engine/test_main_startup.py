@@ -1,11 +1,17 @@
+import json
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock
 
 import fakeredis.aioredis
+import pytest
 
+import engine.main as main_module
 from database.models import PollerConfig, ProcessorConfig, ProcessorPollerLink
 from engine.events import read_events
-from engine.main import _run_processor, build_components
+from engine.main import _run_processor, _run_processor_batch, build_components
+from engine.registry import LoadedProcessor
 from engine.supervisor import Supervisor
+from llm.provider import TokenEstimator
 
 
 class _StubProcessor:
@@ -15,6 +21,9 @@ class _StubProcessor:
     async def process(self, item: dict) -> str | None:
         return self._summary
 
+    async def process_batch(self, items: list[dict]) -> list[str | None]:
+        return [self._summary if item["seq_id"] != "skip" else None for item in items]
+
 
 async def test_run_processor_logs_processing_time_on_success():
     redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
@@ -37,6 +46,50 @@ async def test_run_processor_logs_nothing_when_item_skipped():
     await _run_processor(_StubProcessor(None), {"seq_id": "1"}, redis=redis, api="corp_ann")
     assert await read_events(redis) == []
 
+
+async def test_run_processor_batch_logs_each_item_that_did_work():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    await _run_processor_batch(
+        _StubProcessor("INFY (Infosys) — financial_results"),
+        [{"seq_id": "1"}, {"seq_id": "skip"}, {"seq_id": "2"}],
+        redis=redis,
+        api="corp_ann",
+    )
+    events = await read_events(redis)
+    assert len(events) == 2
+    assert all(event["msg"].endswith("(batch of 3)") for event in events)
+
+
+class _StopExport(BaseException):
+    """Sentinel exception used to terminate an exporter loop in tests."""
+
+
+async def test_stats_exporter_survives_a_redis_error(monkeypatch):
+    monkeypatch.setattr(main_module, "_STATS_EXPORT_INTERVAL", 0)
+    redis = AsyncMock()
+    redis.hset.side_effect = [ConnectionError("redis down"), None, _StopExport]
+    store = AsyncMock()
+    store.stats = lambda: {"hits": 1}
+
+    with pytest.raises(_StopExport):
+        await main_module._export_attachment_store_stats(redis, store)
+
+    assert redis.hset.await_count == 3
+
+
+async def test_token_estimator_stats_are_exported(monkeypatch):
+    monkeypatch.setattr(main_module, "_STATS_EXPORT_INTERVAL", 0)
+    redis = AsyncMock()
+    redis.hset.side_effect = [None, _StopExport]
+    estimator = TokenEstimator(lambda width, height: 100)
+    estimator.record("x" * 4_000, [], 1_100)
+
+    with pytest.raises(_StopExport):
+        await main_module._export_token_estimator_stats(redis, estimator)
+
+    redis.hset.assert_any_await("llm:token_estimator", mapping=estimator.stats())
+
+
 _CORP_ANN_SCHEMA = (
     '{"properties": {'
     '"seq_id": {"type": "string"}, '
@@ -49,7 +102,7 @@ _CORP_ANN_SCHEMA = (
 )
 
 
-async def _seed_corp_ann(db, *, enabled=True):
+async def _seed_corp_ann(db, *, enabled=True, processor_config="{}"):
     poller = PollerConfig(
         module="engine.pollers.corp_ann",
         api_name="corp_ann",
@@ -61,7 +114,7 @@ async def _seed_corp_ann(db, *, enabled=True):
         module="engine.processors.corp_ann",
         api_name="corp_ann",
         input_schema=_CORP_ANN_SCHEMA,
-        config="{}",
+        config=processor_config,
         enabled=enabled,
     )
     db.add_all([poller, processor])
@@ -94,6 +147,70 @@ async def test_build_components_registers_namespaced_supervisor_keys(
     assert watchdog_apis == ["corp_ann"]
 
 
+async def test_build_components_skips_processor_with_unknown_config_key(
+    async_db_session, fake_redis
+):
+    await _seed_corp_ann(
+        async_db_session, processor_config=json.dumps({"max_atachment_bytes": 1_000})
+    )
+    supervisor = Supervisor(restart_delay=0.01)
+
+    pools = await build_components(
+        db=async_db_session,
+        supervisor=supervisor,
+        redis=fake_redis,
+        session=AsyncMock(),
+        llm=AsyncMock(),
+        process_pool=AsyncMock(),
+        db_factory=AsyncMock(),
+        watchdog_register=lambda api: None,
+    )
+
+    assert pools == []
+    assert "processor:corp_ann" not in supervisor._factories
+    assert "poller:corp_ann" in supervisor._factories
+
+
+class _ProcessorWithoutBlobStore:
+    processed: list[dict] = []
+
+    def __init__(self, redis, db, llm, process_pool, session):
+        pass
+
+    async def process(self, item: dict) -> str | None:
+        self.processed.append(item)
+        return None
+
+
+async def test_build_components_runs_processor_without_blob_store_argument(fake_redis, monkeypatch):
+    loaded = LoadedProcessor(
+        api_name="legacy",
+        processor_cls=_ProcessorWithoutBlobStore,
+        config={"pool_size": 1},
+        poller_api_names=["corp_ann"],
+    )
+    monkeypatch.setattr(main_module, "load_enabled", AsyncMock(return_value=([], [loaded])))
+
+    @asynccontextmanager
+    async def db_factory():
+        yield AsyncMock()
+
+    pools = await build_components(
+        db=AsyncMock(),
+        supervisor=Supervisor(restart_delay=0.01),
+        redis=fake_redis,
+        session=AsyncMock(),
+        llm=AsyncMock(),
+        process_pool=AsyncMock(),
+        db_factory=db_factory,
+        watchdog_register=lambda api: None,
+        blob_store=AsyncMock(),
+    )
+    await pools[0]._processor_fn({"seq_id": "1"})
+
+    assert _ProcessorWithoutBlobStore.processed == [{"seq_id": "1"}]
+
+
 async def test_build_components_skips_when_disabled(async_db_session, fake_redis):
     await _seed_corp_ann(async_db_session, enabled=False)
     supervisor = Supervisor(restart_delay=0.01)
@@ -110,3 +227,36 @@ async def test_build_components_skips_when_disabled(async_db_session, fake_redis
     )
 
     assert supervisor._factories == {}
+
+
+async def test_build_components_runs_one_pool_per_size_tier(async_db_session, fake_redis):
+    await _seed_corp_ann(
+        async_db_session,
+        processor_config=json.dumps(
+            {
+                "pool_size": 8,
+                "size_tiers": [
+                    {"name": "small", "max_bytes": 2_000_000, "share": 0.75},
+                    {"name": "bulk", "share": 0.25},
+                ],
+            }
+        ),
+    )
+    supervisor = Supervisor(restart_delay=0.01)
+
+    pools = await build_components(
+        db=async_db_session,
+        supervisor=supervisor,
+        redis=fake_redis,
+        session=AsyncMock(),
+        llm=AsyncMock(),
+        process_pool=AsyncMock(),
+        db_factory=AsyncMock(),
+        watchdog_register=lambda api: None,
+    )
+
+    assert [(pool._queue_key, pool._size) for pool in pools] == [
+        ("queue:corp_ann:small", 6),
+        ("queue:corp_ann:bulk", 2),
+    ]
+    assert "processor:corp_ann" in supervisor._factories
@@ -1,6 +1,7 @@
 import asyncio
 import hashlib
 import json
+from datetime import time as dt_time
 from unittest.mock import AsyncMock
 
 import httpx
@@ -8,6 +9,7 @@ import pytest
 
 from engine.circuit_breaker import CircuitState
 from engine.poller import Poller
+from engine.schedule import ArrivalRate, PollSchedule, PollWindow, TradingCalendar
 from engine.session import NseSession
 
 
@@ -125,7 +127,7 @@ async def test_failure_doubles_interval(fake_redis):
     assert poller._current_interval == 2.0
 
 
-async def test_session_expired_triggers_refresh(fake_redis):
+async def test_session_expired_after_retry_counts_as_failure(fake_redis):
     session = AsyncMock(spec=NseSession)
     session.refresh = AsyncMock()
     call_count = 0
@@ -148,7 +150,9 @@ async def test_session_expired_triggers_refresh(fake_redis):
     )
     with pytest.raises(_StopTest):
         await poller.run()
-    session.refresh.assert_called_once()
+    session.refresh.assert_not_called()
+    assert poller._consecutive_failures == 1
+    assert await fake_redis.get("poller:test:error_count") == "1"
 
 
 async def test_circuit_opens_after_threshold(fake_redis):
@@ -169,3 +173,190 @@ async def test_circuit_opens_after_threshold(fake_redis):
     with pytest.raises(asyncio.TimeoutError):
         await asyncio.wait_for(poller.run(), timeout=0.5)
     assert poller._circuit.state == CircuitState.OPEN
+
+
+class BodyPoller(Poller):
+    """Poller whose fetch goes through the unchanged-response short-circuit."""
+
+    def __init__(self, *args, bodies, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bodies = iter(bodies)
+        self.decoded = 0
+
+    def item_id(self, item: dict) -> str:
+        return item["seq_id"]
+
+    async def fetch(self):
+        try:
+            body = next(self._bodies)
+        except StopIteration as exc:
+            raise _StopTest from exc
+        response = httpx.Response(200, content=body)
+        if self.response_unchanged(response):
+            return None
+        self.decoded += 1
+        return response.json()
+
+
+async def test_unchanged_body_skips_decode_and_enqueue(fake_redis):
+    body = json.dumps([{"seq_id": "1"}]).encode()
+    poller = BodyPoller(
+        api_name="test",
+        session=AsyncMock(spec=NseSession),
+        redis=fake_redis,
+        base_interval=0.01,
+        bodies=[body, body, body],
+    )
+    with pytest.raises(_StopTest):
+        await poller.run()
+
+    assert poller.decoded == 1
+    assert poller.changed_cycles == 1
+    assert poller.unchanged_cycles == 2
+    assert await fake_redis.llen("queue:test") == 1
+
+
+async def test_changed_body_is_decoded_again(fake_redis):
+    poller = BodyPoller(
+        api_name="test",
+        session=AsyncMock(spec=NseSession),
+        redis=fake_redis,
+        base_interval=0.01,
+        bodies=[
+            json.dumps([{"seq_id": "1"}]).encode(),
+            json.dumps([{"seq_id": "2"}, {"seq_id": "1"}]).encode(),
+        ],
+    )
+    with pytest.raises(_StopTest):
+        await poller.run()
+
+    assert poller.decoded == 2
+    assert poller.changed_cycles == 2
+    assert await fake_redis.llen("queue:test") == 2
+
+
+async def test_not_modified_counts_as_unchanged_and_validators_are_sent():
+    poller = ConcretePoller(api_name="test", session=AsyncMock(spec=NseSession), redis=AsyncMock())
+    first = httpx.Response(200, content=b"[]", headers={"etag": '"v1"'})
+
+    assert poller.response_unchanged(first) is False
+    assert poller.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert poller.response_unchanged(httpx.Response(304)) is True
+    assert poller.unchanged_cycles == 1
+
+
+async def test_closed_schedule_skips_fetch_and_reports_market_closed(fake_redis, monkeypatch):
+    import engine.poller as poller_module
+
+    class ClosedPoller(ConcretePoller):
+        def schedule(self):
+            return PollSchedule(closed_interval=None)
+
+    async def closed(self, day):
+        return False
+
+    async def stop_sleep(_):
+        raise _StopTest
+
+    monkeypatch.setattr(TradingCalendar, "is_trading_day", closed)
+    monkeypatch.setattr(poller_module.asyncio, "sleep", stop_sleep)
+    poller = ClosedPoller(api_name="test", session=AsyncMock(spec=NseSession), redis=fake_redis)
+    with pytest.raises(_StopTest):
+        await poller.run()
+
+    assert await fake_redis.get("poller:test:status") == "market_closed"
+    assert await fake_redis.llen("queue:test") == 0
+
+
+def test_adaptive_interval_disabled_without_floor():
+    poller = ConcretePoller(api_name="test", session=AsyncMock(spec=NseSession), redis=AsyncMock())
+    poller._arrivals.observe(100)
+
+    assert poller._adaptive_interval(5.0) == 5.0
+
+
+def test_adaptive_interval_starts_at_schedule_then_tracks_arrivals():
+    poller = ConcretePoller(
+        api_name="test",
+        session=AsyncMock(spec=NseSession),
+        redis=AsyncMock(),
+        base_interval=5.0,
+        max_interval=60.0,
+        min_interval=1.0,
+    )
+    assert poller._adaptive_interval(5.0) == pytest.approx(5.0, rel=0.01)
+
+    poller._arrivals.observe(200)
+    assert poller._adaptive_interval(5.0) == 1.0
+
+    poller._arrivals = ArrivalRate(half_life=120.0)
+    assert poller._adaptive_interval(5.0) == 60.0
+    assert poller._adaptive_interval(5.0, ceiling=5.0) == 5.0
+
+
+async def test_quiet_poller_without_schedule_relaxes_toward_max_interval(
+    fake_redis, monkeypatch
+):
+    import engine.poller as poller_module
+
+    sleeps = []
+
+    async def record_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(poller_module.asyncio, "sleep", record_sleep)
+    poller = ConcretePoller(
+        api_name="test",
+        session=AsyncMock(spec=NseSession),
+        redis=fake_redis,
+        base_interval=5.0,
+        max_interval=60.0,
+        min_interval=1.0,
+        responses=[[], [], _StopTest],
+    )
+    # Half the calibrated arrival rate: the interval should double, not stay at 5 s.
+    poller._arrivals = ArrivalRate(half_life=1e9, initial_rate=0.05)
+    with pytest.raises(_StopTest):
+        await poller.run()
+    assert sleeps == [pytest.approx(10.0), pytest.approx(10.0)]
+
+    sleeps.clear()
+    poller._responses = iter([[], _StopTest])
+    poller._arrivals = ArrivalRate(half_life=120.0)
+    with pytest.raises(_StopTest):
+        await poller.run()
+    assert sleeps == [60.0]
+
+
+async def test_capped_window_never_relaxes_past_its_interval(fake_redis, monkeypatch):
+    import engine.poller as poller_module
+
+    class WindowPoller(ConcretePoller):
+        def schedule(self):
+            window = PollWindow(dt_time.min, dt_time.max, interval=10.0, cap_adaptive=True)
+            return PollSchedule(windows=[window])
+
+    async def trading(self, day):
+        return True
+
+    sleeps = []
+
+    async def record_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(TradingCalendar, "is_trading_day", trading)
+    monkeypatch.setattr(poller_module.asyncio, "sleep", record_sleep)
+    poller = WindowPoller(
+        api_name="test",
+        session=AsyncMock(spec=NseSession),
+        redis=fake_redis,
+        base_interval=5.0,
+        max_interval=60.0,
+        min_interval=1.0,
+        responses=[[], [], _StopTest],
+    )
+    poller._arrivals = ArrivalRate(half_life=120.0)
+    with pytest.raises(_StopTest):
+        await poller.run()
+
+    assert sleeps == [10.0, 10.0]
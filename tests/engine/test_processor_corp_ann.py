@@ -1,5 +1,6 @@
+import asyncio
 import json
-from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
@@ -8,15 +9,23 @@ import pytest
 from sqlalchemy import select
 
 from database.models import Announcement
-from database.redis import dedup_key, inflight_key, result_key
+from database.redis import (
+    analysis_cache_key,
+    dedup_key,
+    inflight_key,
+    processor_analysis_cache_key,
+    result_key,
+)
 from engine.events import read_events
 from engine.processors.base import ProcessorBase
+from engine.processors.blob_store import BlobStore
 from engine.processors.corp_ann import (
     ANNOUNCEMENT_CATEGORIES,
     CorporateAnnouncementsProcessor,
     InputSchema,
 )
-from engine.processors.pdf import RenderedPdfPages
+from engine.processors.pdf import RenderedPdfPages, extract_budgeted_pdf_text
+from engine.processors.render_pool import RenderPool
 from llm.provider import (
     AnnouncementAnalysis,
     LLMContextWindowError,
@@ -46,7 +55,13 @@ def test_processor_subclasses_processor_base():
 
 
 def test_processor_default_config_has_pool_size():
-    assert CorporateAnnouncementsProcessor.default_config() == {"pool_size": 8}
+    assert CorporateAnnouncementsProcessor.default_config() == {
+        "pool_size": 8,
+        "max_attachment_bytes": 32 * 1024 * 1024,
+        "speculative_render": False,
+        "prefer_informative_text": False,
+        "reuse_analyses": True,
+    }
 
 
 def _make_pdf_bytes(page_count: int) -> bytes:
@@ -61,6 +76,28 @@ def _make_pdf_bytes(page_count: int) -> bytes:
     return pdf_bytes
 
 
+def _mock_llm(*, tokens_per_page: int = 1_000, context_window: int = 128_000) -> AsyncMock:
+    """An LLM double whose token estimate is a flat cost per page image."""
+    llm = AsyncMock()
+    llm.context_window_tokens = context_window
+    llm.estimate_tokens = MagicMock(
+        side_effect=lambda *, prompt, image_sizes: tokens_per_page * len(image_sizes)
+    )
+    return llm
+
+
+def _streaming(outcome: httpx.Response | Exception) -> MagicMock:
+    """Stand-in for ``NseSession.stream`` yielding ``outcome`` (or raising it)."""
+
+    @asynccontextmanager
+    async def _stream(url, **kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        yield outcome
+
+    return MagicMock(side_effect=_stream)
+
+
 async def _corp_ann_warn_messages(redis) -> list[str]:
     events = await read_events(redis)
     return [
@@ -72,28 +109,26 @@ async def _corp_ann_warn_messages(redis) -> list[str]:
 
 async def test_skips_duplicate_item(fake_redis, async_db_session):
     await fake_redis.set(dedup_key("corp_ann", "106644730"), "1")
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_session = MagicMock()
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
     await processor.process(SAMPLE_ITEM)
     mock_llm.analyze_announcement.assert_not_called()
     mock_llm.analyze_text_announcement.assert_not_called()
-    mock_session.get.assert_not_called()
+    mock_session.stream.assert_not_called()
     pool.shutdown(wait=False)
 
 
 async def test_releases_dedup_key_when_processing_fails(fake_redis, async_db_session):
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        side_effect=httpx.ConnectError("nse unreachable", request=pdf_request)
-    )
+    mock_session.stream = _streaming(httpx.ConnectError("nse unreachable", request=pdf_request))
 
-    mock_llm = AsyncMock()
-    pool = ProcessPoolExecutor(max_workers=1)
+    mock_llm = _mock_llm()
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -109,8 +144,8 @@ async def test_releases_dedup_key_when_db_commit_fails(fake_redis, async_db_sess
     pdf_bytes = _make_pdf_bytes(page_count=1)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -118,7 +153,7 @@ async def test_releases_dedup_key_when_db_commit_fails(fake_redis, async_db_sess
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
         summary="Summary before commit error.",
         category="general_update",
@@ -127,7 +162,7 @@ async def test_releases_dedup_key_when_db_commit_fails(fake_redis, async_db_sess
     )
     async_db_session.commit = AsyncMock(side_effect=RuntimeError("db commit failed"))
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -142,8 +177,8 @@ async def test_releases_dedup_key_when_db_commit_fails(fake_redis, async_db_sess
 async def test_skips_non_pdf_attachment(fake_redis, async_db_session):
     attachment_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.html")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=b"<html>not a pdf</html>",
             headers={"content-type": "text/html"},
@@ -151,8 +186,8 @@ async def test_skips_non_pdf_attachment(fake_redis, async_db_session):
         )
     )
 
-    mock_llm = AsyncMock()
-    pool = ProcessPoolExecutor(max_workers=1)
+    mock_llm = _mock_llm()
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -177,8 +212,8 @@ async def test_happy_path_multimodal_stores_and_publishes(fake_redis, async_db_s
     pdf_bytes = _make_pdf_bytes(page_count=3)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -186,7 +221,7 @@ async def test_happy_path_multimodal_stores_and_publishes(fake_redis, async_db_s
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
         summary="Strong Q4 growth.",
         category="financial_results",
@@ -194,14 +229,14 @@ async def test_happy_path_multimodal_stores_and_publishes(fake_redis, async_db_s
         need_more_pages=False,
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
     await processor.process(SAMPLE_ITEM)
 
-    # dedup marked
-    assert await fake_redis.exists(dedup_key("corp_ann", "106644730")) == 1
+    # dedup marked done, well past the short processing claim
+    assert await fake_redis.ttl(dedup_key("corp_ann", "106644730")) > 3600
 
     # result cached in Redis
     cached = await fake_redis.get(result_key("INFY", "106644730"))
@@ -229,8 +264,8 @@ async def test_malformed_announcement_datetime_uses_default_timestamp(fake_redis
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -239,7 +274,7 @@ async def test_malformed_announcement_datetime_uses_default_timestamp(fake_redis
     )
 
     item = {**SAMPLE_ITEM, "an_dt": "not-a-real-date"}
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
         summary="Datetime fallback summary.",
         category="general_update",
@@ -247,7 +282,7 @@ async def test_malformed_announcement_datetime_uses_default_timestamp(fake_redis
         need_more_pages=False,
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -267,8 +302,8 @@ async def test_provisional_summary_is_passed_to_later_batch(fake_redis, async_db
     pdf_bytes = _make_pdf_bytes(page_count=8)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -276,7 +311,7 @@ async def test_provisional_summary_is_passed_to_later_batch(fake_redis, async_db
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         AnnouncementAnalysis(
             summary="First pass summary.",
@@ -292,7 +327,7 @@ async def test_provisional_summary_is_passed_to_later_batch(fake_redis, async_db
         ),
     ]
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -322,8 +357,8 @@ async def test_followup_batch_size_is_ten_when_total_pages_exceeds_fifteen(
     pdf_bytes = _make_pdf_bytes(page_count=20)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -331,7 +366,7 @@ async def test_followup_batch_size_is_ten_when_total_pages_exceeds_fifteen(
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         AnnouncementAnalysis(
             summary="Pass one summary.",
@@ -347,7 +382,7 @@ async def test_followup_batch_size_is_ten_when_total_pages_exceeds_fifteen(
         ),
     ]
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -370,8 +405,8 @@ async def test_followup_batch_size_defaults_to_five_when_total_pages_at_most_fif
     pdf_bytes = _make_pdf_bytes(page_count=15)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -379,7 +414,7 @@ async def test_followup_batch_size_defaults_to_five_when_total_pages_at_most_fif
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         AnnouncementAnalysis(
             summary="First pass summary.",
@@ -401,7 +436,7 @@ async def test_followup_batch_size_defaults_to_five_when_total_pages_at_most_fif
         ),
     ]
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -429,8 +464,8 @@ async def test_context_window_error_shrinks_batch_and_retries_same_pass(
     pdf_bytes = _make_pdf_bytes(page_count=9)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -438,7 +473,7 @@ async def test_context_window_error_shrinks_batch_and_retries_same_pass(
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         LLMContextWindowError("context window exceeded"),
         AnnouncementAnalysis(
@@ -449,7 +484,7 @@ async def test_context_window_error_shrinks_batch_and_retries_same_pass(
         ),
     ]
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -470,8 +505,8 @@ async def test_context_shrinks_to_min_and_then_falls_back_to_text(fake_redis, as
     pdf_bytes = _make_pdf_bytes(page_count=7)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -479,7 +514,7 @@ async def test_context_shrinks_to_min_and_then_falls_back_to_text(fake_redis, as
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         LLMContextWindowError("context exceeded at batch 5"),
         LLMContextWindowError("context exceeded at batch 4"),
@@ -494,7 +529,7 @@ async def test_context_shrinks_to_min_and_then_falls_back_to_text(fake_redis, as
         need_more_pages=None,
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -526,8 +561,8 @@ async def test_empty_rendered_batch_falls_back_to_text_analysis(
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -541,7 +576,7 @@ async def test_empty_rendered_batch_falls_back_to_text_analysis(
 
     monkeypatch.setattr("engine.processors.corp_ann.render_pdf_pages", _render_no_pages)
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_text_announcement.return_value = AnnouncementAnalysis(
         summary="Fallback after empty render batch.",
         category="general_update",
@@ -549,7 +584,7 @@ async def test_empty_rendered_batch_falls_back_to_text_analysis(
         need_more_pages=None,
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -579,8 +614,8 @@ async def test_falls_back_to_text_analysis_on_repeated_multimodal_format_failure
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -588,7 +623,7 @@ async def test_falls_back_to_text_analysis_on_repeated_multimodal_format_failure
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = [
         LLMResponseFormatError("bad JSON"),
         LLMResponseFormatError("bad JSON retry"),
@@ -600,7 +635,7 @@ async def test_falls_back_to_text_analysis_on_repeated_multimodal_format_failure
         need_more_pages=None,
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -638,8 +673,8 @@ async def test_text_fallback_truncates_and_retries_response_format(
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -648,7 +683,7 @@ async def test_text_fallback_truncates_and_retries_response_format(
     )
     monkeypatch.setattr("engine.processors.corp_ann._MAX_TEXT_CHARS", 10)
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = LLMContextWindowError("force text fallback")
     mock_llm.analyze_text_announcement.side_effect = [
         LLMResponseFormatError("bad text JSON"),
@@ -660,7 +695,7 @@ async def test_text_fallback_truncates_and_retries_response_format(
         ),
     ]
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -687,8 +722,8 @@ async def test_retry_after_post_commit_cache_failure_is_idempotent(fake_redis, a
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -696,7 +731,7 @@ async def test_retry_after_post_commit_cache_failure_is_idempotent(fake_redis, a
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
         summary="Summary survives retry.",
         category="general_update",
@@ -722,7 +757,7 @@ async def test_retry_after_post_commit_cache_failure_is_idempotent(fake_redis, a
     fake_redis.set = AsyncMock(side_effect=flaky_set)
     fake_redis.publish = AsyncMock(side_effect=tracked_publish)
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -736,7 +771,8 @@ async def test_retry_after_post_commit_cache_failure_is_idempotent(fake_redis, a
     await processor.process(SAMPLE_ITEM)
 
     assert fake_redis.publish.await_count == 1
-    assert mock_llm.analyze_announcement.await_count == 2
+    # The retry reuses the first attempt's analysis of the same PDF.
+    assert mock_llm.analyze_announcement.await_count == 1
 
     result = await async_db_session.execute(
         select(Announcement).where(Announcement.seq_id == "106644730")
@@ -760,8 +796,8 @@ async def test_non_llm_multimodal_exception_propagates_without_text_fallback(
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -769,10 +805,10 @@ async def test_non_llm_multimodal_exception_propagates_without_text_fallback(
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = RuntimeError("unexpected multimodal failure")
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -796,8 +832,8 @@ async def test_rate_limit_error_does_not_trigger_text_fallback(fake_redis, async
     pdf_bytes = _make_pdf_bytes(page_count=2)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -805,12 +841,12 @@ async def test_rate_limit_error_does_not_trigger_text_fallback(fake_redis, async
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = LLMRateLimitError(
         "Rate limited.", retry_after=120.0
     )
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -828,8 +864,8 @@ async def test_rate_limit_error_releases_dedup_key_and_propagates(fake_redis, as
     pdf_bytes = _make_pdf_bytes(page_count=1)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -837,10 +873,10 @@ async def test_rate_limit_error_releases_dedup_key_and_propagates(fake_redis, as
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = LLMRateLimitError("Rate limited.")
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -858,8 +894,8 @@ async def test_processing_failure_releases_inflight_for_reprocessing(fake_redis,
     pdf_bytes = _make_pdf_bytes(page_count=1)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -867,14 +903,14 @@ async def test_processing_failure_releases_inflight_for_reprocessing(fake_redis,
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = RuntimeError("connection refused")
     mock_llm.analyze_text_announcement.side_effect = RuntimeError("connection refused")
 
     # Simulate the poller having marked the item in-flight before it was queued.
     await fake_redis.set(inflight_key("corp_ann", SAMPLE_ITEM["seq_id"]), "1", ex=3600)
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -887,14 +923,105 @@ async def test_processing_failure_releases_inflight_for_reprocessing(fake_redis,
     pool.shutdown(wait=False)
 
 
+async def test_cancellation_releases_only_the_dedup_claim(fake_redis, async_db_session):
+    """A worker stopped mid-item drops its claim so a redelivered copy can run, but
+    keeps inflight so the poller doesn't enqueue another."""
+    pdf_bytes = _make_pdf_bytes(page_count=1)
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=pdf_bytes,
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.side_effect = asyncio.CancelledError()
+    await fake_redis.set(inflight_key("corp_ann", SAMPLE_ITEM["seq_id"]), "1", ex=3600)
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        await processor.process(SAMPLE_ITEM)
+
+    assert await fake_redis.exists(dedup_key("corp_ann", SAMPLE_ITEM["seq_id"])) == 0
+    assert await fake_redis.exists(inflight_key("corp_ann", SAMPLE_ITEM["seq_id"])) == 1
+    pool.shutdown(wait=False)
+
+
+async def test_dedup_claim_is_renewed_but_never_shortens_the_done_marker(
+    fake_redis, async_db_session, monkeypatch
+):
+    sleeps = []
+
+    async def one_tick(_):
+        if sleeps:
+            raise asyncio.CancelledError
+        sleeps.append(True)
+
+    monkeypatch.setattr("engine.processors.corp_ann.asyncio.sleep", one_tick)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis,
+        db=async_db_session,
+        llm=_mock_llm(),
+        process_pool=MagicMock(),
+        session=MagicMock(),
+    )
+    claim, done = dedup_key("corp_ann", "1"), dedup_key("corp_ann", "2")
+    await fake_redis.set(claim, "1", ex=5)
+    await fake_redis.set(done, "1", ex=48 * 3600)
+
+    for key in (claim, done):
+        sleeps.clear()
+        with pytest.raises(asyncio.CancelledError):
+            await processor._hold_claim(key)
+
+    assert 25 < await fake_redis.ttl(claim) <= 30
+    assert await fake_redis.ttl(done) > 47 * 3600
+
+
+async def test_failed_claim_renewal_is_logged_and_retried(
+    fake_redis, async_db_session, monkeypatch, caplog
+):
+    ticks = []
+
+    async def three_ticks(_):
+        if len(ticks) == 3:
+            raise asyncio.CancelledError
+        ticks.append(True)
+
+    monkeypatch.setattr("engine.processors.corp_ann.asyncio.sleep", three_ticks)
+    redis = MagicMock()
+    redis.expire = AsyncMock(side_effect=[ConnectionError("redis down"), True, True])
+    processor = CorporateAnnouncementsProcessor(
+        redis=redis,
+        db=async_db_session,
+        llm=_mock_llm(),
+        process_pool=MagicMock(),
+        session=MagicMock(),
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        await processor._hold_claim(dedup_key("corp_ann", "1"))
+
+    assert redis.expire.await_count == 3
+    assert "Failed to renew dedup claim" in caplog.text
+
+
 async def test_rate_limit_failure_keeps_inflight_for_consumer_requeue(fake_redis, async_db_session):
     """On a rate-limit error the consumer re-queues the item, so process() must NOT release
     the inflight key — doing so would let the poller enqueue a duplicate."""
     pdf_bytes = _make_pdf_bytes(page_count=1)
     pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
     mock_session = MagicMock()
-    mock_session.get = AsyncMock(
-        return_value=httpx.Response(
+    mock_session.stream = _streaming(
+        httpx.Response(
             200,
             content=pdf_bytes,
             headers={"content-type": "application/pdf"},
@@ -902,12 +1029,12 @@ async def test_rate_limit_failure_keeps_inflight_for_consumer_requeue(fake_redis
         )
     )
 
-    mock_llm = AsyncMock()
+    mock_llm = _mock_llm()
     mock_llm.analyze_announcement.side_effect = LLMRateLimitError("Rate limited.")
 
     await fake_redis.set(inflight_key("corp_ann", SAMPLE_ITEM["seq_id"]), "1", ex=3600)
 
-    pool = ProcessPoolExecutor(max_workers=1)
+    pool = RenderPool(workers=1)
     processor = CorporateAnnouncementsProcessor(
         redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
     )
@@ -918,3 +1045,412 @@ async def test_rate_limit_failure_keeps_inflight_for_consumer_requeue(fake_redis
     assert await fake_redis.exists(dedup_key("corp_ann", SAMPLE_ITEM["seq_id"])) == 0
     assert await fake_redis.exists(inflight_key("corp_ann", SAMPLE_ITEM["seq_id"])) == 1
     pool.shutdown(wait=False)
+
+
+async def test_skips_attachment_larger_than_cap(fake_redis, async_db_session):
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=_make_pdf_bytes(page_count=1),
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    mock_llm = _mock_llm()
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis,
+        db=async_db_session,
+        llm=mock_llm,
+        process_pool=pool,
+        session=mock_session,
+        max_attachment_bytes=100,
+    )
+
+    assert await processor.process(SAMPLE_ITEM) is None
+
+    mock_llm.analyze_announcement.assert_not_called()
+    assert await fake_redis.exists(dedup_key("corp_ann", SAMPLE_ITEM["seq_id"])) == 0
+    warn_messages = await _corp_ann_warn_messages(fake_redis)
+    assert any("attachment larger than 100 bytes" in msg for msg in warn_messages)
+
+    pool.shutdown(wait=False)
+
+
+async def test_speculative_render_feeds_the_next_batch(fake_redis, async_db_session, monkeypatch):
+    rendered_ranges: list[tuple[int, int]] = []
+    real_render_batch = CorporateAnnouncementsProcessor._render_batch
+
+    def _recording_render_batch(self, pdf, document_key, start_page, end_page, loop, **kwargs):
+        rendered_ranges.append((start_page, end_page))
+        return real_render_batch(self, pdf, document_key, start_page, end_page, loop, **kwargs)
+
+    monkeypatch.setattr(CorporateAnnouncementsProcessor, "_render_batch", _recording_render_batch)
+
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=_make_pdf_bytes(page_count=12),
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.side_effect = [
+        AnnouncementAnalysis(
+            summary="First pass summary.",
+            category="general_update",
+            confidence="medium",
+            need_more_pages=True,
+        ),
+        AnnouncementAnalysis(
+            summary="Final summary from second pass.",
+            category="orders_or_contracts",
+            confidence="high",
+            need_more_pages=False,
+        ),
+    ]
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis,
+        db=async_db_session,
+        llm=mock_llm,
+        process_pool=pool,
+        session=mock_session,
+        speculative_render=True,
+    )
+    await processor.process(SAMPLE_ITEM)
+
+    # Pages 6-10 were rendered once, ahead of the first LLM call returning, and
+    # 11-12 were rendered speculatively and then discarded.
+    assert rendered_ranges == [(1, 5), (6, 10), (11, 15)]
+    second_call_kwargs = mock_llm.analyze_announcement.await_args_list[1].kwargs
+    assert second_call_kwargs["page_range_start"] == 6
+    assert second_call_kwargs["page_range_end"] == 10
+    assert [image.page_number for image in second_call_kwargs["page_images"]] == [6, 7, 8, 9, 10]
+
+    pool.shutdown(wait=False)
+
+
+async def test_follow_up_batch_is_split_across_render_workers(fake_redis, async_db_session):
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=_make_pdf_bytes(page_count=20),
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.side_effect = [
+        AnnouncementAnalysis(
+            summary="First pass summary.",
+            category="general_update",
+            confidence="medium",
+            need_more_pages=True,
+        ),
+        AnnouncementAnalysis(
+            summary="Final summary from second pass.",
+            category="financial_results",
+            confidence="high",
+            need_more_pages=False,
+        ),
+    ]
+
+    pool = RenderPool(workers=3)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+
+    second_call_kwargs = mock_llm.analyze_announcement.await_args_list[1].kwargs
+    assert [image.page_number for image in second_call_kwargs["page_images"]] == list(
+        range(6, 16)
+    )
+    assert second_call_kwargs["page_range_end"] == 15
+
+    pool.shutdown(wait=False)
+
+
+async def test_thread_pool_renders_bypass_the_document_cache(
+    fake_redis, async_db_session, monkeypatch
+):
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=_make_pdf_bytes(page_count=3),
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+    cache_keys = []
+
+    def _render(*args, cache_key=None, **kwargs):
+        cache_keys.append(cache_key)
+        return RenderedPdfPages(total_pages=3, pages=[])
+
+    def _extract(*args, cache_key=None, **kwargs):
+        cache_keys.append(cache_key)
+        return extract_budgeted_pdf_text(*args, cache_key=cache_key, **kwargs)
+
+    monkeypatch.setattr("engine.processors.corp_ann.render_pdf_pages", _render)
+    monkeypatch.setattr("engine.processors.corp_ann.extract_budgeted_pdf_text", _extract)
+
+    mock_llm = _mock_llm()
+    mock_llm.analyze_text_announcement.return_value = AnnouncementAnalysis(
+        summary="Text summary.",
+        category="general_update",
+        confidence="medium",
+        need_more_pages=None,
+    )
+
+    # ``None`` runs renders on the loop's default thread pool.
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=None, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+
+    assert cache_keys == [None, None]
+
+
+async def test_blank_and_repeated_pages_are_not_uploaded(fake_redis, async_db_session):
+    import fitz
+
+    doc = fitz.open()
+    for text in ["Cover letter", None, "Cover letter", "Outcome of board meeting"]:
+        page = doc.new_page()
+        if text is not None:
+            page.insert_text((50, 50), text)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=pdf_bytes,
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
+        summary="Board approved the results.",
+        category="board_meeting",
+        confidence="high",
+        need_more_pages=False,
+    )
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+
+    call_kwargs = mock_llm.analyze_announcement.await_args.kwargs
+    assert [image.page_number for image in call_kwargs["page_images"]] == [1, 4]
+    assert call_kwargs["page_range_start"] == 1
+    assert call_kwargs["page_range_end"] == 4
+
+    pool.shutdown(wait=False)
+
+
+async def test_batch_is_trimmed_to_the_token_budget_up_front(fake_redis, async_db_session):
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=_make_pdf_bytes(page_count=8),
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+
+    # 3 pages (3,000 tokens) fit in 80% of a 4,000-token window; 4 don't.
+    mock_llm = _mock_llm(tokens_per_page=1_000, context_window=4_000)
+    mock_llm.analyze_announcement.side_effect = [
+        AnnouncementAnalysis(
+            summary="First pass summary.",
+            category="general_update",
+            confidence="medium",
+            need_more_pages=True,
+        ),
+        AnnouncementAnalysis(
+            summary="Final summary.",
+            category="general_update",
+            confidence="high",
+            need_more_pages=False,
+        ),
+    ]
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+
+    first_call, second_call = (call.kwargs for call in mock_llm.analyze_announcement.await_args_list)
+    assert [image.page_number for image in first_call["page_images"]] == [1, 2, 3]
+    assert first_call["page_range_end"] == 3
+    assert [image.page_number for image in second_call["page_images"]] == [4, 5, 6]
+    assert second_call["page_range_start"] == 4
+    assert first_call["page_images"][0].width > 0
+
+    pool.shutdown(wait=False)
+
+
+def _pdf_session(pdf_bytes: bytes) -> MagicMock:
+    pdf_request = httpx.Request("GET", "https://nsearchives.nseindia.com/test.pdf")
+    mock_session = MagicMock()
+    mock_session.stream = _streaming(
+        httpx.Response(
+            200,
+            content=pdf_bytes,
+            headers={"content-type": "application/pdf"},
+            request=pdf_request,
+        )
+    )
+    return mock_session
+
+
+async def test_reposted_attachment_reuses_cached_analysis(fake_redis, async_db_session):
+    mock_session = _pdf_session(_make_pdf_bytes(page_count=2))
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
+        summary="Order win worth Rs 500 crore.",
+        category="orders_or_contracts",
+        confidence="high",
+        need_more_pages=False,
+    )
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+    await processor.process({**SAMPLE_ITEM, "seq_id": "106644731"})
+
+    mock_llm.analyze_announcement.assert_awaited_once()
+    repost = await async_db_session.get(Announcement, "106644731")
+    assert repost.summary == "Order win worth Rs 500 crore."
+    assert repost.category == "orders_or_contracts"
+    assert repost.processing_mode == "multimodal"
+    original = await async_db_session.get(Announcement, "106644730")
+    assert repost.content_hash is not None
+    assert repost.content_hash == original.content_hash
+    stats = await fake_redis.hgetall(processor_analysis_cache_key("corp_ann"))
+    assert stats == {"misses": "1", "hits_redis": "1"}
+
+    pool.shutdown(wait=False)
+
+
+async def test_analysis_cache_falls_back_to_stored_announcements(fake_redis, async_db_session):
+    mock_session = _pdf_session(_make_pdf_bytes(page_count=2))
+    mock_llm = _mock_llm()
+    mock_llm.analyze_text_announcement.return_value = AnnouncementAnalysis(
+        summary="Scanned board outcome.",
+        category="board_meeting",
+        confidence="low",
+    )
+    mock_llm.analyze_announcement.side_effect = LLMResponseFormatError("bad json")
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis, db=async_db_session, llm=mock_llm, process_pool=pool, session=mock_session
+    )
+    await processor.process(SAMPLE_ITEM)
+    content_hash = (await async_db_session.get(Announcement, "106644730")).content_hash
+    await fake_redis.delete(analysis_cache_key(content_hash))
+
+    await processor.process({**SAMPLE_ITEM, "seq_id": "106644731"})
+
+    assert mock_llm.analyze_text_announcement.await_count == 1
+    repost = await async_db_session.get(Announcement, "106644731")
+    assert repost.summary == "Scanned board outcome."
+    assert repost.processing_mode == "text"
+    recached = json.loads(await fake_redis.get(analysis_cache_key(content_hash)))
+    assert recached["confidence"] is None
+    stats = await fake_redis.hgetall(processor_analysis_cache_key("corp_ann"))
+    assert stats == {"misses": "1", "hits_db": "1"}
+
+    pool.shutdown(wait=False)
+
+
+async def test_analysis_reuse_can_be_disabled(fake_redis, async_db_session):
+    mock_session = _pdf_session(_make_pdf_bytes(page_count=2))
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.return_value = AnnouncementAnalysis(
+        summary="Same document.",
+        category="general_update",
+        confidence="high",
+        need_more_pages=False,
+    )
+
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis,
+        db=async_db_session,
+        llm=mock_llm,
+        process_pool=pool,
+        session=mock_session,
+        reuse_analyses=False,
+    )
+    await processor.process(SAMPLE_ITEM)
+    await processor.process({**SAMPLE_ITEM, "seq_id": "106644731"})
+
+    assert mock_llm.analyze_announcement.await_count == 2
+    assert await fake_redis.exists(processor_analysis_cache_key("corp_ann")) == 0
+
+    pool.shutdown(wait=False)
+
+
+async def test_retry_after_rate_limit_reads_the_stored_attachment(
+    fake_redis, async_db_session, tmp_path
+):
+    mock_session = _pdf_session(_make_pdf_bytes(page_count=2))
+    mock_llm = _mock_llm()
+    mock_llm.analyze_announcement.side_effect = [
+        LLMRateLimitError("Rate limited."),
+        AnnouncementAnalysis(
+            summary="Analyzed after the rate limit.",
+            category="general_update",
+            confidence="high",
+            need_more_pages=False,
+        ),
+    ]
+
+    blob_store = BlobStore(str(tmp_path), max_bytes=16 * 1024 * 1024)
+    pool = RenderPool(workers=1)
+    processor = CorporateAnnouncementsProcessor(
+        redis=fake_redis,
+        db=async_db_session,
+        llm=mock_llm,
+        process_pool=pool,
+        session=mock_session,
+        blob_store=blob_store,
+    )
+    with pytest.raises(LLMRateLimitError):
+        await processor.process(SAMPLE_ITEM)
+    await processor.process(SAMPLE_ITEM)
+
+    assert mock_session.stream.call_count == 1
+    ann = await async_db_session.get(Announcement, "106644730")
+    assert ann.summary == "Analyzed after the rate limit."
+    assert blob_store.stats()["hits"] == 1
+
+    pool.shutdown(wait=False)
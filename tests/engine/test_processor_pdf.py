@@ -1,7 +1,18 @@
+from multiprocessing.shared_memory import SharedMemory
+
 import fitz
 import pytest
 
-from engine.processors.pdf import extract_pdf_text, render_pdf_pages
+from engine.processors import pdf as pdf_module
+from engine.processors.pdf import (
+    PageFilter,
+    SharedPdf,
+    configure_document_cache,
+    extract_budgeted_pdf_text,
+    extract_pdf_text,
+    iter_pdf_text,
+    render_pdf_pages,
+)
 
 
 def _make_pdf(page_count: int) -> bytes:
@@ -152,3 +163,208 @@ def test_render_pdf_pages_invalid_bytes_raises():
             max_dimension_px=900,
             jpeg_quality=60,
         )
+
+
+def test_render_and_extract_accept_a_file_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(_make_pdf(2))
+
+    assert "Announcement page 2" in extract_pdf_text(str(path))
+    rendered = render_pdf_pages(
+        str(path), start_page=1, end_page=2, max_dimension_px=300, jpeg_quality=50
+    )
+    assert rendered.total_pages == 2
+
+
+def test_render_and_extract_accept_a_shared_memory_segment():
+    pdf_bytes = _make_pdf(2)
+    segment = SharedMemory(create=True, size=len(pdf_bytes))
+    try:
+        segment.buf[: len(pdf_bytes)] = pdf_bytes
+        source = SharedPdf(name=segment.name, size=len(pdf_bytes))
+
+        assert "Announcement page 1" in extract_pdf_text(source)
+        rendered = render_pdf_pages(
+            source, start_page=2, end_page=2, max_dimension_px=300, jpeg_quality=50
+        )
+        assert [page.page_number for page in rendered.pages] == [2]
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+
+@pytest.fixture
+def document_cache():
+    yield
+    configure_document_cache(0)  # closes and drops whatever the test cached
+    configure_document_cache(pdf_module._DEFAULT_DOCUMENT_CACHE_SIZE)
+
+
+def test_cache_key_reuses_the_open_document(monkeypatch, document_cache):
+    opened: list[object] = []
+    real_open = pdf_module._open_pdf
+
+    def _counting_open(source):
+        opened.append(source)
+        return real_open(source)
+
+    monkeypatch.setattr(pdf_module, "_open_pdf", _counting_open)
+    pdf_bytes = _make_pdf(3)
+    render_kwargs = {"max_dimension_px": 300, "jpeg_quality": 50, "cache_key": "doc-a"}
+
+    render_pdf_pages(pdf_bytes, start_page=1, end_page=2, **render_kwargs)
+    render_pdf_pages(pdf_bytes, start_page=3, end_page=3, **render_kwargs)
+    assert "Announcement page 3" in extract_pdf_text(pdf_bytes, cache_key="doc-a")
+    assert len(opened) == 1
+
+
+def test_document_cache_evicts_least_recently_used(document_cache):
+    configure_document_cache(1)
+    extract_pdf_text(_make_pdf(1), cache_key="doc-a")
+    first = pdf_module._open_documents["doc-a"]
+    extract_pdf_text(_make_pdf(1), cache_key="doc-b")
+
+    assert list(pdf_module._open_documents) == ["doc-b"]
+    assert first.is_closed
+
+
+def _make_pdf_with_pages(texts: list[str | None]) -> bytes:
+    """One page per entry; ``None`` makes a blank page."""
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page()
+        if text is not None:
+            page.insert_text((50, 50), text)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def test_render_reports_page_filter_signals():
+    rendered = render_pdf_pages(
+        _make_pdf_with_pages(["Board meeting outcome", None]),
+        start_page=1,
+        end_page=2,
+        max_dimension_px=300,
+        jpeg_quality=50,
+    )
+    text_page, blank_page = rendered.pages
+    assert text_page.text_chars == len("Board meeting outcome")
+    assert text_page.entropy > blank_page.entropy
+    assert blank_page.text_chars == 0
+    assert blank_page.entropy == 0.0
+
+
+def test_page_filter_drops_blank_and_repeated_pages():
+    rendered = render_pdf_pages(
+        _make_pdf_with_pages(["Letterhead", "Results for Q4", None, "Letterhead"]),
+        start_page=1,
+        end_page=4,
+        max_dimension_px=300,
+        jpeg_quality=50,
+    )
+    page_filter = PageFilter()
+
+    assert [page.page_number for page in page_filter.keep(rendered.pages)] == [1, 2]
+    # Re-filtering the same pages (a re-rendered batch) keeps the same ones.
+    assert [page.page_number for page in page_filter.keep(rendered.pages)] == [1, 2]
+
+
+def test_page_filter_keeps_pages_with_different_text():
+    rendered = render_pdf_pages(
+        _make_pdf_with_pages(["Announcement page 1", "Announcement page 2"]),
+        start_page=1,
+        end_page=2,
+        max_dimension_px=300,
+        jpeg_quality=50,
+    )
+    assert len(PageFilter().keep(rendered.pages)) == 2
+
+
+def _make_results_table_pdf() -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    for row in range(45):
+        line = f"Item {row:02d}  {row * 1234.5:>12,.2f}  {row * 87.25:>10,.2f}"
+        page.insert_text((40, 40 + row * 17), line)
+    doc.new_page().insert_text((50, 50), "Yours faithfully")
+    colour_page = doc.new_page()
+    colour_page.draw_rect(fitz.Rect(50, 50, 300, 300), color=(1, 0, 0), fill=(1, 0, 0))
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def test_adaptive_render_picks_profile_per_page():
+    rendered = render_pdf_pages(
+        _make_results_table_pdf(),
+        start_page=1,
+        end_page=3,
+        max_dimension_px=900,
+        jpeg_quality=60,
+        adaptive=True,
+    )
+    table, letter, colour = rendered.pages
+
+    assert table.profile == "dense"
+    assert letter.profile == "sparse"
+    assert table.grayscale and letter.grayscale
+    assert not colour.grayscale
+    assert table.byte_size == len(table.image_bytes)
+    table_image = fitz.Pixmap(table.image_bytes)
+    assert max(table_image.width, table_image.height) > 900
+    letter_image = fitz.Pixmap(letter.image_bytes)
+    assert max(letter_image.width, letter_image.height) <= 540
+
+
+def test_non_adaptive_render_uses_default_profile():
+    rendered = render_pdf_pages(
+        _make_results_table_pdf(),
+        start_page=1,
+        end_page=3,
+        max_dimension_px=900,
+        jpeg_quality=60,
+    )
+    assert {page.profile for page in rendered.pages} == {"default"}
+    assert not any(page.grayscale for page in rendered.pages)
+
+
+def test_iter_pdf_text_yields_pages_lazily():
+    pages = iter_pdf_text(_make_pdf(3))
+    assert next(pages) == (1, "Announcement page 1\n")
+    assert [number for number, _ in pages] == [2, 3]
+
+
+def test_budgeted_extraction_stops_once_budget_is_met():
+    extracted = extract_budgeted_pdf_text(_make_pdf(10), max_chars=30)
+
+    assert extracted.pages_read == 2
+    assert extracted.page_numbers == [1, 2]
+    assert len(extracted.text) == 30
+    assert extracted.text.startswith("Announcement page 1")
+    assert extracted.truncated
+    assert extracted.total_pages == 10
+
+
+def test_budgeted_extraction_within_budget_is_not_truncated():
+    extracted = extract_budgeted_pdf_text(_make_pdf(2), max_chars=10_000)
+    assert not extracted.truncated
+    assert extracted.text == extract_pdf_text(_make_pdf(2))
+
+
+def test_budgeted_extraction_prefers_lead_and_numeric_pages():
+    pdf_bytes = _make_pdf_with_pages(
+        [
+            "Cover letter to the exchange",
+            "Subject: financial results",
+            "Notes and disclaimers apply here",
+            "Revenue 12,345.67 Expenses 9,876.54 Profit 2,469.13",
+            "Further notes and disclaimers",
+        ]
+    )
+    extracted = extract_budgeted_pdf_text(pdf_bytes, max_chars=100, prefer_informative=True)
+
+    assert extracted.page_numbers == [1, 2, 4]
+    assert "Revenue 12,345.67" in extracted.text
+    assert extracted.truncated
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import time
+
+from engine.enqueue import enqueue_new
+from engine.queues import (
+    PRIORITY_CLASSES,
+    ListQueue,
+    PriorityQueue,
+    ReliableQueue,
+    StreamQueue,
+    priority_depths,
+    priority_score,
+    processing_depth,
+    stream_depths,
+)
+
+
+async def _enqueue(redis, *items: dict) -> None:
+    await enqueue_new(
+        redis,
+        "test",
+        [(item["seq_id"], item) for item in items],
+        queue_for=lambda item: "pqueue:test",
+        watch_key_for=lambda item: f"watch:{item['symbol']}",
+    )
+
+
+async def _drain(queue) -> list[str]:
+    popped = []
+    while (item := await queue.pop(timeout=0)) is not None:
+        popped.append(json.loads(item.raw)["seq_id"])
+    return popped
+
+
+async def test_list_queue_pops_in_fifo_order_and_requeues_at_the_back(fake_redis):
+    queue = ListQueue(fake_redis, "queue:test")
+    await fake_redis.rpush("queue:test", "a", "b")
+
+    first = await queue.pop(timeout=1)
+    await queue.requeue(first)
+
+    assert await fake_redis.lrange("queue:test", 0, -1) == ["b", "a"]
+
+
+async def test_watched_symbols_come_first_then_freshest(fake_redis):
+    await fake_redis.sadd("watch:INFY", "42")
+    await _enqueue(fake_redis, {"seq_id": "1", "symbol": "TCS"})
+    await _enqueue(fake_redis, {"seq_id": "2", "symbol": "INFY"})
+    await _enqueue(fake_redis, {"seq_id": "3", "symbol": "WIPRO"})
+    await _enqueue(fake_redis, {"seq_id": "4", "symbol": "INFY"})
+
+    queue = PriorityQueue(fake_redis, "pqueue:test")
+
+    assert await _drain(queue) == ["4", "2", "3", "1"]
+    assert await fake_redis.exists("pqueue:test:arrivals") == 0
+
+
+async def test_items_waiting_past_max_wait_are_served_first(fake_redis):
+    now = time.time()
+    unwatched = PRIORITY_CLASSES["unwatched"]
+    watched = PRIORITY_CLASSES["watched"]
+    for seq_id, priority_class, arrived_at in [
+        ("old", unwatched, now - 600),
+        ("older", unwatched, now - 900),
+        ("fresh-watched", watched, now),
+        ("fresh", unwatched, now - 5),
+    ]:
+        raw = json.dumps({"seq_id": seq_id})
+        await fake_redis.zadd("pqueue:test", {raw: priority_score(priority_class, arrived_at)})
+        await fake_redis.zadd("pqueue:test:arrivals", {raw: arrived_at})
+
+    queue = PriorityQueue(fake_redis, "pqueue:test", max_wait=300)
+
+    assert await _drain(queue) == ["older", "old", "fresh-watched", "fresh"]
+
+
+async def test_requeue_keeps_priority_and_arrival_time(fake_redis):
+    await fake_redis.sadd("watch:INFY", "42")
+    await _enqueue(fake_redis, {"seq_id": "1", "symbol": "INFY"})
+    queue = PriorityQueue(fake_redis, "pqueue:test")
+
+    popped = await queue.pop(timeout=0)
+    await queue.requeue(popped)
+
+    again = await queue.pop(timeout=0)
+    assert (again.raw, again.score, again.arrived_at) == (
+        popped.raw,
+        popped.score,
+        popped.arrived_at,
+    )
+
+
+async def test_priority_depths_count_each_class(fake_redis):
+    await fake_redis.sadd("watch:INFY", "42")
+    await _enqueue(
+        fake_redis,
+        {"seq_id": "1", "symbol": "INFY"},
+        {"seq_id": "2", "symbol": "TCS"},
+        {"seq_id": "3", "symbol": "WIPRO"},
+    )
+
+    assert await priority_depths(fake_redis, "pqueue:test") == {"watched": 1, "unwatched": 2}
+
+
+async def test_reliable_queue_keeps_an_item_until_it_is_acked(fake_redis):
+    await fake_redis.rpush("queue:test", "a", "b")
+    queue = ReliableQueue(fake_redis, "queue:test", worker="w1")
+
+    item = await queue.pop(timeout=1)
+
+    assert item.raw == "a"
+    assert await fake_redis.lrange("queue:test:processing:w1", 0, -1) == ["a"]
+    assert await processing_depth(fake_redis, "queue:test") == 1
+
+    await queue.ack(item)
+
+    assert await processing_depth(fake_redis, "queue:test") == 0
+    assert await fake_redis.lrange("queue:test", 0, -1) == ["b"]
+
+
+async def test_reaper_requeues_only_expired_leases_at_the_head(fake_redis):
+    await fake_redis.rpush("queue:test", "a", "b", "c")
+    dead = ReliableQueue(fake_redis, "queue:test", worker="dead", visibility_timeout=60)
+    alive = ReliableQueue(fake_redis, "queue:test", worker="alive", visibility_timeout=60)
+    await dead.pop(timeout=1)
+    await alive.pop(timeout=1)
+    await fake_redis.zadd("queue:test:leases", {"dead": time.time() - 1})
+
+    assert await alive.reap() == 1
+
+    assert await fake_redis.lrange("queue:test", 0, -1) == ["a", "c"]
+    assert await fake_redis.lrange("queue:test:processing:alive", 0, -1) == ["b"]
+    assert await fake_redis.zrange("queue:test:leases", 0, -1) == ["alive"]
+
+
+async def test_renewed_lease_is_not_reaped(fake_redis):
+    await fake_redis.rpush("queue:test", "a")
+    queue = ReliableQueue(fake_redis, "queue:test", worker="w1", visibility_timeout=60)
+    await queue.pop(timeout=1)
+    await fake_redis.zadd("queue:test:leases", {"w1": time.time() - 1})
+
+    await queue.renew()
+
+    assert await queue.reap() == 0
+    assert await fake_redis.llen("queue:test") == 0
+
+
+async def test_reliable_requeue_and_release(fake_redis):
+    await fake_redis.rpush("queue:test", "a", "b")
+    queue = ReliableQueue(fake_redis, "queue:test", worker="w1")
+
+    await queue.requeue(await queue.pop(timeout=1))
+    assert await fake_redis.lrange("queue:test", 0, -1) == ["b", "a"]
+
+    await queue.pop(timeout=1)
+    await queue.release()
+    assert await fake_redis.lrange("queue:test", 0, -1) == ["b", "a"]
+    assert await fake_redis.exists("queue:test:leases") == 0
+
+
+async def test_stream_queue_tracks_pending_entries_until_acked(fake_redis):
+    await enqueue_new(
+        fake_redis, "test", [("1", {"seq_id": "1"}), ("2", {"seq_id": "2"})], stream=True
+    )
+    queue = StreamQueue(fake_redis, "stream:test", consumer="c1")
+
+    item = await queue.pop(timeout=0.1)
+
+    assert json.loads(item.raw)["seq_id"] == "1"
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert (depths["waiting"], depths["pending"]) == (1, 1)
+    assert depths["consumers"]["c1"]["pending"] == 1
+
+    await queue.ack(item)
+
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert (depths["waiting"], depths["pending"]) == (1, 0)
+    assert await fake_redis.xlen("stream:test") == 1
+
+
+async def test_reap_re_adds_entries_of_a_consumer_that_went_quiet(fake_redis):
+    await enqueue_new(fake_redis, "test", [("1", {"seq_id": "1"})], stream=True)
+    dead = StreamQueue(fake_redis, "stream:test", consumer="dead", visibility_timeout=0.05)
+    reaper = StreamQueue(fake_redis, "stream:test", consumer="reaper", visibility_timeout=0.05)
+    await dead.pop(timeout=0.1)
+    await asyncio.sleep(0.1)
+
+    assert await reaper.reap() == 1
+
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert (depths["waiting"], depths["pending"]) == (1, 0)
+    worker = StreamQueue(fake_redis, "stream:test", consumer="c2")
+    assert json.loads((await worker.pop(timeout=0.1)).raw)["seq_id"] == "1"
+
+
+async def test_stream_release_hands_back_the_entry_and_leaves_the_group(fake_redis):
+    await enqueue_new(fake_redis, "test", [("1", {"seq_id": "1"})], stream=True)
+    queue = StreamQueue(fake_redis, "stream:test", consumer="c1")
+    await queue.pop(timeout=0.1)
+
+    await queue.release()
+
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert depths == {"waiting": 1, "pending": 0, "consumers": {}}
+
+
+async def test_stream_consumer_with_pending_entries_is_not_deleted(fake_redis):
+    await enqueue_new(fake_redis, "test", [("1", {"seq_id": "1"})], stream=True)
+    busy = StreamQueue(fake_redis, "stream:test", consumer="busy")
+    await busy.pop(timeout=0.1)
+    other = StreamQueue(fake_redis, "stream:test", consumer="other")
+
+    await other._delete_consumer("busy")
+
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert depths["consumers"]["busy"]["pending"] == 1
+
+
+async def test_stream_depths_of_a_missing_stream_are_zero(fake_redis):
+    assert await stream_depths(fake_redis, "stream:none") == {
+        "waiting": 0,
+        "pending": 0,
+        "consumers": {},
+    }
+
+
+async def test_list_queue_pops_a_batch_in_one_call(fake_redis):
+    await fake_redis.rpush("queue:test", "a", "b", "c")
+    queue = ListQueue(fake_redis, "queue:test")
+
+    assert [item.raw for item in await queue.pop_batch(2, timeout=1)] == ["a", "b"]
+    assert [item.raw for item in await queue.pop_batch(2, timeout=1)] == ["c"]
+    assert await queue.pop_batch(2, timeout=0.1) == []
+
+
+async def test_priority_queue_pops_a_batch_in_priority_order(fake_redis):
+    await fake_redis.sadd("watch:INFY", "42")
+    await _enqueue(fake_redis, {"seq_id": "1", "symbol": "TCS"})
+    await _enqueue(fake_redis, {"seq_id": "2", "symbol": "INFY"})
+    await _enqueue(fake_redis, {"seq_id": "3", "symbol": "WIPRO"})
+    queue = PriorityQueue(fake_redis, "pqueue:test")
+
+    batch = await queue.pop_batch(2, timeout=0)
+
+    assert [json.loads(item.raw)["seq_id"] for item in batch] == ["2", "3"]
+    await queue.requeue(*batch)
+    assert await _drain(queue) == ["2", "3", "1"]
+
+
+async def test_reliable_queue_batch_is_held_and_acked_together(fake_redis):
+    await fake_redis.rpush("queue:test", "a", "b", "c")
+    queue = ReliableQueue(fake_redis, "queue:test", worker="w1")
+
+    batch = await queue.pop_batch(2, timeout=1)
+
+    assert await fake_redis.lrange("queue:test:processing:w1", 0, -1) == ["a", "b"]
+    await queue.ack(*batch)
+    assert await processing_depth(fake_redis, "queue:test") == 0
+
+
+async def test_stream_queue_reads_a_batch_and_acks_it(fake_redis):
+    await enqueue_new(
+        fake_redis, "test", [(str(i), {"seq_id": str(i)}) for i in range(3)], stream=True
+    )
+    queue = StreamQueue(fake_redis, "stream:test", consumer="c1")
+
+    batch = await queue.pop_batch(2, timeout=0.1)
+
+    assert [json.loads(item.raw)["seq_id"] for item in batch] == ["0", "1"]
+    await queue.ack(*batch)
+    depths = await stream_depths(fake_redis, "stream:test")
+    assert (depths["waiting"], depths["pending"]) == (1, 0)
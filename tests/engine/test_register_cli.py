@@ -107,7 +107,13 @@ async def test_register_processor_seeds_default_config(db_factory):
     )
     async with db_factory() as db:
         row = (await db.execute(select(ProcessorConfig))).scalar_one()
-        assert json.loads(row.config) == {"pool_size": 8}
+        assert json.loads(row.config) == {
+            "pool_size": 8,
+            "max_attachment_bytes": 32 * 1024 * 1024,
+            "speculative_render": False,
+            "prefer_informative_text": False,
+            "reuse_analyses": True,
+        }
 
 
 async def test_seed_registers_and_enables_defaults(db_factory):
@@ -1,6 +1,7 @@
 import pytest
 
 from database.models import PollerConfig, ProcessorConfig, ProcessorPollerLink
+from engine.processors.base import ProcessorBase
 from engine.registry import (
     ContractError,
     api_name_from_module,
@@ -8,7 +9,9 @@ from engine.registry import (
     load_poller_module,
     load_processor_module,
     schema_incompatibilities,
+    supports_batch,
 )
+from llm.provider import LLMRateLimitError
 
 
 def _schema(props, required=None):
@@ -85,6 +88,47 @@ def test_load_processor_module_returns_schema_and_class():
     assert info.default_config == {"pool_size": 4}
 
 
+class _OneByOne(ProcessorBase):
+    async def process(self, item: dict) -> str | None:
+        return None
+
+
+class _Batching(_OneByOne):
+    async def process_batch(self, items: list[dict]) -> list[str | None]:
+        return [None] * len(items)
+
+
+def test_supports_batch_detects_an_overridden_process_batch():
+    assert supports_batch(_Batching)
+    assert not supports_batch(_OneByOne)
+    assert not load_processor_module("tests.engine.fixtures.good_processor").supports_batch
+
+
+async def test_default_process_batch_runs_items_one_by_one():
+    class _Echo(ProcessorBase):
+        async def process(self, item: dict) -> str | None:
+            return item.get("summary")
+
+    assert await _Echo().process_batch([{"summary": "a"}, {}]) == ["a", None]
+
+
+async def test_default_process_batch_runs_every_item_before_raising():
+    seen = []
+
+    class _Flaky(ProcessorBase):
+        async def process(self, item: dict) -> str | None:
+            seen.append(item["seq_id"])
+            if item["seq_id"] == "1":
+                raise ValueError("bad item")
+            if item["seq_id"] == "2":
+                raise LLMRateLimitError("slow down")
+            return None
+
+    with pytest.raises(LLMRateLimitError):
+        await _Flaky().process_batch([{"seq_id": "1"}, {"seq_id": "2"}, {"seq_id": "3"}])
+    assert seen == ["1", "2", "3"]
+
+
 _POLLER_OUT = '{"properties": {"seq_id": {"type": "string"}}}'
 _PROC_IN = '{"properties": {"seq_id": {"type": "string"}}}'
 
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from engine.processors.render_pool import RenderPool, split_page_range
+
+
+def test_same_document_key_routes_to_same_executor():
+    pool = RenderPool(workers=4)
+    try:
+        assert pool.executor_for("abc123") is pool.executor_for("abc123")
+        assert {id(pool.executor_for(f"doc-{i}")) for i in range(64)} == {
+            id(executor) for executor in pool._executors
+        }
+    finally:
+        pool.shutdown(wait=False)
+
+
+def test_work_for_a_document_runs_in_one_process():
+    pool = RenderPool(workers=2)
+    try:
+        pids = {pool.executor_for("doc").submit(os.getpid).result() for _ in range(4)}
+        assert len(pids) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_unkeyed_work_runs_round_robin():
+    pool = RenderPool(workers=2)
+    try:
+        pids = {pool.submit(os.getpid).result() for _ in range(4)}
+        assert len(pids) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_rejects_empty_pool():
+    with pytest.raises(ValueError, match="workers"):
+        RenderPool(workers=0)
+
+
+def test_executors_for_starts_with_the_owner_and_caps_at_pool_size():
+    pool = RenderPool(workers=2)
+    try:
+        executors = pool.executors_for("doc", 3)
+        assert executors[0] is pool.executor_for("doc")
+        assert len(executors) == len({id(executor) for executor in executors}) == 2
+    finally:
+        pool.shutdown(wait=False)
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "parts", "expected"),
+    [
+        (6, 15, 3, [(6, 9), (10, 12), (13, 15)]),
+        (11, 23, 4, [(11, 14), (15, 17), (18, 20), (21, 23)]),
+        (1, 5, 3, [(1, 5)]),
+        (1, 2, 3, [(1, 2)]),
+    ],
+)
+def test_split_page_range(start, end, parts, expected):
+    assert split_page_range(start, end, parts=parts, min_pages=3) == expected
@@ -0,0 +1,112 @@
+from datetime import date, datetime
+from datetime import time as dt_time
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+import pytz
+import respx
+
+from engine.schedule import (
+    ArrivalRate,
+    PollSchedule,
+    PollWindow,
+    TradingCalendar,
+    parse_holidays,
+    seconds_until_next_ist_day,
+)
+from engine.session import NSE_HOME, NseSession
+
+_IST = pytz.timezone("Asia/Kolkata")
+_HOLIDAYS = {
+    "CM": [
+        {"tradingDate": "26-Jan-2026", "weekDay": "Monday", "description": "Republic Day"},
+        {"tradingDate": "not-a-date", "weekDay": "?", "description": "bad"},
+    ],
+    "COM": [{"tradingDate": "01-Jan-2026", "weekDay": "Thursday", "description": "New year"}],
+}
+
+_SCHEDULE = PollSchedule(
+    windows=[
+        PollWindow(start=dt_time(9, 0), end=dt_time(15, 30)),
+        PollWindow(start=dt_time(15, 30), end=dt_time(21, 0), interval=10.0),
+    ],
+    off_window_interval=60.0,
+    closed_interval=None,
+)
+
+
+def _ist(hour: int, minute: int = 0) -> datetime:
+    return _IST.localize(datetime(2026, 1, 27, hour, minute))
+
+
+def test_interval_inside_window_defaults_to_base_interval():
+    assert _SCHEDULE.interval_at(_ist(10), trading_day=True, base_interval=5.0) == 5.0
+
+
+def test_interval_inside_window_with_own_interval():
+    assert _SCHEDULE.interval_at(_ist(16), trading_day=True, base_interval=5.0) == 10.0
+
+
+def test_interval_outside_windows_is_sparse():
+    assert _SCHEDULE.interval_at(_ist(23), trading_day=True, base_interval=5.0) == 60.0
+
+
+def test_closed_day_uses_closed_interval():
+    assert _SCHEDULE.interval_at(_ist(10), trading_day=False, base_interval=5.0) is None
+
+
+def test_seconds_until_next_ist_day():
+    assert seconds_until_next_ist_day(_ist(23, 30)) == 1800
+
+
+def test_parse_holidays_reads_segment_and_skips_malformed_entries():
+    assert parse_holidays(_HOLIDAYS, "CM") == {date(2026, 1, 26)}
+    assert parse_holidays(_HOLIDAYS, "missing") == set()
+
+
+@respx.mock
+async def test_calendar_fetches_once_and_caches_in_redis(fake_redis):
+    route = respx.get(url__regex=r".*holiday-master.*").mock(
+        return_value=httpx.Response(200, json=_HOLIDAYS)
+    )
+    respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        calendar = TradingCalendar(session, fake_redis)
+        assert await calendar.is_trading_day(date(2026, 1, 26)) is False  # holiday
+        assert await calendar.is_trading_day(date(2026, 1, 27)) is True
+        assert await calendar.is_trading_day(date(2026, 1, 31)) is False  # Saturday
+
+        other_replica = TradingCalendar(session, fake_redis)
+        assert await other_replica.is_trading_day(date(2026, 1, 26)) is False
+
+    assert route.call_count == 1
+    assert await fake_redis.ttl("nse:holidays:CM") > 0
+
+
+async def test_calendar_falls_back_to_weekends_when_nse_fails(fake_redis):
+    session = AsyncMock(spec=NseSession)
+    session.get.side_effect = httpx.ConnectError("down")
+    calendar = TradingCalendar(session, fake_redis)
+
+    assert await calendar.is_trading_day(date(2026, 1, 26)) is True
+    assert await calendar.is_trading_day(date(2026, 1, 31)) is False
+    assert await fake_redis.get("nse:holidays:CM") is None
+
+
+def test_arrival_rate_decays_by_half_every_half_life():
+    rate = ArrivalRate(half_life=10.0, initial_rate=4.0)
+    start = rate._updated_at
+
+    assert rate.rate(start + 10.0) == pytest.approx(2.0)
+    assert rate.rate(start + 20.0) == pytest.approx(1.0)
+
+
+def test_arrival_rate_converges_to_steady_stream():
+    rate = ArrivalRate(half_life=10.0)
+    now = rate._updated_at
+    for _ in range(500):
+        now += 1.0
+        rate.observe(3, now)
+
+    assert rate.rate(now) == pytest.approx(3.0, rel=0.05)
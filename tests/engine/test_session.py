@@ -1,3 +1,4 @@
+import asyncio
 import json
 import re
 
@@ -5,7 +6,7 @@ import httpx
 import pytest
 import respx
 
-from engine.session import NSE_HOME, NseSession
+from engine.session import NSE_HOME, NseSession, RequestBudget, RequestPriority
 
 
 @respx.mock
@@ -53,3 +54,157 @@ async def test_context_manager():
     async with NseSession() as session:
         assert session._client is not None
     assert session._client is None
+
+
+async def test_budget_serves_burst_without_waiting():
+    budget = RequestBudget(rate=1.0, burst=3)
+    waits = [await budget.acquire(RequestPriority.POLL) for _ in range(3)]
+    assert waits == [0.0, 0.0, 0.0]
+
+
+async def test_budget_serves_poll_before_earlier_bulk_waiters():
+    budget = RequestBudget(rate=50.0, burst=1)
+    await budget.acquire(RequestPriority.BULK)
+    order: list[str] = []
+
+    async def take(name: str, priority: RequestPriority) -> None:
+        await budget.acquire(priority)
+        order.append(name)
+
+    bulk = [asyncio.create_task(take(f"bulk{i}", RequestPriority.BULK)) for i in range(3)]
+    await asyncio.sleep(0)
+    poll = asyncio.create_task(take("poll", RequestPriority.POLL))
+    await asyncio.gather(*bulk, poll)
+
+    assert order[0] == "poll"
+    assert order[1:] == ["bulk0", "bulk1", "bulk2"]
+
+
+async def test_budget_rate_limits_after_burst():
+    budget = RequestBudget(rate=20.0, burst=1)
+    await budget.acquire(RequestPriority.POLL)
+    waited = await budget.acquire(RequestPriority.POLL)
+    assert 0.02 <= waited < 0.2
+
+
+@respx.mock
+async def test_get_records_wait_stats_per_host_and_priority():
+    respx.get(re.compile(r"https://www\.nseindia\.com")).mock(return_value=httpx.Response(200))
+    respx.get(re.compile(r"https://nsearchives\.nseindia\.com")).mock(
+        return_value=httpx.Response(200)
+    )
+    async with NseSession() as session:
+        await session.get("https://www.nseindia.com/api/test")
+        await session.get(
+            "https://nsearchives.nseindia.com/corporate/a.pdf", priority=RequestPriority.BULK
+        )
+        stats = session.budget_stats()
+
+    assert stats["www.nseindia.com:poll:requests"] == 2  # home page + API call
+    assert stats["nsearchives.nseindia.com:bulk:requests"] == 1
+    assert stats["nsearchives.nseindia.com:bulk:wait_max_s"] == 0.0
+
+
+@respx.mock
+async def test_concurrent_refreshes_share_one_home_page_hit():
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        await asyncio.gather(*(session.refresh() for _ in range(5)))
+    assert home.call_count == 2  # initialize + one shared refresh
+
+
+@respx.mock
+async def test_get_retries_once_after_refresh_on_stale_cookies():
+    api = respx.get("https://www.nseindia.com/api/test").mock(
+        side_effect=[httpx.Response(401), httpx.Response(200, json={"ok": True})]
+    )
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        response = await session.get("https://www.nseindia.com/api/test")
+    assert response.status_code == 200
+    assert api.call_count == 2
+    assert home.call_count == 2
+
+
+@respx.mock
+async def test_concurrent_stale_requests_trigger_a_single_refresh():
+    api = respx.get("https://www.nseindia.com/api/test").mock(
+        side_effect=[httpx.Response(403)] * 3 + [httpx.Response(200)] * 3
+    )
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession() as session:
+        responses = await asyncio.gather(
+            *(session.get("https://www.nseindia.com/api/test") for _ in range(3))
+        )
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert api.call_count == 6
+    assert home.call_count == 2
+
+
+@respx.mock
+async def test_get_refreshes_proactively_before_cookie_expiry():
+    expires = httpx.Response(
+        200, headers={"set-cookie": "nsit=abc; Max-Age=30; Domain=.nseindia.com; Path=/"}
+    )
+    respx.get("https://www.nseindia.com/api/test").mock(return_value=httpx.Response(200))
+    home = respx.get(NSE_HOME).mock(return_value=expires)
+    async with NseSession() as session:
+        assert session._refresh_due_at is not None
+        session._refresh_due_at = 0.0  # pretend the margin has been reached
+        await session.get("https://www.nseindia.com/api/test")
+    assert home.call_count == 2
+
+
+_SET_COOKIE = {"set-cookie": "nsit=abc; Max-Age=3600; Domain=.nseindia.com; Path=/"}
+
+
+@respx.mock
+async def test_initialize_reuses_cookies_shared_by_another_replica(fake_redis):
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200, headers=_SET_COOKIE))
+    async with NseSession(redis=fake_redis) as first:
+        assert first._client.cookies.get("nsit") == "abc"
+        async with NseSession(redis=fake_redis) as second:
+            assert second._client.cookies.get("nsit") == "abc"
+            assert second._refresh_due_at is not None
+    assert home.call_count == 1
+    assert 0 < await fake_redis.ttl("nse:cookies") <= 3600
+
+
+@respx.mock
+async def test_stale_replica_adopts_cookies_refreshed_elsewhere(fake_redis):
+    respx.get("https://www.nseindia.com/api/test").mock(
+        side_effect=[httpx.Response(401), httpx.Response(200)]
+    )
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200, headers=_SET_COOKIE))
+    async with NseSession(redis=fake_redis) as first, NseSession(redis=fake_redis) as second:
+        await first.refresh()  # first replica renews; second still holds the old jar
+        response = await second.get("https://www.nseindia.com/api/test")
+    assert response.status_code == 200
+    assert home.call_count == 2  # initial + first's refresh; second never hit it
+
+
+@respx.mock
+async def test_initialize_without_shared_cookies_hits_home_page(fake_redis):
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with NseSession(redis=fake_redis):
+        pass
+    assert home.call_count == 1
+    assert await fake_redis.get("nse:cookies:lock") is None
+
+
+@respx.mock
+async def test_stream_retries_once_after_session_expiry():
+    respx.get("https://nsearchives.nseindia.com/a.pdf").mock(
+        side_effect=[httpx.Response(403), httpx.Response(200, content=b"%PDF")]
+    )
+    home = respx.get(NSE_HOME).mock(return_value=httpx.Response(200))
+    async with (
+        NseSession() as session,
+        session.stream(
+            "https://nsearchives.nseindia.com/a.pdf", priority=RequestPriority.BULK
+        ) as response,
+    ):
+        body = b"".join([chunk async for chunk in response.aiter_bytes()])
+    assert response.status_code == 200
+    assert body == b"%PDF"
+    assert home.call_count == 2
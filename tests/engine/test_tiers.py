@@ -0,0 +1,64 @@
+import pytest
+
+from engine.tiers import SizeTier, parse_file_size, parse_size_tiers, tier_for, tier_pool_sizes
+
+_TIERS = [
+    {"name": "small", "max_bytes": 1_000_000, "share": 0.5},
+    {"name": "medium", "max_bytes": 10_000_000, "share": 0.25},
+    {"name": "bulk", "share": 0.25},
+]
+
+
+def test_parse_size_tiers_reads_config():
+    assert parse_size_tiers(_TIERS) == [
+        SizeTier("small", 1_000_000, 0.5),
+        SizeTier("medium", 10_000_000, 0.25),
+        SizeTier("bulk", None, 0.25),
+    ]
+    assert parse_size_tiers(None) == []
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        [{"name": "small", "max_bytes": 10}, {"name": "small"}],
+        [{"name": "small", "max_bytes": 10}, {"name": "bulk", "max_bytes": 20}],
+        [{"name": "big", "max_bytes": 20}, {"name": "small", "max_bytes": 10}, {"name": "bulk"}],
+        [{"name": "small", "max_bytes": 10, "share": 0}, {"name": "bulk"}],
+    ],
+)
+def test_parse_size_tiers_rejects_invalid_config(raw):
+    with pytest.raises(ValueError):
+        parse_size_tiers(raw)
+
+
+def test_tier_for_picks_first_covering_tier_and_last_for_unknown():
+    tiers = parse_size_tiers(_TIERS)
+    assert tier_for(tiers, 250_000).name == "small"
+    assert tier_for(tiers, 1_000_000).name == "small"
+    assert tier_for(tiers, 1_000_001).name == "medium"
+    assert tier_for(tiers, 300_000_000).name == "bulk"
+    assert tier_for(tiers, None).name == "bulk"
+
+
+def test_tier_pool_sizes_split_by_share_with_at_least_one_worker():
+    tiers = parse_size_tiers(_TIERS)
+    assert tier_pool_sizes(tiers, 8) == {"small": 4, "medium": 2, "bulk": 2}
+    assert tier_pool_sizes(tiers, 1) == {"small": 1, "medium": 1, "bulk": 1}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("245 KB", 245 * 1024),
+        ("1.5 MB", int(1.5 * 1024 * 1024)),
+        ("512", 512),
+        (2048, 2048),
+        ("", None),
+        ("n/a", None),
+        (None, None),
+        (True, None),
+    ],
+)
+def test_parse_file_size(value, expected):
+    assert parse_file_size(value) == expected
@@ -11,6 +11,7 @@ from llm.provider import (
     LLMContextWindowError,
     LLMRateLimitError,
     LLMResponseFormatError,
+    TokenEstimator,
     parse_analysis_json,
 )
 
@@ -704,3 +705,67 @@ def mock_sleep(monkeypatch):
     monkeypatch.setattr("llm.anthropic.asyncio.sleep", sleep_mock)
     monkeypatch.setattr("llm.gemini.asyncio.sleep", sleep_mock)
     return sleep_mock
+
+
+def test_token_estimator_counts_text_and_images():
+    estimator = TokenEstimator(lambda width, height: width * height // 1000)
+    assert estimator.estimate("x" * 400) == 100
+    assert estimator.estimate("x" * 400, [(1000, 2000), (1000, 1000)]) == 100 + 2000 + 1000
+
+
+def test_token_estimator_calibrates_towards_reported_usage():
+    estimator = TokenEstimator(lambda width, height: 1000)
+    estimator.record("x" * 400, [(900, 1200)], 2200)  # estimate was 1100
+    assert estimator.estimate("x" * 400, [(900, 1200)]) == 2200
+    assert estimator.stats()["samples"] == 1
+    assert estimator.stats()["mean_relative_error"] == pytest.approx(0.5)
+
+
+def test_token_estimator_ignores_missing_usage():
+    estimator = TokenEstimator(lambda width, height: 1000)
+    estimator.record("prompt", [], MagicMock())
+    estimator.record("prompt", [], None)
+    assert estimator.stats()["samples"] == 0
+
+
+def test_provider_image_token_formulas():
+    from llm import anthropic as anthropic_llm
+    from llm import gemini as gemini_llm
+    from llm import openai as openai_llm
+
+    assert anthropic_llm._image_tokens(1000, 1000) == 1334
+    assert anthropic_llm._image_tokens(3136, 1568) == anthropic_llm._image_tokens(1568, 784)
+    assert openai_llm._image_tokens(1024, 1024) == 85 + 170 * 4
+    assert openai_llm._image_tokens(636, 900) == 85 + 170 * 4
+    assert gemini_llm._image_tokens(300, 300) == 258
+    assert gemini_llm._image_tokens(900, 1273) == 258 * 4
+
+
+async def test_anthropic_records_reported_input_tokens():
+    mock_response = MagicMock()
+    mock_response.content = [MagicMock()]
+    mock_response.content[0].type = "text"
+    mock_response.content[0].text = _ANALYSIS_JSON
+    mock_response.usage.input_tokens = 4321
+    with patch("llm.anthropic._anthropic.AsyncAnthropic") as mock_cls:
+        mock_client = AsyncMock()
+        mock_client.messages.create = AsyncMock(return_value=mock_response)
+        mock_cls.return_value = mock_client
+        provider = AnthropicProvider(api_key="test-key")
+        assert provider.context_window_tokens == 200_000
+        await provider.analyze_text_announcement(
+            text="Infosys acquires XYZ...",
+            categories=["financial_results", "acquisition"],
+            symbol="INFY",
+            company="Infosys Ltd",
+            announcement_text="Acquisition update",
+        )
+    assert provider.token_estimator.stats()["samples"] == 1
+    assert provider.estimate_tokens(prompt="", image_sizes=[]) > 0
+
+
+def test_openai_context_window_from_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_CONTEXT_WINDOW", "32768")
+    with patch("llm.openai.AsyncOpenAI"):
+        provider = OpenAIProvider(api_key="test-key")
+    assert provider.context_window_tokens == 32768